@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Archive Workers
+===============
+
+Runs archiving off the GUI thread so it never freezes the kiosk:
+- ArchiveSnapshotThread: SQLite online backup of the live database
+- PeriodArchiveThread: moves closed records into per-pay-period archives
+"""
+
+import logging
+import os
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from utils.archive_catalog import get_archive_catalog
+from utils.database_utils import ArchiveManager, snapshot_database
+from utils.db_connection import close_thread_connections
+
+
+class ArchiveSnapshotThread(QThread):
+    """Copies the live database to an archive file in page-stepped increments, then catalogs it."""
+
+    snapshot_progress = pyqtSignal(int, int)        # pages copied, total pages
+    snapshot_finished = pyqtSignal(bool, str, str)  # success, message, archive path
+
+    def __init__(self, database_path: str, archive_path: str, pages_per_step: int = 256, parent=None):
+        super().__init__(parent)
+        self.database_path = database_path
+        self.archive_path = archive_path
+        self.pages_per_step = pages_per_step
+
+    def run(self):
+        try:
+            success, message = snapshot_database(
+                self.database_path,
+                self.archive_path,
+                pages=self.pages_per_step,
+                progress=self.snapshot_progress.emit,
+            )
+            if success:
+                # Checksums the whole file, so keep it off the GUI thread as well
+                get_archive_catalog(os.path.dirname(self.archive_path)).record(self.archive_path)
+        except Exception as e:
+            logging.error(f"Archive snapshot thread failed: {e}")
+            success, message = False, f"Error creating archive: {str(e)}"
+        self.snapshot_finished.emit(success, message, self.archive_path)
+
+
+class PeriodArchiveThread(QThread):
+    """Moves closed clock records and checked-out visitors before a cutoff into period archives."""
+
+    period_progress = pyqtSignal(int, int)    # periods done, total periods
+    period_finished = pyqtSignal(bool, str)   # success, message
+
+    def __init__(self, database_path: str, archive_folder: str, cutoff, start_day: int,
+                 on_deleted=None, parent=None):
+        super().__init__(parent)
+        self.archive_manager = ArchiveManager(database_path, archive_folder)
+        self.cutoff = cutoff
+        self.start_day = start_day
+        self.on_deleted = on_deleted
+
+    def run(self):
+        try:
+            success, message = self.archive_manager.archive_period(
+                self.cutoff,
+                self.start_day,
+                progress=self.period_progress.emit,
+                on_deleted=self.on_deleted,
+            )
+        except Exception as e:
+            logging.error(f"Period archive thread failed: {e}")
+            success, message = False, f"Error archiving periods: {str(e)}"
+        finally:
+            close_thread_connections()
+        self.period_finished.emit(success, message)
@@ -18,16 +18,18 @@ Author: StaffClock Progressive System
 Date: December 2024
 """
 
-import sqlite3
 import datetime
 import time
 import logging
 import threading
-import os
 from typing import Dict, List, Set
 from PyQt6.QtCore import QObject, pyqtSignal, QTimer
 from PyQt6.QtWidgets import QApplication
 
+from utils.db_connection import get_connection
+from utils.logging_manager import get_subsystem_logger
+from utils.open_shift_registry import get_open_shift_registry
+
 
 class BackgroundTimesheetMonitor(QObject):
     """
@@ -58,28 +60,13 @@ class BackgroundTimesheetMonitor(QObject):
         self.setup_logging()
         
     def setup_logging(self):
-        """Setup dedicated logging for the background monitor."""
-        # Create logs directory
-        os.makedirs("logs", exist_ok=True)
-        
-        # Setup file handler for background monitor
-        file_handler = logging.FileHandler("logs/background_timesheet_monitor.log")
-        file_handler.setLevel(logging.INFO)
-        
-        formatter = logging.Formatter(
-            '%(asctime)s [%(levelname)s] BackgroundMonitor - %(message)s'
-        )
-        file_handler.setFormatter(formatter)
-        
-        # Create logger
-        self.logger = logging.getLogger('background_timesheet_monitor')
-        self.logger.setLevel(logging.INFO)
-        self.logger.addHandler(file_handler)
-        
-        # Also log to main system
-        main_logger = logging.getLogger('main')
-        if main_logger:
-            self.logger.addHandler(main_logger.handlers[0] if main_logger.handlers else logging.StreamHandler())
+        """Get the monitor's logger.
+
+        Its records propagate to the root logger's queued handler, so they land in the
+        main log (tagged with this module) and are written on the logging thread. The
+        level comes from settings.json "log_levels" ("monitor").
+        """
+        self.logger = get_subsystem_logger('monitor')
     
     def start_monitoring(self, initial_pending_workers: Set[str] = None):
         """
@@ -125,21 +112,11 @@ class BackgroundTimesheetMonitor(QObject):
     def discover_pending_workers(self):
         """Discover workers with active shifts by checking the database."""
         try:
-            conn = sqlite3.connect(self.database_path)
-            c = conn.cursor()
-            
             # Find workers with incomplete shifts (clocked in but not out)
-            c.execute("""
-                SELECT DISTINCT cr.staff_code, s.name, s.role
-                FROM clock_records cr
-                JOIN staff s ON cr.staff_code = s.code
-                WHERE cr.clock_out_time IS NULL
-                ORDER BY s.name
-            """)
-            
-            active_workers = c.fetchall()
-            conn.close()
-            
+            active_workers = [
+                (shift.staff_code, shift.name, shift.role)
+                for shift in get_open_shift_registry(self.database_path).active_shifts()
+            ]
             self.pending_workers = {staff_code for staff_code, _, _ in active_workers}
             
             # Initialize status tracking
@@ -168,10 +145,11 @@ class BackgroundTimesheetMonitor(QObject):
             return
         
         try:
-            conn = sqlite3.connect(self.database_path)
+            conn = get_connection(self.database_path)
             c = conn.cursor()
             
             newly_completed = []
+            log_progress = self.logger.isEnabledFor(logging.DEBUG)
             
             for staff_code in list(self.pending_workers):
                 worker_info = self.worker_last_status.get(staff_code, {})
@@ -179,17 +157,17 @@ class BackgroundTimesheetMonitor(QObject):
                 
                 # Check if worker has completed their shift
                 if self.check_worker_completed(c, staff_code):
-                    self.logger.info(f"🎉 {name} ({staff_code}) has clocked out!")
+                    self.logger.info("🎉 %s (%s) has clocked out!", name, staff_code)
                     
                     # Generate timesheet immediately
                     success = self.generate_timesheet_for_worker(c, staff_code, worker_info)
                     
                     if success:
-                        self.logger.info(f"✅ Timesheet automatically generated for {name}")
+                        self.logger.info("✅ Timesheet automatically generated for %s", name)
                         self.total_timesheets_generated += 1
                         self.timesheet_generated.emit(staff_code, name, True)
                     else:
-                        self.logger.error(f"❌ Failed to generate timesheet for {name}")
+                        self.logger.error("❌ Failed to generate timesheet for %s", name)
                         self.timesheet_generated.emit(staff_code, name, False)
                     
                     # Remove from pending list
@@ -203,17 +181,15 @@ class BackgroundTimesheetMonitor(QObject):
                     }
                     self.worker_clocked_out.emit(staff_code, name, timesheet_info)
                 
-                else:
-                    # Still active - update status
+                elif log_progress:
+                    # Still active - the hours are only worked out for the debug line
                     hours_worked = self.calculate_hours_worked_so_far(c, staff_code)
                     if hours_worked > 0:
-                        self.logger.debug(f"⏳ {name} still working - {hours_worked:.1f}h so far")
-            
-            conn.close()
+                        self.logger.debug("⏳ %s still working - %.1fh so far", name, hours_worked)
             
             if newly_completed:
-                completed_names = [name for _, name in newly_completed]
-                self.logger.info(f"🎊 {len(newly_completed)} workers completed: {', '.join(completed_names)}")
+                self.logger.info("🎊 %d workers completed: %s", len(newly_completed),
+                                 ', '.join(name for _, name in newly_completed))
                 self.monitoring_status.emit(f"🎉 Generated timesheets for {len(newly_completed)} workers")
             
             # Check if we should continue monitoring
@@ -232,16 +208,8 @@ class BackgroundTimesheetMonitor(QObject):
     def check_worker_completed(self, cursor, staff_code: str) -> bool:
         """Check if a worker has completed their current shift."""
         try:
-            # Look for incomplete records for this worker (any age)
-            cursor.execute("""
-                SELECT COUNT(*)
-                FROM clock_records
-                WHERE staff_code = ? 
-                AND clock_out_time IS NULL
-            """, (staff_code,))
-            
-            incomplete_count = cursor.fetchone()[0]
-            return incomplete_count == 0  # True if no incomplete records
+            # The open-shift registry is updated on every clock-out, so no query is needed
+            return not get_open_shift_registry(self.database_path).is_clocked_in(staff_code)
             
         except Exception as e:
             self.logger.error(f"Error checking completion status for {staff_code}: {e}")
@@ -250,22 +218,8 @@ class BackgroundTimesheetMonitor(QObject):
     def calculate_hours_worked_so_far(self, cursor, staff_code: str) -> float:
         """Calculate hours worked so far for active workers."""
         try:
-            cursor.execute("""
-                SELECT clock_in_time
-                FROM clock_records
-                WHERE staff_code = ? 
-                AND clock_out_time IS NULL
-                ORDER BY clock_in_time DESC
-                LIMIT 1
-            """, (staff_code,))
-            
-            result = cursor.fetchone()
-            if result:
-                clock_in_time = datetime.datetime.fromisoformat(result[0])
-                hours_so_far = (datetime.datetime.now() - clock_in_time).total_seconds() / 3600
-                return max(0, hours_so_far)
-            
-            return 0
+            shift = get_open_shift_registry(self.database_path).get(staff_code)
+            return shift.hours_so_far() if shift else 0
             
         except Exception as e:
             self.logger.error(f"Error calculating hours for {staff_code}: {e}")
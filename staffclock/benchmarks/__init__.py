@@ -0,0 +1 @@
+"""Load benchmarks for the clock path; run them from the staffclock directory with `python -m benchmarks.<name>`."""
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Synthetic Dataset Generator
+===========================
+
+Builds a StaffClock database of realistic size for scaling tests: a roster
+of 100 to 20,000 staff, years of shifts, visitors, fingerprint enrolment
+and verification logs, leavers in archive_records, and optionally pay-period
+archive databases made by the same ArchiveManager the application uses.
+
+Shift patterns:
+- Day, early, late and part-time shifts on a fixed weekly rota
+- Night shifts that cross midnight
+- Split shifts (two clock records on one day)
+- Breaks on longer shifts (shift_breaks rows plus the break_time total)
+- Forgotten clock-outs: most are corrected by an admin with a note, the
+  rest are left open
+
+Rows are generated day by day, so ids follow time as they do in a live
+database, and written with executemany in chunks. The same seed and end
+date always produce the same database.
+
+Usage (from the staffclock directory):
+    python -m benchmarks.generate_dataset /tmp/scale.db --staff 2000 --years 3
+    python -m benchmarks.generate_dataset /tmp/huge.db --staff 20000 --years 2 --archive-months 6
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utils.database_utils import ArchiveManager
+from utils.db_connection import get_connection, get_connection_manager
+from utils.schema_migrations import run_migrations
+from utils.staff_codes import STAFF_CODE_MIN, STAFF_CODE_MAX
+from utils.time_utils import to_epoch
+
+# name: (segments as (start minute of day, length in minutes), days worked per week, weight)
+SHIFT_PATTERNS = {
+    'day': ([(8 * 60, 8 * 60)], 5, 0.40),
+    'early': ([(6 * 60, 8 * 60)], 5, 0.10),
+    'late': ([(14 * 60, 8 * 60)], 5, 0.15),
+    'night': ([(22 * 60, 9 * 60)], 4, 0.15),
+    'split': ([(7 * 60, 4 * 60), (16 * 60, 4 * 60)], 5, 0.05),
+    'part_time': ([(9 * 60, 5 * 60)], 3, 0.15),
+}
+
+ROLES = ('Care Assistant', 'Senior Carer', 'Nurse', 'Kitchen', 'Domestic', 'Maintenance',
+         'Administrator', 'Activities Coordinator', 'Manager')
+
+FIRST_NAMES = ('Olivia', 'Amelia', 'Isla', 'Ava', 'Mia', 'Grace', 'Sophia', 'Lily', 'Freya', 'Emily',
+               'Oliver', 'George', 'Noah', 'Arthur', 'Harry', 'Leo', 'Jack', 'Charlie', 'Oscar', 'Jacob',
+               'Priya', 'Aisha', 'Fatima', 'Mohammed', 'Ali', 'Andrei', 'Maria', 'Piotr', 'Anna', 'Chen')
+LAST_NAMES = ('Smith', 'Jones', 'Taylor', 'Brown', 'Williams', 'Wilson', 'Johnson', 'Davies', 'Patel',
+              'Robinson', 'Wright', 'Thompson', 'Evans', 'Walker', 'White', 'Roberts', 'Green', 'Hall',
+              'Khan', 'Iacob', 'Nowak', 'Kowalski', 'Popescu', 'Wang', 'Singh', 'Murphy', "O'Brien")
+
+VISIT_PURPOSES = ('Family visit', 'GP visit', 'Contractor', 'Delivery', 'Inspection', 'Interview',
+                  'Hairdresser', 'Pharmacy', 'Social worker', 'Maintenance')
+
+RECORD_NOTES = ('Stayed late to cover handover', 'Left early - appointment', 'Covered extra shift',
+                'Training session', 'Swapped shift with colleague', 'Late - traffic')
+
+# Epoch triggers fire one UPDATE per inserted row; the generator fills the epoch columns itself
+_BULK_SUSPENDED_TRIGGERS = ('trg_clock_records_epoch_insert', 'trg_visitors_epoch_insert')
+
+
+class StaffProfile:
+    """One generated staff member and their rota."""
+
+    __slots__ = ('code', 'name', 'role', 'pattern', 'weekdays', 'starts', 'leaves', 'enrolled')
+
+    def __init__(self, code: str, name: str, role: str, pattern: str, weekdays: Sequence[int],
+                 starts: date, leaves: Optional[date], enrolled: bool):
+        self.code = code
+        self.name = name
+        self.role = role
+        self.pattern = pattern
+        self.weekdays = frozenset(weekdays)
+        self.starts = starts
+        self.leaves = leaves
+        self.enrolled = enrolled
+
+    def works_on(self, day: date) -> bool:
+        if day < self.starts or (self.leaves is not None and day >= self.leaves):
+            return False
+        return day.weekday() in self.weekdays
+
+
+class DatasetGenerator:
+    """Generates one synthetic database; see the module docstring for what goes in it."""
+
+    def __init__(self, database_path: str, staff: int = 500, years: float = 2.0,
+                 end_date: Optional[date] = None, seed: int = 1, chunk_size: int = 5000,
+                 leaver_ratio: float = 0.15, enrolled_ratio: float = 0.6,
+                 forgotten_rate: float = 0.005, forgotten_open_ratio: float = 0.2,
+                 absence_rate: float = 0.05, visitors_per_day: float = 6.0):
+        self.database_path = database_path
+        self.staff = staff
+        self.years = years
+        self.end_date = end_date or date.today()
+        self.start_date = self.end_date - timedelta(days=int(years * 365))
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.leaver_ratio = leaver_ratio
+        self.enrolled_ratio = enrolled_ratio
+        self.forgotten_rate = forgotten_rate
+        self.forgotten_open_ratio = forgotten_open_ratio
+        self.absence_rate = absence_rate
+        self.visitors_per_day = visitors_per_day
+        self.rng = random.Random(seed)
+
+        self.counts: Dict[str, int] = {}
+        self._buffers: Dict[str, List[tuple]] = {}
+        self._next_record_id = 1
+        self._next_visitor_id = 1
+        self._verifications: Dict[str, Tuple[int, str]] = {}
+
+    # ------------------------------------------------------------------ roster
+
+    def _codes(self, count: int) -> List[str]:
+        """Four-digit codes as the keypad uses; five-digit ones once the 9,000 are used up."""
+        capacity = STAFF_CODE_MAX - STAFF_CODE_MIN + 1
+        codes = self.rng.sample(range(STAFF_CODE_MIN, STAFF_CODE_MAX + 1), min(count, capacity))
+        if count > capacity:
+            logging.warning(f"{count} staff exceed the {capacity} four-digit codes; "
+                            f"{count - capacity} get five-digit codes")
+            codes.extend(range(STAFF_CODE_MAX + 1, STAFF_CODE_MAX + 1 + count - capacity))
+        return [str(code) for code in codes]
+
+    def build_roster(self) -> List[StaffProfile]:
+        leavers = int(self.staff * self.leaver_ratio)
+        names = list(SHIFT_PATTERNS)
+        weights = [spec[2] for spec in SHIFT_PATTERNS.values()]
+        span = (self.end_date - self.start_date).days
+
+        roster = []
+        for index, code in enumerate(self._codes(self.staff + leavers)):
+            pattern = self.rng.choices(names, weights)[0]
+            days_per_week = SHIFT_PATTERNS[pattern][1]
+            if pattern == 'day' and self.rng.random() < 0.7:
+                weekdays = range(5)  # Monday to Friday
+            else:
+                weekdays = self.rng.sample(range(7), days_per_week)
+            # A third of the roster joined during the period rather than before it
+            starts = self.start_date
+            if self.rng.random() < 0.33:
+                starts += timedelta(days=self.rng.randrange(max(1, span)))
+            leaves = None
+            if index >= self.staff:
+                leaves = starts + timedelta(days=self.rng.randrange(30, max(31, (self.end_date - starts).days + 1)))
+                leaves = min(leaves, self.end_date)
+            name = f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+            roster.append(StaffProfile(code, name, self.rng.choice(ROLES), pattern, weekdays,
+                                       starts, leaves, leaves is None and self.rng.random() < self.enrolled_ratio))
+        return roster
+
+    # ------------------------------------------------------------------ writing
+
+    def _add(self, table: str, row: tuple):
+        buffer = self._buffers.setdefault(table, [])
+        buffer.append(row)
+        if len(buffer) >= self.chunk_size:
+            self._flush(table)
+
+    def _flush(self, table: Optional[str] = None):
+        tables = [table] if table else list(self._buffers)
+        conn = get_connection(self.database_path)
+        for name in tables:
+            rows = self._buffers.get(name)
+            if not rows:
+                continue
+            with conn:
+                conn.executemany(_INSERTS[name], rows)
+            self.counts[name] = self.counts.get(name, 0) + len(rows)
+            rows.clear()
+
+    @contextmanager
+    def _bulk_load(self) -> Iterator[None]:
+        """Fast, unsafe settings and suspended per-row triggers while the file is being filled."""
+        conn = get_connection(self.database_path)
+        saved = conn.execute(
+            f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN "
+            f"({', '.join('?' for _ in _BULK_SUSPENDED_TRIGGERS)})", _BULK_SUSPENDED_TRIGGERS
+        ).fetchall()
+        conn.execute('PRAGMA synchronous=OFF')
+        with conn:
+            for name, _ in saved:
+                conn.execute(f'DROP TRIGGER {name}')
+        try:
+            yield
+        finally:
+            self._flush()
+            with conn:
+                for _, sql in saved:
+                    conn.execute(sql)
+            conn.execute('PRAGMA synchronous=NORMAL')
+
+    # ------------------------------------------------------------------ rows
+
+    def _when(self, day: date, minute: float) -> datetime:
+        return datetime(day.year, day.month, day.day) + timedelta(minutes=minute, seconds=self.rng.randrange(60))
+
+    def _shift_rows(self, profile: StaffProfile, day: date):
+        segments = SHIFT_PATTERNS[profile.pattern][0]
+        for start_minute, length in segments:
+            clock_in = self._when(day, start_minute + self.rng.gauss(-5, 6))
+            clock_out = self._when(day, start_minute + length + self.rng.gauss(5, 10))
+            notes = self.rng.choice(RECORD_NOTES) if self.rng.random() < 0.02 else None
+
+            forgotten = self.rng.random() < self.forgotten_rate
+            if forgotten:
+                if self.rng.random() < self.forgotten_open_ratio:
+                    clock_out = None
+                else:
+                    clock_out = self._when(day, start_minute + length)
+                    notes = "Clock-out added by admin (forgot to clock out)"
+
+            breaks = []
+            if clock_out is not None and length >= 6 * 60:
+                first = self._when(day, start_minute + length * self.rng.uniform(0.4, 0.6))
+                breaks.append((first, self.rng.choice((20, 30, 30, 45, 60))))
+                if length >= 8 * 60 and self.rng.random() < 0.3:
+                    breaks.append((first + timedelta(minutes=150), 15))
+
+            yield clock_in, clock_out, notes, breaks
+
+    def _write_shift(self, profile: StaffProfile, clock_in: datetime, clock_out: Optional[datetime],
+                     notes: Optional[str], breaks: List[Tuple[datetime, int]]):
+        clock_in_text = clock_in.isoformat()
+        clock_out_text = clock_out.isoformat() if clock_out else None
+        break_total = float(sum(minutes for _, minutes in breaks))
+
+        if profile.leaves is not None:
+            # Leavers' history was moved to archive_records when they were offboarded
+            self._add('archive_records', (profile.name, profile.code, clock_in_text, clock_out_text, notes))
+            return
+
+        record_id = self._next_record_id
+        self._next_record_id += 1
+        self._add('clock_records', (record_id, profile.code, clock_in_text, clock_out_text, notes,
+                                    str(break_total) if breaks else None,
+                                    to_epoch(clock_in), to_epoch(clock_out) if clock_out else None))
+        for break_start, minutes in breaks:
+            break_end = break_start + timedelta(minutes=minutes)
+            self._add('shift_breaks', (record_id, profile.code, break_start.isoformat(),
+                                       break_end.isoformat(), float(minutes)))
+
+        if profile.enrolled:
+            for moment in (clock_in, clock_out):
+                if moment is None:
+                    continue
+                if self.rng.random() < 0.03:
+                    # A failed read before the successful one
+                    self._add('fingerprint_logs', ('UNKNOWN', 'VERIFICATION', False,
+                                                   round(self.rng.uniform(10, 45), 1), "No match found",
+                                                   _log_time(moment - timedelta(seconds=5))))
+                self._add('fingerprint_logs', (profile.code, 'VERIFICATION', True,
+                                               round(self.rng.uniform(70, 99), 1), None, _log_time(moment)))
+                count, _ = self._verifications.get(profile.code, (0, ''))
+                self._verifications[profile.code] = (count + 1, _log_time(moment))
+
+    def _write_visitors(self, day: date):
+        # Fewer visitors at weekends
+        expected = self.visitors_per_day * (0.6 if day.weekday() >= 5 else 1.0)
+        for _ in range(_poisson(self.rng, expected)):
+            time_in = self._when(day, self.rng.uniform(8 * 60, 18 * 60))
+            time_out = time_in + timedelta(minutes=self.rng.uniform(15, 240))
+            if self.rng.random() < 0.01:
+                time_out = None  # never signed out
+            visitor_id = self._next_visitor_id
+            self._next_visitor_id += 1
+            plate = (f"{self.rng.choice('ABCDEFGHKLMNOPRSVWY')}{self.rng.choice('ABCDEFGHJKLMNOPRSTUVWXY')}"
+                     f"{self.rng.randrange(2, 75):02d} {''.join(self.rng.choices('ABCDEFGHJKLMNOPRSTUVWXYZ', k=3))}")
+            self._add('visitors', (visitor_id, f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}",
+                                   plate, self.rng.choice(VISIT_PURPOSES), time_in.isoformat(),
+                                   time_out.isoformat() if time_out else None,
+                                   to_epoch(time_in), to_epoch(time_out) if time_out else None))
+
+    # ------------------------------------------------------------------ run
+
+    def generate(self) -> Dict[str, int]:
+        if os.path.exists(self.database_path):
+            raise FileExistsError(f"{self.database_path} already exists")
+        success, message = run_migrations(self.database_path)
+        if not success:
+            raise RuntimeError(message)
+
+        roster = self.build_roster()
+        active = [profile for profile in roster if profile.leaves is None]
+        with self._bulk_load():
+            for profile in active:
+                self._add('staff', (profile.name, profile.code, None, profile.role, None))
+            self._flush('staff')
+
+            day = self.start_date
+            total_days = (self.end_date - self.start_date).days
+            while day < self.end_date:
+                for profile in roster:
+                    if profile.works_on(day) and self.rng.random() >= self.absence_rate:
+                        for clock_in, clock_out, notes, breaks in self._shift_rows(profile, day):
+                            self._write_shift(profile, clock_in, clock_out, notes, breaks)
+                self._write_visitors(day)
+                day += timedelta(days=1)
+                done = (day - self.start_date).days
+                if done % 30 == 0:
+                    logging.info(f"Generated {done}/{total_days} days")
+
+            enrolled_at = _log_time(datetime.combine(self.start_date, datetime.min.time()))
+            for profile in active:
+                if not profile.enrolled:
+                    continue
+                count, last = self._verifications.get(profile.code, (0, None))
+                self._add('fingerprint_users', (profile.code, profile.name, f"emp_{profile.code}_{self.seed}",
+                                                enrolled_at, last, count, 'ACTIVE'))
+                self._add('fingerprint_logs', (profile.code, 'ENROLLMENT', True, 100.0,
+                                               "Enrolled by dataset generator", enrolled_at))
+
+        get_connection(self.database_path).execute('PRAGMA optimize')
+        return dict(self.counts)
+
+    def archive(self, archive_folder: str, months: int, start_day: int) -> Tuple[bool, str]:
+        """Move everything older than `months` into pay-period archives, as the admin panel does."""
+        cutoff = self.end_date - timedelta(days=int(months * 30.4))
+        return ArchiveManager(self.database_path, archive_folder).archive_period(cutoff, start_day)
+
+
+_INSERTS = {
+    'staff': 'INSERT INTO staff (name, code, fingerprint, role, notes) VALUES (?, ?, ?, ?, ?)',
+    'clock_records': '''
+        INSERT INTO clock_records (id, staff_code, clock_in_time, clock_out_time, notes, break_time,
+                                   clock_in_epoch, clock_out_epoch)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'shift_breaks': '''
+        INSERT INTO shift_breaks (clock_record_id, staff_code, break_start, break_end, minutes)
+        VALUES (?, ?, ?, ?, ?)
+    ''',
+    'archive_records': '''
+        INSERT INTO archive_records (staff_name, staff_code, clock_in, clock_out, notes)
+        VALUES (?, ?, ?, ?, ?)
+    ''',
+    'visitors': '''
+        INSERT INTO visitors (id, name, car_reg, purpose, time_in, time_out, time_in_epoch, time_out_epoch)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'fingerprint_users': '''
+        INSERT INTO fingerprint_users (employee_id, employee_name, biometric_user_id, enrollment_date,
+                                       last_verification, verification_count, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'fingerprint_logs': '''
+        INSERT INTO fingerprint_logs (employee_id, action_type, success, match_score, notes, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''',
+}
+
+
+def _log_time(moment: datetime) -> str:
+    """fingerprint_logs timestamps use SQLite's CURRENT_TIMESTAMP layout."""
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    # Knuth's method; means here are small
+    if mean <= 0:
+        return 0
+    limit, product, count = math.exp(-mean), rng.random(), 0
+    while product > limit:
+        product *= rng.random()
+        count += 1
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic StaffClock database for scale testing.")
+    parser.add_argument('output', help="path of the database to create (must not exist)")
+    parser.add_argument('--staff', type=int, default=500, help="active staff at the end date (100 to 20000)")
+    parser.add_argument('--years', type=float, default=2.0, help="years of history")
+    parser.add_argument('--end-date', type=date.fromisoformat, help="last day of history (default: today)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--chunk-size', type=int, default=5000, help="rows per executemany call")
+    parser.add_argument('--leaver-ratio', type=float, default=0.15, help="extra staff who left, per active staff")
+    parser.add_argument('--enrolled-ratio', type=float, default=0.6, help="share of active staff with fingerprints")
+    parser.add_argument('--forgotten-rate', type=float, default=0.005, help="share of shifts with no clock-out")
+    parser.add_argument('--forgotten-open-ratio', type=float, default=0.2,
+                        help="share of forgotten clock-outs never corrected")
+    parser.add_argument('--visitors-per-day', type=float, default=6.0)
+    parser.add_argument('--archive-months', type=int,
+                        help="move history older than this many months into pay-period archives")
+    parser.add_argument('--archive-folder', help="archive folder (default: Archive_Databases next to the output)")
+    parser.add_argument('--start-day', type=int, default=21, help="pay period start day used for archives")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+
+    generator = DatasetGenerator(
+        args.output, staff=args.staff, years=args.years, end_date=args.end_date, seed=args.seed,
+        chunk_size=args.chunk_size, leaver_ratio=args.leaver_ratio, enrolled_ratio=args.enrolled_ratio,
+        forgotten_rate=args.forgotten_rate, forgotten_open_ratio=args.forgotten_open_ratio,
+        visitors_per_day=args.visitors_per_day,
+    )
+    started = time.perf_counter()
+    try:
+        counts = generator.generate()
+    except FileExistsError as e:
+        print(f"❌ {e}")
+        return 1
+
+    manifest: Dict[str, Any] = {
+        'parameters': {key: (str(value) if isinstance(value, date) else value) for key, value in vars(args).items()},
+        'end_date': generator.end_date.isoformat(),
+        'rows': counts,
+    }
+    if args.archive_months:
+        folder = args.archive_folder or os.path.join(os.path.dirname(os.path.abspath(args.output)),
+                                                     "Archive_Databases")
+        success, message = generator.archive(folder, args.archive_months, args.start_day)
+        print(("✅ " if success else "❌ ") + message)
+        manifest['archive'] = {'folder': folder, 'success': success, 'message': message}
+
+    get_connection_manager(args.output).checkpoint()
+    get_connection_manager(args.output).close_all()
+    manifest['seconds'] = round(time.perf_counter() - started, 1)
+    manifest['size_bytes'] = os.path.getsize(args.output)
+    with open(args.output + '.manifest.json', 'w', encoding='utf-8') as handle:
+        json.dump(manifest, handle, indent=2)
+
+    print(f"✅ {args.output}: " + ", ".join(f"{count} {table}" for table, count in sorted(counts.items())))
+    print(f"   {manifest['size_bytes'] / 1024 / 1024:.1f} MB in {manifest['seconds']}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
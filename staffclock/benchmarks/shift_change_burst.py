@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Shift-Change Burst Benchmark
+============================
+
+Replays a shift change against a scratch copy of the database: the
+outgoing shift clocks out (ending any break first) while the incoming shift
+clocks in, with arrivals spread along a chosen curve and served by a number
+of kiosk threads. A poller thread repeats the Background Timesheet
+Monitor's checks at the same time.
+
+The clock logic is driven through ClockService, the same code path the
+kiosk's clock_action uses, so no display or Qt install is needed.
+
+Reports per-action latency (p50/p95/p99), how long people waited for a free
+kiosk, writer queue waits, SQLite busy errors and commit counts, and writes
+everything to a JSON file so runs can be compared over time.
+
+Usage (from the staffclock directory):
+    python -m benchmarks.shift_change_burst --staff 400 --kiosks 2 --window 120
+    python -m benchmarks.shift_change_burst --database ProgramData/staff_hours.db --curve burst
+"""
+
+import argparse
+import heapq
+import json
+import logging
+import math
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.change_journal import get_change_journal, close_change_journals
+from utils.clock_service import ClockService
+from utils.db_connection import get_connection, close_all_connections
+from utils.db_writer import get_database_writer, stop_database_writers
+from utils.open_shift_registry import get_open_shift_registry
+from utils.break_registry import get_break_registry
+from utils.schema_migrations import run_migrations
+from utils.staff_codes import get_staff_code_allocator
+from utils.staff_directory import get_staff_directory
+from utils.time_utils import period_bounds
+
+ARRIVAL_CURVES = ('peak', 'normal', 'uniform', 'burst')
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# (due offset in seconds, staff code, action) where action is 'in' or 'out' as on the kiosk buttons
+Arrival = Tuple[float, str, str]
+
+
+def arrival_offsets(curve: str, count: int, window: float, rng: random.Random) -> List[float]:
+    """Seconds after the start of the window at which each person reaches a kiosk."""
+    if curve == 'burst':
+        return [0.0] * count
+    if curve == 'uniform':
+        return [rng.uniform(0, window) for _ in range(count)]
+    if curve == 'normal':
+        return [min(window, max(0.0, rng.gauss(window / 2, window / 6))) for _ in range(count)]
+    # 'peak': most people turn up in the last few minutes before the shift starts
+    return [rng.triangular(0, window, window * 0.85) for _ in range(count)]
+
+
+def percentiles(samples: List[float]) -> Dict[str, Any]:
+    """count/mean/p50/p95/p99/max in ms, nearest-rank."""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def rank(p: float) -> float:
+        return ordered[min(len(ordered), max(1, math.ceil(p / 100 * len(ordered)))) - 1]
+
+    return {
+        'count': len(ordered),
+        'mean': round(sum(ordered) / len(ordered), 3),
+        'p50': round(rank(50), 3),
+        'p95': round(rank(95), 3),
+        'p99': round(rank(99), 3),
+        'max': round(ordered[-1], 3),
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              timeout=5, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except Exception:
+        return None
+
+
+class MonitorPoller(threading.Thread):
+    """Repeats BackgroundTimesheetMonitor.check_pending_workers on a plain thread.
+
+    Each poll walks the pending workers through the open-shift registry and,
+    for anyone who has clocked out, runs the completion-status query the
+    progressive timesheet generator uses before building a timesheet.
+    """
+
+    def __init__(self, database_path: str, pending: List[str], interval: float):
+        super().__init__(name="MonitorPoller", daemon=True)
+        self.database_path = database_path
+        self.pending = set(pending)
+        self.interval = interval
+        self.poll_ms: List[float] = []
+        self.completions = 0
+        self.busy_errors = 0
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        registry = get_open_shift_registry(self.database_path)
+        end_date = datetime.now() + timedelta(days=1)
+        period_start, period_end = period_bounds(end_date - timedelta(days=30), end_date)
+        while not self._stop_event.wait(self.interval):
+            started = time.perf_counter()
+            try:
+                cursor = get_connection(self.database_path).cursor()
+                for staff_code in list(self.pending):
+                    if registry.is_clocked_in(staff_code):
+                        shift = registry.get(staff_code)
+                        if shift:
+                            shift.hours_so_far()
+                        continue
+                    cursor.execute("""
+                        SELECT id, clock_in_time, clock_out_time, break_time, notes
+                        FROM clock_records
+                        WHERE staff_code = ? AND clock_in_epoch >= ? AND clock_in_epoch < ?
+                        ORDER BY clock_in_epoch
+                    """, (staff_code, period_start, period_end)).fetchall()
+                    self.pending.discard(staff_code)
+                    self.completions += 1
+            except sqlite3.OperationalError as e:
+                self.busy_errors += 1
+                logging.warning(f"Monitor poll failed: {e}")
+            self.poll_ms.append((time.perf_counter() - started) * 1000)
+
+
+class ShiftChangeBenchmark:
+    """One benchmark run against a scratch database."""
+
+    def __init__(self, work_dir: str, staff: int, outgoing_ratio: float, break_ratio: float,
+                 kiosks: int, curve: str, window: float, poll_interval: float,
+                 think_ms: float, seed: int, source_database: Optional[str] = None):
+        self.work_dir = work_dir
+        self.database_path = os.path.join(work_dir, 'staff_hours.db')
+        self.staff = staff
+        self.outgoing_ratio = outgoing_ratio
+        self.break_ratio = break_ratio
+        self.kiosks = kiosks
+        self.curve = curve
+        self.window = window
+        self.poll_interval = poll_interval
+        self.think_ms = think_ms
+        self.seed = seed
+        self.source_database = source_database
+        self.rng = random.Random(seed)
+
+        self._latencies: Dict[str, List[float]] = {}
+        self._kiosk_waits: List[float] = []
+        self._failures: Dict[str, int] = {}
+        self._busy_errors = 0
+        self._results_lock = threading.Lock()
+
+    # ------------------------------------------------------------------ setup
+
+    def _prepare_database(self):
+        if self.source_database:
+            # Online backup: copies a consistent snapshot without touching the source
+            source = sqlite3.connect(f"file:{os.path.abspath(self.source_database)}?mode=ro", uri=True)
+            target = sqlite3.connect(self.database_path)
+            try:
+                source.backup(target)
+            finally:
+                source.close()
+                target.close()
+        success, message = run_migrations(self.database_path)
+        if not success:
+            raise RuntimeError(message)
+
+    def _seed_roster(self) -> List[str]:
+        allocator = get_staff_code_allocator(self.database_path, 'sequential')
+        members = [(f"Bench Staff {index:04d}", "Benchmark") for index in range(self.staff)]
+        success, message, created = allocator.create_staff(members)
+        if not success:
+            raise RuntimeError(message)
+        return [code for code, _, _ in created]
+
+    def _setup(self) -> Tuple[ClockService, List[Arrival], List[str]]:
+        self._prepare_database()
+        roster = self._seed_roster()
+
+        directory = get_staff_directory(self.database_path)
+        directory.load()
+        registry = get_open_shift_registry(self.database_path)
+        registry.load()
+        breaks = get_break_registry(self.database_path)
+        breaks.load()
+        service = ClockService(
+            self.database_path,
+            writer=get_database_writer(self.database_path),
+            journal=get_change_journal(os.path.join(self.work_dir, 'change_journal.log')),
+            directory=directory,
+            registry=registry,
+            breaks=breaks,
+        )
+
+        # The outgoing shift started eight hours ago; some of them are on a break right now
+        self.rng.shuffle(roster)
+        outgoing = roster[:int(len(roster) * self.outgoing_ratio)]
+        incoming = roster[len(outgoing):]
+        shift_start = datetime.now() - timedelta(hours=8)
+        for code in outgoing:
+            service.clock_in(code, shift_start + timedelta(seconds=self.rng.uniform(0, 900))).result()
+        for code in self.rng.sample(outgoing, int(len(outgoing) * self.break_ratio)):
+            service.start_break(code, datetime.now() - timedelta(minutes=self.rng.uniform(5, 30))).result()
+
+        arrivals: List[Arrival] = []
+        for offset, code in zip(arrival_offsets(self.curve, len(outgoing), self.window, self.rng), outgoing):
+            arrivals.append((offset, code, 'out'))
+        for offset, code in zip(arrival_offsets(self.curve, len(incoming), self.window, self.rng), incoming):
+            arrivals.append((offset, code, 'in'))
+        heapq.heapify(arrivals)
+        return service, arrivals, outgoing
+
+    # ------------------------------------------------------------------ run
+
+    def _record(self, action: str, elapsed_ms: float, success: bool, waited_ms: float):
+        with self._results_lock:
+            self._latencies.setdefault(action, []).append(elapsed_ms)
+            self._kiosk_waits.append(waited_ms)
+            if not success:
+                self._failures[action] = self._failures.get(action, 0) + 1
+
+    def _kiosk(self, service: ClockService, arrivals: List[Arrival], arrivals_lock: threading.Lock,
+               started: float):
+        while True:
+            with arrivals_lock:
+                if not arrivals:
+                    return
+                due, code, button = heapq.heappop(arrivals)
+            delay = started + due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            waited_ms = max(0.0, (time.perf_counter() - started - due) * 1000)
+
+            # The same decisions clock_action makes for each button; waiting on the
+            # result measures the time until the kiosk shows its confirmation
+            try:
+                if button == 'out':
+                    if service.is_on_break(code):
+                        result = service.end_break(code).result()
+                        self._record(result.action, result.elapsed_ms, result.success, waited_ms)
+                    result = service.clock_out(code).result()
+                else:
+                    result = service.clock_in(code).result()
+                self._record(result.action, result.elapsed_ms, result.success, waited_ms)
+                if result.error is not None and 'locked' in str(result.error).lower():
+                    with self._results_lock:
+                        self._busy_errors += 1
+            except sqlite3.OperationalError as e:
+                with self._results_lock:
+                    self._busy_errors += 1
+                logging.warning(f"Kiosk action for {code} failed: {e}")
+
+            if self.think_ms:
+                time.sleep(self.think_ms / 1000)
+
+    def run(self) -> Dict[str, Any]:
+        service, arrivals, outgoing = self._setup()
+        writer = get_database_writer(self.database_path)
+        writer.flush(timeout=30)
+        baseline = writer.get_stats()
+        total_actions = len(arrivals)
+
+        poller = MonitorPoller(self.database_path, outgoing, self.poll_interval)
+        poller.start()
+
+        arrivals_lock = threading.Lock()
+        started = time.perf_counter()
+        kiosks = [threading.Thread(target=self._kiosk, name=f"Kiosk-{index + 1}",
+                                   args=(service, arrivals, arrivals_lock, started))
+                  for index in range(self.kiosks)]
+        for kiosk in kiosks:
+            kiosk.start()
+        for kiosk in kiosks:
+            kiosk.join()
+        elapsed = time.perf_counter() - started
+
+        poller.stop()
+        poller.join()
+        writer.flush(timeout=30)
+        stats = writer.get_stats()
+
+        commands = stats['commands'] - baseline['commands']
+        commits = stats['commits'] - baseline['commits']
+        queue_wait = stats['queue_wait_total'] - baseline['queue_wait_total']
+        all_latencies = [ms for samples in self._latencies.values() for ms in samples]
+
+        return {
+            'benchmark': 'shift_change_burst',
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'revision': _git_revision(),
+            'environment': {
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'platform': platform.platform(),
+            },
+            'parameters': {
+                'staff': self.staff,
+                'outgoing_ratio': self.outgoing_ratio,
+                'break_ratio': self.break_ratio,
+                'kiosks': self.kiosks,
+                'curve': self.curve,
+                'window_s': self.window,
+                'poll_interval_s': self.poll_interval,
+                'think_ms': self.think_ms,
+                'seed': self.seed,
+                'source_database': self.source_database,
+            },
+            'wall_time_s': round(elapsed, 3),
+            'people': total_actions,
+            'throughput_per_min': round(total_actions / elapsed * 60, 1) if elapsed else None,
+            'latency_ms': {
+                'all': percentiles(all_latencies),
+                **{action: percentiles(samples) for action, samples in sorted(self._latencies.items())},
+            },
+            'kiosk_wait_ms': percentiles(self._kiosk_waits),
+            'failures': self._failures,
+            'lock_waits': {
+                'writer_queue_wait_total_ms': round(queue_wait * 1000, 3),
+                'writer_queue_wait_mean_ms': round(queue_wait / commands * 1000, 3) if commands else 0.0,
+                'writer_queue_wait_max_ms': round(stats['queue_wait_max'] * 1000, 3),
+                'sqlite_busy_errors': self._busy_errors + poller.busy_errors,
+            },
+            'commits': {
+                'commits': commits,
+                'commands': commands,
+                'commands_per_commit': round(commands / commits, 2) if commits else None,
+                'largest_batch': stats['largest_batch'],
+                'failed_commits': stats['failed_commits'] - baseline['failed_commits'],
+            },
+            'monitor': {
+                'polls': len(poller.poll_ms),
+                'completions_seen': poller.completions,
+                'poll_ms': percentiles(poller.poll_ms),
+            },
+        }
+
+
+def write_results(results: Dict[str, Any], output: Optional[str]) -> str:
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"shift_change_burst-{stamp}.json")
+    with open(output, 'w', encoding='utf-8') as handle:
+        json.dump(results, handle, indent=2)
+    return output
+
+
+def _summary(results: Dict[str, Any]) -> str:
+    latency = results['latency_ms']
+    lines = [
+        f"{results['people']} people, {results['parameters']['kiosks']} kiosk(s), "
+        f"{results['parameters']['curve']} curve: {results['wall_time_s']}s "
+        f"({results['throughput_per_min']}/min)",
+    ]
+    for action, stats in latency.items():
+        if stats.get('count'):
+            lines.append(f"  {action:<12} n={stats['count']:<5} p50={stats['p50']:.1f}ms "
+                         f"p95={stats['p95']:.1f}ms p99={stats['p99']:.1f}ms")
+    waits = results['kiosk_wait_ms']
+    if waits.get('count'):
+        lines.append(f"  kiosk wait   p50={waits['p50']:.0f}ms p95={waits['p95']:.0f}ms max={waits['max']:.0f}ms")
+    commits = results['commits']
+    lines.append(f"  commits      {commits['commits']} for {commits['commands']} writes "
+                 f"(largest batch {commits['largest_batch']})")
+    lines.append(f"  lock waits   writer queue max {results['lock_waits']['writer_queue_wait_max_ms']:.1f}ms, "
+                 f"{results['lock_waits']['sqlite_busy_errors']} busy error(s)")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the clock path under a shift-change burst.")
+    parser.add_argument('--staff', type=int, default=200, help="people involved in the shift change")
+    parser.add_argument('--outgoing-ratio', type=float, default=0.5,
+                        help="share of them clocking out (the rest clock in)")
+    parser.add_argument('--break-ratio', type=float, default=0.1,
+                        help="share of the outgoing shift still on a break")
+    parser.add_argument('--kiosks', type=int, default=1, help="kiosks serving the queue")
+    parser.add_argument('--curve', choices=ARRIVAL_CURVES, default='peak', help="arrival curve")
+    parser.add_argument('--window', type=float, default=60.0, help="seconds the arrivals are spread over")
+    parser.add_argument('--poll-interval', type=float, default=1.0, help="monitor poll interval in seconds")
+    parser.add_argument('--think-ms', type=float, default=0.0, help="time each person spends at the kiosk")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--database', help="copy this database as the starting state (it is not modified)")
+    parser.add_argument('--output', help="results file (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s [%(levelname)s] %(message)s')
+
+    with tempfile.TemporaryDirectory(prefix='staffclock-bench-') as work_dir:
+        benchmark = ShiftChangeBenchmark(
+            work_dir, args.staff, args.outgoing_ratio, args.break_ratio, args.kiosks, args.curve,
+            args.window, args.poll_interval, args.think_ms, args.seed, args.database,
+        )
+        try:
+            results = benchmark.run()
+        finally:
+            stop_database_writers()
+            close_change_journals()
+            close_all_connections()
+
+    path = write_results(results, args.output)
+    print(_summary(results))
+    print(f"Results written to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
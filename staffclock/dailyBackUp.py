@@ -5,6 +5,8 @@ from datetime import datetime
 import os
 import zipfile
 
+from utils.db_connection import get_connection_manager
+
 class DailyBackUp(QThread):
     daily_back_up = pyqtSignal(str)  # Signal to notify backup completion
 
@@ -43,6 +45,9 @@ class DailyBackUp(QThread):
             backup_name = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
             backup_path = os.path.join(self.backup_folder, backup_name)
 
+            # Fold the WAL into the database file so the zipped copy is complete
+            get_connection_manager(self.database_path).checkpoint()
+
             with zipfile.ZipFile(backup_path, 'w') as backup_zip:
                 # Add database
                 self.add_file_to_zip(backup_zip, self.database_path)
@@ -8,12 +8,14 @@ Real device integration with biometric enrollment and verification.
 import numpy as np
 import time
 import logging
-import sqlite3
 import os
 from typing import Optional, Tuple, Dict, Any
 from datetime import datetime
 from PyQt6.QtCore import QObject, pyqtSignal, QThread
 
+from utils.db_connection import get_connection, close_thread_connections
+from utils.db_writer import get_database_writer
+
 # Import our real device drivers
 # try:
 #     from .digitalpersona_sdk_simple import DigitalPersonaU4500
@@ -70,7 +72,7 @@ class FingerprintManager(QObject):
     def _init_fingerprint_tables(self):
         """Initialize fingerprint-related tables in the main database."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 # Create fingerprint_users table for linking employees to biometric profiles
                 conn.execute('''
                     CREATE TABLE IF NOT EXISTS fingerprint_users (
@@ -283,7 +285,7 @@ class FingerprintManager(QObject):
     def _is_employee_enrolled(self, employee_id: str) -> bool:
         """Check if employee is already enrolled."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT COUNT(*) FROM fingerprint_users WHERE employee_id = ? AND status = "ACTIVE"', 
                               (employee_id,))
@@ -296,7 +298,7 @@ class FingerprintManager(QObject):
     def _link_employee_to_biometric(self, employee_id: str, employee_name: str, biometric_user_id: str):
         """Link employee to their biometric profile."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 conn.execute('''
                     INSERT INTO fingerprint_users 
                     (employee_id, employee_name, biometric_user_id, enrollment_date)
@@ -312,7 +314,7 @@ class FingerprintManager(QObject):
     def _get_enrolled_employees(self) -> list:
         """Get list of all enrolled employees."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT employee_id, employee_name, biometric_user_id, enrollment_date,
@@ -340,39 +342,33 @@ class FingerprintManager(QObject):
             return []
     
     def _update_employee_verification(self, employee_id: str, match_score: float):
-        """Update employee verification statistics."""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute('''
-                    UPDATE fingerprint_users 
-                    SET verification_count = verification_count + 1,
-                        last_verification = CURRENT_TIMESTAMP
-                    WHERE employee_id = ?
-                ''', (employee_id,))
-                conn.commit()
-        
-        except Exception as e:
-            logging.error(f"Error updating employee verification: {e}")
+        """Queue an update of employee verification statistics on the writer thread."""
+        future = get_database_writer(self.db_path).execute('''
+            UPDATE fingerprint_users 
+            SET verification_count = verification_count + 1,
+                last_verification = CURRENT_TIMESTAMP
+            WHERE employee_id = ?
+        ''', (employee_id,))
+        future.add_done_callback(
+            lambda f: f.exception() and logging.error(f"Error updating employee verification: {f.exception()}")
+        )
     
     def _log_fingerprint_action(self, employee_id: str, action_type: str, success: bool, 
                                match_score: float, notes: str = ""):
-        """Log fingerprint actions for audit trail."""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute('''
-                    INSERT INTO fingerprint_logs 
-                    (employee_id, action_type, success, match_score, notes, timestamp)
-                    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                ''', (employee_id, action_type, success, match_score, notes))
-                conn.commit()
-        
-        except Exception as e:
-            logging.error(f"Error logging fingerprint action: {e}")
+        """Queue a fingerprint action for the audit trail on the writer thread."""
+        future = get_database_writer(self.db_path).execute('''
+            INSERT INTO fingerprint_logs 
+            (employee_id, action_type, success, match_score, notes, timestamp)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (employee_id, action_type, success, match_score, notes))
+        future.add_done_callback(
+            lambda f: f.exception() and logging.error(f"Error logging fingerprint action: {f.exception()}")
+        )
     
     def get_enrollment_status(self) -> Dict[str, Any]:
         """Get current enrollment status and statistics."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 
                 # Get enrollment statistics
@@ -411,7 +407,7 @@ class FingerprintManager(QObject):
     def remove_employee_enrollment(self, employee_id: str) -> Tuple[bool, str]:
         """Remove employee's fingerprint enrollment."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 
                 # Get biometric user ID
@@ -562,4 +558,8 @@ class FingerprintThread(QThread):
                 self.finished.emit(False, f"Unknown operation: {self.operation}", {})
         
         except Exception as e:
-            self.finished.emit(False, f"Thread error: {str(e)}", {}) 
\ No newline at end of file
+            self.finished.emit(False, f"Thread error: {str(e)}", {})
+        
+        finally:
+            # Worker threads are short-lived; don't leave their connections open
+            close_thread_connections() 
\ No newline at end of file
@@ -1,12 +1,11 @@
 import os
-import shutil
 import sqlite3
 import datetime
-import random
 import socket
 import calendar
 import pyglet
 from functools import partial
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 import logging
 from threading import Thread
 import json
@@ -34,9 +33,9 @@ from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QLabel, QLineEdit, QPushButton,
     QVBoxLayout, QHBoxLayout, QDialog, QMessageBox, QDialogButtonBox, QTableWidget, QHeaderView, QAbstractItemView,
     QTableWidgetItem, QCompleter, QGridLayout, QFrame, QProgressBar, QTextEdit, QTabWidget, QListWidget, QInputDialog,
-    QListWidgetItem
+    QListWidgetItem, QDateEdit, QFileDialog
 )
-from PyQt6.QtCore import Qt, QTimer, QTime, QEvent, QUrl, pyqtSignal
+from PyQt6.QtCore import Qt, QTimer, QTime, QDate, QEvent, QUrl, pyqtSignal
 from PyQt6.QtGui import QFont, QPixmap, QImage, QScreen, QColor
 from PyQt6.QtPdf import QPdfDocument
 from PyQt6.QtPdfWidgets import QPdfView
@@ -51,7 +50,24 @@ from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet
 from timesheetDailyCheck import TimesheetCheckerThread
 from dailyBackUp import DailyBackUp
-from utils.logging_manager import LoggingManager
+from archive_snapshot import ArchiveSnapshotThread, PeriodArchiveThread
+from maintenance_executor import MaintenanceExecutor
+from toast_notifications import ToastOverlay
+from utils.logging_manager import LoggingManager, apply_log_levels
+from utils.db_connection import get_connection, close_all_connections
+from utils.schema_migrations import run_migrations
+from utils.time_utils import period_bounds, day_bounds, pay_period, break_minutes, worked_hours
+from utils.open_shift_registry import get_open_shift_registry
+from utils.break_registry import get_break_registry
+from utils.db_writer import get_database_writer, stop_database_writers
+from utils.change_journal import get_change_journal, close_change_journals
+from utils.archive_catalog import get_archive_catalog
+from utils.archive_query import ArchiveQuery
+from utils.staff_operations import remove_staff_members, read_staff_codes_csv
+from utils.staff_codes import get_staff_code_allocator
+from utils.staff_directory import get_staff_directory
+from utils.clock_service import ClockService
+from utils.bulk_import import import_staff, import_clock_records
 from fingerprint_manager import FingerprintManager, detect_digitalPersona_device
 from progressive_timesheet_generator import (
     start_progressive_timesheet_generation, 
@@ -134,6 +150,11 @@ def get_os_specific_path():
     check_and_restore_file(databasePath, backup_folder, generate_default_database)
     check_and_restore_file(settingsFilePath, backup_folder, lambda path: generate_default_settings(path, rect))
 
+    # Upgrade existing databases in place (indexes, new columns, ...)
+    success, message = run_migrations(databasePath)
+    if not success:
+        print(f"Warning: {message}")
+
 
 def check_and_restore_file(primary_path, backup_folder, generate_default=None, is_critical=True):
     """
@@ -238,11 +259,14 @@ def generate_default_settings(path, rect=None):
     logging.info(f"Default settings file created at {path}")
 
 def configure_logging():
-    logging.basicConfig(
-        filename=log_file,
-        level=logging.DEBUG,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-    )
+    # LoggingManager already routes the root logger through its queue; this is only
+    # the fallback for when it could not be created
+    if logger is None:
+        logging.basicConfig(
+            filename=log_file,
+            level=logging.INFO,
+            format="%(asctime)s - %(levelname)s - %(message)s",
+        )
     logging.info(f"Logging initialized on {datetime.now().date()}")
 
 class FingerprintEnrollmentDialog(QDialog):
@@ -647,6 +671,7 @@ class FingerprintEnrollmentDialog(QDialog):
     def on_enrollment_complete(self, success: bool, message: str, stats: dict):
         """Handle enrollment completion."""
         if success:
+            get_staff_directory(databasePath).set_enrolled(self.staff_code, True)
             self.current_step = self.total_samples + 1
             self.update_ui_for_step(self.current_step)
             self.update_finger_guide("good")
@@ -663,6 +688,9 @@ if __name__ == "__main__":
 
 
 class StaffClockInOutSystem(QMainWindow):
+    # ClockResult of a committed (or failed) clock write, emitted from the writer thread
+    clock_result_ready = pyqtSignal(object)
+
     def __init__(self):
         super().__init__()
         if logger:
@@ -716,10 +744,60 @@ class StaffClockInOutSystem(QMainWindow):
         # Initialize archive database folder
         self.archive_folder = os.path.join(app_dir, "Archive_Databases")
         os.makedirs(self.archive_folder, exist_ok=True)
+        self.archive_snapshot_thread = None
+        self.period_archive_thread = None
+        
+        # Real-time backup: every change to staff and clock_records is appended to a journal
+        # that can be replayed with `python -m utils.change_journal replay`. Each snapshot (the
+        # first start, every records reset) begins a new file; the last few are kept as .1, .2, ...
+        self.change_journal_path = os.path.join(app_dir, "Backups", "change_journal.log")
+        self.change_journal = get_change_journal(self.change_journal_path, self.database_path)
+        
+        # Load who is currently clocked in; kept current by the clock paths below
+        self.open_shifts = get_open_shift_registry(self.database_path)
+        self.open_shifts.load()
+        # Who is on break, per person; persisted in shift_breaks so it survives restarts
+        self.shift_breaks = get_break_registry(self.database_path)
+        self.shift_breaks.load()
+        
+        # Staff names, roles and enrollment for keypad lookups without disk reads
+        self.staff_directory = get_staff_directory(self.database_path)
+        self.staff_directory.load()
+        
+        # Clock writes are queued to a single writer thread and group-committed
+        self.db_writer = get_database_writer(self.database_path)
         
-        # Initialize real-time backup database
-        self.realtime_backup_path = os.path.join(app_dir, "Backups", "realtime_backup.db")
-        self.initialize_realtime_backup()
+        # Clock-in/out and break logic; the window only presents its results
+        self.clock_service = ClockService(
+            self.database_path,
+            writer=self.db_writer,
+            journal=self.change_journal,
+            directory=self.staff_directory,
+            registry=self.open_shifts,
+            breaks=self.shift_breaks,
+        )
+        self.clock_result_ready.connect(self._on_clock_result)
+        
+        # Periodically check the registry against the database in case of drift
+        self.open_shift_reconcile_timer = QTimer(self)
+        self.open_shift_reconcile_timer.timeout.connect(self.reconcile_open_shifts)
+        self.open_shift_reconcile_timer.start(15 * 60 * 1000)
+        
+        # Maintenance runs on its own thread; results go to the maintenance dialog if it is open
+        self.maintenance_executor = MaintenanceExecutor(self.database_path, parent=self)
+        self.maintenance_executor.task_started.connect(self._on_maintenance_started)
+        self.maintenance_executor.task_progress.connect(self._on_maintenance_progress)
+        self.maintenance_executor.task_finished.connect(self._on_maintenance_finished)
+        self.maintenance_executor.task_deferred.connect(self._on_maintenance_deferred)
+        self.maintenance_results_area = None
+        # Task name -> callback run on the GUI thread once that task has succeeded
+        self.maintenance_followups = {}
+        self.last_routine_maintenance = None
+        
+        # Routine optimize / quick_check / incremental vacuum during quiet hours
+        self.routine_maintenance_timer = QTimer(self)
+        self.routine_maintenance_timer.timeout.connect(self.run_routine_maintenance)
+        self.routine_maintenance_timer.start(10 * 60 * 1000)
         
         # Initialize optimized fingerprint system
         self.fingerprint_manager = FingerprintManager(self.database_path)
@@ -744,8 +822,6 @@ class StaffClockInOutSystem(QMainWindow):
         self.daily_backup_thread.daily_back_up.connect(self.handle_backup_complete)
         self.daily_backup_thread.start()
 
-        self.break_start_time = None  # Tracks when the break started
-        self.on_break = False  # Tracks whether the staff is on break
         self.admin_was_open = False  # Track admin window state
         
         # Continuous fingerprint scanning
@@ -765,7 +841,11 @@ class StaffClockInOutSystem(QMainWindow):
 
         # Load settings
         self.settings = self.load_settings()
+        # Per-subsystem log levels, e.g. {"clock": "WARNING", "monitor": "DEBUG"}
+        apply_log_levels(self.settings.get("log_levels"))
         self.setup_ui()
+        # Clock confirmations are shown as non-modal toasts so the keypad stays usable
+        self.toasts = ToastOverlay(self.central_widget, self.COLORS)
         self.showFullScreen()
 
         logging.info(f"Settings loaded: {self.settings}")
@@ -779,69 +859,17 @@ class StaffClockInOutSystem(QMainWindow):
         # Fingerprint scanning is now manual via button - no automatic scanning
         logging.info("StaffClockInOutSystem initialization complete")
 
-    def initialize_realtime_backup(self):
-        """Initialize the real-time backup database."""
-        try:
-            os.makedirs(os.path.dirname(self.realtime_backup_path), exist_ok=True)
-            conn = sqlite3.connect(self.realtime_backup_path)
-            c = conn.cursor()
-            
-            # Create backup tables with timestamp
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS backup_clock_records (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    original_id INTEGER,
-                    staff_code TEXT NOT NULL,
-                    clock_in_time TEXT,
-                    clock_out_time TEXT,
-                    notes TEXT,
-                    break_time TEXT,
-                    backup_timestamp TEXT NOT NULL
-                )
-            ''')
-            
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS backup_staff (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    original_code TEXT,
-                    name TEXT NOT NULL,
-                    role TEXT,
-                    notes TEXT,
-                    backup_timestamp TEXT NOT NULL
-                )
-            ''')
-            
-            conn.commit()
-            conn.close()
-            logging.info("Real-time backup database initialized successfully")
-            
-        except Exception as e:
-            logging.error(f"Failed to initialize real-time backup database: {e}")
-
     def backup_clock_record(self, record_id, staff_code, clock_in_time, clock_out_time, notes=None, break_time=None):
-        """Immediately backup a clock record after it's created/updated."""
+        """Append the current state of a clock record to the change journal."""
         try:
-            backup_timestamp = datetime.now().isoformat()
-            conn = sqlite3.connect(self.realtime_backup_path)
-            c = conn.cursor()
-            
-            c.execute('''
-                INSERT INTO backup_clock_records 
-                (original_id, staff_code, clock_in_time, clock_out_time, notes, break_time, backup_timestamp)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (record_id, staff_code, clock_in_time, clock_out_time, notes, break_time, backup_timestamp))
-            
-            conn.commit()
-            conn.close()
-            
-            # Enhanced backup logging
-            if logger:
-                logger.log_database_backup(
-                    backup_type="Real-time Clock Record",
-                    success=True,
-                    file_path=self.realtime_backup_path,
-                    records_count=1
-                )
+            self.change_journal.upsert('clock_records', {
+                'id': record_id,
+                'staff_code': staff_code,
+                'clock_in_time': clock_in_time,
+                'clock_out_time': clock_out_time,
+                'notes': notes,
+                'break_time': break_time,
+            })
             
         except Exception as e:
             if logger:
@@ -857,34 +885,31 @@ class StaffClockInOutSystem(QMainWindow):
                     additional_data={
                         "record_id": record_id,
                         "staff_code": staff_code,
-                        "backup_path": self.realtime_backup_path
+                        "journal_path": self.change_journal_path
                     }
                 )
 
+    def backup_clock_record_by_id(self, record_id, conn=None):
+        """Journal a clock record exactly as it now stands in the database."""
+        conn = conn or get_connection(self.database_path)
+        row = conn.execute(
+            'SELECT id, staff_code, clock_in_time, clock_out_time, notes, break_time FROM clock_records WHERE id = ?',
+            (record_id,)
+        ).fetchone()
+        if row:
+            self.backup_clock_record(*row)
+
     def backup_staff_record(self, staff_code, name, role=None, notes=None):
-        """Immediately backup a staff record after it's created/updated."""
+        """Append the current state of a staff record to the change journal."""
         try:
-            backup_timestamp = datetime.now().isoformat()
-            conn = sqlite3.connect(self.realtime_backup_path)
-            c = conn.cursor()
-            
-            c.execute('''
-                INSERT INTO backup_staff 
-                (original_code, name, role, notes, backup_timestamp)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (staff_code, name, role, notes, backup_timestamp))
+            self.change_journal.upsert('staff', {
+                'code': staff_code,
+                'name': name,
+                'role': role,
+                'notes': notes,
+            })
             
-            conn.commit()
-            conn.close()
-            
-            # Enhanced backup logging
             if logger:
-                logger.log_database_backup(
-                    backup_type="Real-time Staff Record",
-                    success=True,
-                    file_path=self.realtime_backup_path,
-                    records_count=1
-                )
                 logger.log_admin_action(
                     admin_user="SYSTEM",
                     action="Staff Backup",
@@ -908,16 +933,34 @@ class StaffClockInOutSystem(QMainWindow):
                         "staff_code": staff_code,
                         "staff_name": name,
                         "staff_role": role,
-                        "backup_path": self.realtime_backup_path
+                        "journal_path": self.change_journal_path
                     }
                 )
 
-    def archive_current_database(self, force_archive=False):
+    def backup_snapshot(self):
+        """Journal the full current state after a bulk delete, so a replay does not bring rows back."""
+        try:
+            self.change_journal.snapshot(self.database_path)
+        except Exception as e:
+            logging.error(f"Failed to journal a snapshot of {self.database_path}: {e}")
+
+    def backup_delete(self, table, match=None):
+        """Journal a delete so a replay drops the same rows."""
+        try:
+            self.change_journal.delete(table, match)
+        except Exception as e:
+            logging.error(f"Failed to journal delete from {table} ({match}): {e}")
+
+    def archive_current_database(self, force_archive=False, parent_dialog=None, progress_bar=None):
         """
         Archive the current database and reset it for a fresh start.
         
+        The copy runs on a worker thread; the reset happens once it has finished.
+        
         Args:
             force_archive (bool): If True, archive even if users are clocked in (with warning)
+            parent_dialog (QDialog): Archive management dialog to close when done, if any
+            progress_bar (QProgressBar): Progress bar to drive while copying, if any
         """
         try:
             # Check for users who are currently clocked in
@@ -931,21 +974,64 @@ class StaffClockInOutSystem(QMainWindow):
             
             logging.info(f"Starting database archival process for {archive_date}")
             
-            # Copy current database to archive
-            shutil.copy2(self.database_path, archive_path)
-            logging.info(f"Database copied to archive: {archive_path}")
-            
-            # Reset the current database (clear records but keep structure)
-            self.reset_current_database()
-            
-            # Show success message
-            self.msg(f"Database archived successfully as {archive_filename}", "info", "Archive Complete")
-            logging.info(f"Database archival completed successfully")
+            self.start_archive_snapshot(
+                archive_path,
+                partial(self._on_archive_snapshot_finished, True, parent_dialog, False),
+                progress_bar
+            )
             
         except Exception as e:
             logging.error(f"Failed to archive database: {e}")
             self.msg(f"Error archiving database: {str(e)}", "warning", "Archive Error")
 
+    def start_archive_snapshot(self, archive_path, on_finished, progress_bar=None):
+        """Copy the live database to archive_path on a worker thread using the SQLite backup API."""
+        if self.archive_snapshot_thread is not None and self.archive_snapshot_thread.isRunning():
+            self.msg("An archive is already being created. Please wait for it to finish.", "warning", "Archive In Progress")
+            return False
+        
+        thread = ArchiveSnapshotThread(self.database_path, archive_path, parent=self)
+        if progress_bar is not None:
+            progress_bar.setFormat("Copying database... %p%")
+            progress_bar.setValue(0)
+            progress_bar.setVisible(True)
+            
+            def update_progress(copied, total):
+                progress_bar.setMaximum(max(total, 1))
+                progress_bar.setValue(copied)
+            thread.snapshot_progress.connect(update_progress)
+        thread.snapshot_finished.connect(on_finished)
+        self.archive_snapshot_thread = thread
+        thread.start()
+        return True
+
+    def _on_archive_snapshot_finished(self, reset, parent_dialog, reopen_dialog, success, message, archive_path):
+        """Runs on the GUI thread when an archive snapshot has finished."""
+        archive_filename = os.path.basename(archive_path)
+        if not success:
+            logging.error(f"Failed to archive database: {message}")
+            self.msg(f"Error archiving database: {message}", "warning", "Archive Error")
+            return
+        
+        logging.info(f"Database copied to archive: {archive_path}")
+        try:
+            if reset:
+                # Clear what was archived (records but not structure or staff)
+                self.reset_current_database(archive_path)
+                self.msg(f"Database archived successfully as {archive_filename}", "info", "Archive Complete")
+                logging.info(f"Database archival completed successfully")
+            else:
+                self.msg(f"Manual archive created: {archive_filename}", "info", "Archive Created")
+                logging.info(f"Manual archive created: {archive_filename}")
+        except Exception as e:
+            logging.error(f"Failed to reset database after archiving: {e}")
+            self.msg(f"Archive created but the database could not be reset: {str(e)}", "warning", "Archive Error")
+        
+        if parent_dialog is not None:
+            parent_dialog.close()
+            if reopen_dialog:
+                self.open_archive_management()
+
     def check_safe_to_archive(self):
         """
         Check if it's safe to archive the database (no users are currently clocked in).
@@ -955,19 +1041,11 @@ class StaffClockInOutSystem(QMainWindow):
             bool: True if safe to archive or user confirms force archive, False otherwise
         """
         try:
-            conn = sqlite3.connect(self.database_path)
-            c = conn.cursor()
-            
-            # Find users who are currently clocked in (clock_out_time IS NULL)
-            c.execute("""
-                SELECT DISTINCT cr.staff_code, s.name, s.role, cr.clock_in_time
-                FROM clock_records cr
-                JOIN staff s ON cr.staff_code = s.code
-                WHERE cr.clock_out_time IS NULL
-                ORDER BY s.name
-            """)
-            active_users = c.fetchall()
-            conn.close()
+            # Find users who are currently clocked in
+            active_users = [
+                (shift.staff_code, shift.name, shift.role, shift.clock_in_time)
+                for shift in self.open_shifts.active_shifts()
+            ]
             
             if not active_users:
                 # Safe to archive - no active users
@@ -1035,34 +1113,69 @@ Do you want to proceed anyway?
             self.msg(f"Error checking active users: {str(e)}", "warning", "Error")
             return False
 
-    def reset_current_database(self):
-        """Reset the current database by clearing all records but keeping structure and staff."""
+    def reset_current_database(self, archive_path=None):
+        """Reset the current database by clearing all records but keeping structure and staff.
+        
+        With archive_path, only finished clock and visitor records and offboarded staff's
+        records that the archive holds unchanged are cleared. Anything written while the
+        archive was being copied survives, including a clock-out or check-out of a row the
+        archive still has as open.
+        """
         try:
-            conn = sqlite3.connect(self.database_path)
+            conn = get_connection(self.database_path)
             c = conn.cursor()
             
-            # Count records before deletion for logging
-            c.execute('SELECT COUNT(*) FROM clock_records')
-            clock_records_count = c.fetchone()[0]
-            
-            c.execute('SELECT COUNT(*) FROM visitors')
-            visitors_count = c.fetchone()[0]
-            
-            logging.info(f"About to clear database: {clock_records_count} clock records, {visitors_count} visitor records")
-            
-            # Clear clock records (this is the main data we want to reset monthly)
-            c.execute('DELETE FROM clock_records')
-            
-            # Clear visitor records (these can be reset monthly too)
-            c.execute('DELETE FROM visitors')
+            if archive_path:
+                c.execute("ATTACH DATABASE ? AS archived", (archive_path,))
+                clock_filter = """ WHERE clock_out_time IS NOT NULL AND EXISTS (
+                    SELECT 1 FROM archived.clock_records a
+                    WHERE a.id = clock_records.id
+                      AND a.clock_out_time = clock_records.clock_out_time
+                      AND a.notes IS clock_records.notes)"""
+                visitor_filter = """ WHERE time_out IS NOT NULL AND EXISTS (
+                    SELECT 1 FROM archived.visitors a
+                    WHERE a.id = visitors.id AND a.time_out = visitors.time_out)"""
+                # No id column: a row counts as archived when the archive has an identical one
+                leaver_filter = """ WHERE EXISTS (
+                    SELECT 1 FROM archived.archive_records a
+                    WHERE a.staff_code IS archive_records.staff_code
+                      AND a.staff_name IS archive_records.staff_name
+                      AND a.clock_in IS archive_records.clock_in
+                      AND a.clock_out IS archive_records.clock_out
+                      AND a.notes IS archive_records.notes)"""
+            else:
+                clock_filter = visitor_filter = leaver_filter = ""
             
-            # Clear archive records (if any exist)
-            c.execute('DELETE FROM archive_records')
+            try:
+                # Count records before deletion for logging
+                c.execute('SELECT COUNT(*) FROM clock_records' + clock_filter)
+                clock_records_count = c.fetchone()[0]
+                
+                c.execute('SELECT COUNT(*) FROM visitors' + visitor_filter)
+                visitors_count = c.fetchone()[0]
+                
+                logging.info(f"About to clear database: {clock_records_count} clock records, {visitors_count} visitor records")
+                
+                with conn:
+                    # Clear clock records (this is the main data we want to reset monthly)
+                    c.execute('DELETE FROM clock_records' + clock_filter)
+                    
+                    # Clear visitor records (these can be reset monthly too)
+                    c.execute('DELETE FROM visitors' + visitor_filter)
+                    
+                    # Clear offboarded staff's records (if any exist)
+                    c.execute('DELETE FROM archive_records' + leaver_filter)
+                    
+                    # Note: We keep the staff table intact so employees don't need to be re-added
+            finally:
+                if archive_path:
+                    c.execute("DETACH DATABASE archived")
             
-            # Note: We keep the staff table intact so employees don't need to be re-added
+            self.backup_snapshot()
             
-            conn.commit()
-            conn.close()
+            # Cleared records took their breaks with them; open ones survive an archived reset
+            self.open_shifts.load()
+            self.shift_breaks.load()
             
             logging.info(f"Current database reset successfully - cleared {clock_records_count} clock records, {visitors_count} visitor records")
             
@@ -1070,51 +1183,20 @@ Do you want to proceed anyway?
             logging.error(f"Failed to reset current database: {e}")
             raise
 
+    def on_clock_records_reset(self):
+        """Bring the in-memory registries back in line after clock records were cleared."""
+        self.backup_snapshot()
+        # The open shifts and breaks they listed no longer exist
+        self.open_shifts.load()
+        self.shift_breaks.load()
+        self.staff_directory.load()
+        logging.info("Open shifts, breaks and staff directory reloaded after clock records reset")
+
     def get_archive_databases(self):
         """Get a list of all archive databases with their creation dates."""
         try:
-            archive_files = []
-            if os.path.exists(self.archive_folder):
-                for filename in os.listdir(self.archive_folder):
-                    if filename.endswith(".db") and ("archive" in filename.lower()):
-                        file_path = os.path.join(self.archive_folder, filename)
-                        
-                        # Handle different archive naming patterns
-                        date_part = None
-                        if filename.startswith("database_archive_"):
-                            date_part = filename.replace("database_archive_", "").replace(".db", "")
-                        elif filename.startswith("manual_archive_"):
-                            date_part = filename.replace("manual_archive_", "").replace(".db", "")
-                        
-                        if date_part:
-                            try:
-                                archive_date = datetime.strptime(date_part, "%Y-%m-%d_%H-%M-%S")
-                                archive_files.append({
-                                    'filename': filename,
-                                    'path': file_path,
-                                    'date': archive_date,
-                                    'size': os.path.getsize(file_path),
-                                    'type': 'Manual' if filename.startswith("manual_") else 'Automatic'
-                                })
-                            except ValueError:
-                                # Try alternative date formats or skip
-                                try:
-                                    # Handle any other potential date formats
-                                    file_stat = os.path.getmtime(file_path)
-                                    archive_date = datetime.fromtimestamp(file_stat)
-                                    archive_files.append({
-                                        'filename': filename,
-                                        'path': file_path,
-                                        'date': archive_date,
-                                        'size': os.path.getsize(file_path),
-                                        'type': 'Unknown'
-                                    })
-                                except:
-                                    continue
-            
-            # Sort by date (newest first)
-            archive_files.sort(key=lambda x: x['date'], reverse=True)
-            return archive_files
+            # The catalog only re-reads archives that changed since it last looked
+            return get_archive_catalog(self.archive_folder).list_archives()
             
         except Exception as e:
             logging.error(f"Failed to get archive databases: {e}")
@@ -1123,24 +1205,21 @@ Do you want to proceed anyway?
     def ensure_visitors_table(self):
         """Ensure the visitors table exists in the database."""
         try:
-            conn = sqlite3.connect(databasePath)
-            c = conn.cursor()
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS visitors (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    car_reg TEXT,
-                    purpose TEXT,
-                    time_in TEXT,
-                    time_out TEXT
-                )
-            ''')
-            conn.commit()
+            conn = get_connection(databasePath)
+            with conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS visitors (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        name TEXT NOT NULL,
+                        car_reg TEXT,
+                        purpose TEXT,
+                        time_in TEXT,
+                        time_out TEXT
+                    )
+                ''')
             logging.info("Visitors table checked/created successfully")
         except sqlite3.Error as e:
             logging.error(f"Error ensuring visitors table exists: {e}")
-        finally:
-            conn.close()
 
     def handle_timesheet_generated(self, message):
         logging.info(message)
@@ -1164,6 +1243,21 @@ Do you want to proceed anyway?
         # Ensure the thread stops when the app closes
         self.daily_backup_thread.stop()
         self.daily_backup_thread.wait()
+        # Let a running archive copy or move finish rather than leave a partial file
+        if self.archive_snapshot_thread is not None:
+            self.archive_snapshot_thread.wait()
+        if self.period_archive_thread is not None:
+            self.period_archive_thread.wait()
+        # Interrupt any maintenance statement; the thread closes its own connection
+        self.maintenance_executor.stop()
+        self.maintenance_executor.wait()
+        # Commit anything still queued for the writer before closing connections
+        stop_database_writers()
+        close_change_journals()
+        close_all_connections()
+        # Last, so everything logged while shutting down is written out
+        if logger:
+            logger.shutdown()
         super().closeEvent(event)
 
     def handle_backup_complete(self, message):
@@ -1188,152 +1282,11 @@ Do you want to proceed anyway?
         self.auto_clear_timer.stop()
         self.auto_clear_timer.start(15000)  # 15 seconds
     
-    def show_clockout_note_prompt(self, record_id, staff_code, time_out):
-        """Show combined clock-out success message with note prompt."""
-        note_prompt = QDialog(self)
-        note_prompt.setWindowTitle("Clock-Out Successful")
-        note_prompt.setFixedSize(450, 250)
-        
-        # Force window to stay on top and be modal
-        note_prompt.setWindowFlags(Qt.WindowType.Dialog | Qt.WindowType.WindowStaysOnTopHint | Qt.WindowType.WindowSystemMenuHint)
-        note_prompt.setModal(True)
-        note_prompt.raise_()
-        note_prompt.activateWindow()
-        
-        # Style the dialog
-        note_prompt.setStyleSheet(f"""
-            QDialog {{
-                background: {self.COLORS['dark']};
-                color: {self.COLORS['light']};
-                border: 3px solid {self.COLORS['success']};
-                border-radius: 12px;
-            }}
-            QLabel {{
-                color: {self.COLORS['light']};
-                font-family: Arial, sans-serif;
-            }}
-            QLabel#success_label {{
-                color: {self.COLORS['success']};
-                font-size: 18px;
-                font-weight: bold;
-            }}
-            QLabel#question_label {{
-                color: {self.COLORS['light']};
-                font-size: 16px;
-            }}
-            QLabel#countdown_label {{
-                color: {self.COLORS['warning']};
-                font-size: 12px;
-            }}
-            QPushButton {{
-                background-color: {self.COLORS['primary']};
-                color: {self.COLORS['light']};
-                border: none;
-                border-radius: 8px;
-                padding: 12px 24px;
-                font-family: Arial, sans-serif;
-                font-size: 14px;
-                font-weight: bold;
-                min-width: 80px;
-            }}
-            QPushButton:hover {{
-                background-color: {self.COLORS['primary']}dd;
-            }}
-            QPushButton#yes_button {{
-                background-color: {self.COLORS['success']};
-            }}
-            QPushButton#yes_button:hover {{
-                background-color: {self.COLORS['success']}dd;
-            }}
-            QPushButton#no_button {{
-                background-color: {self.COLORS['gray']};
-            }}
-            QPushButton#no_button:hover {{
-                background-color: {self.COLORS['gray']}dd;
-            }}
-        """)
-        
-        layout = QVBoxLayout(note_prompt)
-        layout.setSpacing(15)
-        layout.setContentsMargins(30, 30, 30, 30)
-        
-        # Success message
-        success_label = QLabel(f"✅ Clock-out recorded successfully at {time_out}")
-        success_label.setObjectName("success_label")
-        success_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(success_label)
-        
-        # Spacer
-        layout.addSpacing(10)
-        
-        # Question label
-        question_label = QLabel("Would you like to add a note to your record?")
-        question_label.setObjectName("question_label")
-        question_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        question_label.setWordWrap(True)
-        layout.addWidget(question_label)
-        
-        # Countdown label
-        countdown_label = QLabel("Auto-close in 10 seconds...")
-        countdown_label.setObjectName("countdown_label")
-        countdown_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(countdown_label)
-        
-        # Button layout
-        button_layout = QHBoxLayout()
-        button_layout.setSpacing(15)
-        
-        yes_button = QPushButton("Yes, Add Note")
-        yes_button.setObjectName("yes_button")
-        no_button = QPushButton("No, Thanks")
-        no_button.setObjectName("no_button")
-        
-        button_layout.addWidget(yes_button)
-        button_layout.addWidget(no_button)
-        layout.addLayout(button_layout)
-        
-        # Set up timer for auto-close (10 seconds)
-        auto_close_timer = QTimer(note_prompt)
-        auto_close_timer.setSingleShot(True)
-        auto_close_timer.timeout.connect(note_prompt.reject)
-        
-        # Countdown timer to update the label
-        countdown_timer = QTimer(note_prompt)
-        countdown_seconds = [10]  # Use list to make it mutable in nested function
-        
-        def update_countdown():
-            countdown_seconds[0] -= 1
-            if countdown_seconds[0] > 0:
-                countdown_label.setText(f"Auto-close in {countdown_seconds[0]} seconds...")
-            else:
-                countdown_label.setText("Closing...")
-                countdown_timer.stop()
-        
-        countdown_timer.timeout.connect(update_countdown)
-        countdown_timer.start(1000)  # Update every second
-        auto_close_timer.start(10000)  # Close after 10 seconds
-        
-        # Connect buttons
-        yes_button.clicked.connect(note_prompt.accept)
-        no_button.clicked.connect(note_prompt.reject)
-        
-        # Show dialog and handle result
-        result = note_prompt.exec()
-        auto_close_timer.stop()
-        countdown_timer.stop()
-        
-        if result == QDialog.DialogCode.Accepted:
-            # User clicked "Yes", show text input dialog
-            self.show_note_input_dialog(record_id, staff_code)
-        # If rejected or timed out, do nothing
-        
-        logging.info(f"Note prompt result for staff {staff_code}: {'Yes' if result == QDialog.DialogCode.Accepted else 'No/Timeout'}")
-    
     def show_note_input_dialog(self, record_id, staff_code):
         """Show a text input dialog for adding a note to the clock record."""
         note_dialog = QDialog(self)
         note_dialog.setWindowTitle("Add Note")
-        note_dialog.setFixedSize(500, 300)
+        note_dialog.setFixedSize(500, 360)
         
         # Force window to stay on top and be modal
         note_dialog.setWindowFlags(Qt.WindowType.Dialog | Qt.WindowType.WindowStaysOnTopHint | Qt.WindowType.WindowSystemMenuHint)
@@ -1403,6 +1356,13 @@ Do you want to proceed anyway?
         title_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
         layout.addWidget(title_label)
         
+        # The note goes on this record only if the person confirms their own code
+        code_input = QLineEdit()
+        code_input.setPlaceholderText("Your staff code")
+        code_input.setEchoMode(QLineEdit.EchoMode.Password)
+        code_input.setMaxLength(4)
+        layout.addWidget(code_input)
+        
         # Text input
         note_text = QTextEdit()
         note_text.setPlaceholderText("Enter your note here...")
@@ -1426,15 +1386,18 @@ Do you want to proceed anyway?
         save_button.clicked.connect(note_dialog.accept)
         cancel_button.clicked.connect(note_dialog.reject)
         
-        # Focus on text input
-        note_text.setFocus()
+        # Focus on the code first
+        code_input.setFocus()
         
         # Show dialog and handle result
         result = note_dialog.exec()
         
         if result == QDialog.DialogCode.Accepted:
             note_content = note_text.toPlainText().strip()
-            if note_content:
+            if code_input.text().strip() != str(staff_code):
+                logging.warning(f"Note for record {record_id} discarded: staff code did not match {staff_code}")
+                self.notify("That staff code doesn't match this clock-out; the note was not saved.", "warning")
+            elif note_content:
                 self.save_note_to_record(record_id, staff_code, note_content)
             else:
                 logging.info(f"Empty note discarded for staff {staff_code}")
@@ -1444,7 +1407,7 @@ Do you want to proceed anyway?
     def save_note_to_record(self, record_id, staff_code, note):
         """Save a note to the specified clock record."""
         try:
-            conn = sqlite3.connect(databasePath)
+            conn = get_connection(databasePath)
             c = conn.cursor()
             
             # First, verify the record exists
@@ -1452,84 +1415,34 @@ Do you want to proceed anyway?
             record_data = c.fetchone()
             
             if not record_data:
-                conn.close()
-                self.msg("Error: Clock record not found.", "warning", "Error")
+                self.notify("Error: Clock record not found.", "warning")
                 logging.error(f"Clock record {record_id} not found when trying to save note")
                 return
             
             # Update the record with the note
-            c.execute('UPDATE clock_records SET notes = ? WHERE id = ?', (note, record_id))
-            rows_affected = c.rowcount
-            conn.commit()
+            with conn:
+                c.execute('UPDATE clock_records SET notes = ? WHERE id = ?', (note, record_id))
+                rows_affected = c.rowcount
             
             logging.info(f"Database update: {rows_affected} rows affected for record {record_id}")
             
             if rows_affected == 0:
-                conn.close()
-                self.msg("Error: Failed to update record.", "warning", "Error")
+                self.notify("Error: Failed to update record.", "warning")
                 logging.error(f"No rows updated when saving note to record {record_id}")
                 return
             
             # Create backup with the note
             self.backup_clock_record(record_id, staff_code, record_data[1], record_data[2], note, record_data[3])
             
-            conn.close()
-            
-            # Show confirmation with a more visible message
-            success_dialog = QDialog(self)
-            success_dialog.setWindowTitle("Note Saved")
-            success_dialog.setFixedSize(300, 150)
-            success_dialog.setWindowFlags(Qt.WindowType.Dialog | Qt.WindowType.WindowStaysOnTopHint)
-            success_dialog.setModal(True)
-            
-            success_dialog.setStyleSheet(f"""
-                QDialog {{
-                    background: {self.COLORS['dark']};
-                    color: {self.COLORS['light']};
-                    border: 2px solid {self.COLORS['success']};
-                    border-radius: 10px;
-                }}
-                QLabel {{
-                    color: {self.COLORS['success']};
-                    font-family: Arial, sans-serif;
-                    font-size: 16px;
-                    font-weight: bold;
-                }}
-                QPushButton {{
-                    background-color: {self.COLORS['success']};
-                    color: {self.COLORS['light']};
-                    border: none;
-                    border-radius: 8px;
-                    padding: 10px 20px;
-                    font-family: Arial, sans-serif;
-                    font-size: 14px;
-                }}
-            """)
-            
-            layout = QVBoxLayout(success_dialog)
-            layout.setSpacing(20)
-            layout.setContentsMargins(30, 30, 30, 30)
-            
-            success_label = QLabel("✅ Note saved successfully!")
-            success_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            layout.addWidget(success_label)
-            
-            ok_button = QPushButton("OK")
-            ok_button.clicked.connect(success_dialog.accept)
-            layout.addWidget(ok_button)
-            
-            # Auto-close after 3 seconds
-            QTimer.singleShot(3000, success_dialog.accept)
-            
-            success_dialog.exec()
+            self.notify("✅ Note saved.", "success")
             
             logging.info(f"Note successfully added to record {record_id} for staff {staff_code}: {note}")
             
         except sqlite3.Error as e:
-            self.msg(f"Database error saving note: {str(e)}", "warning", "Error")
+            self.notify(f"Database error saving note: {str(e)}", "critical")
             logging.error(f"Database error saving note to record {record_id}: {e}")
         except Exception as e:
-            self.msg(f"Unexpected error saving note: {str(e)}", "warning", "Error")
+            self.notify(f"Unexpected error saving note: {str(e)}", "critical")
             logging.error(f"Unexpected error saving note to record {record_id}: {e}")
 
     def load_settings(self):
@@ -1539,7 +1452,11 @@ Do you want to proceed anyway?
             "end_day": 20, 
             "printer_IP": "10.60.1.146",
             "admin_pin": "123456",
-            "exit_code": "654321"
+            "exit_code": "654321",
+            "maintenance_quiet_start": 2,
+            "maintenance_quiet_end": 5,
+            "staff_code_allocation": "random",
+            "log_levels": {}
         }
 
         if os.path.exists(settings_file):
@@ -1611,14 +1528,13 @@ Do you want to proceed anyway?
                 if status['worker_list']:
                     message += "Active workers being monitored:\n"
                     # Get worker names from database
-                    conn = sqlite3.connect(databasePath)
+                    conn = get_connection(databasePath)
                     c = conn.cursor()
                     for staff_code in status['worker_list']:
                         c.execute('SELECT name FROM staff WHERE code = ?', (staff_code,))
                         result = c.fetchone()
                         name = result[0] if result else 'Unknown'
                         message += f"• {name} ({staff_code})\n"
-                    conn.close()
                 
                 message += "\nTimesheets will be generated automatically when workers clock out."
                 
@@ -1967,7 +1883,7 @@ Do you want to proceed anyway?
                 """)
                 
                 # Show success message
-                self.msg(f"Fingerprint recognized: {staff_code}", "info", "Welcome")
+                self.notify(f"Fingerprint recognized: {staff_code}", "info")
                 
                 # Enhanced logging for fingerprint authentication
                 if logger:
@@ -2014,14 +1930,9 @@ Do you want to proceed anyway?
             QTimer.singleShot(3000, self.start_fingerprint_presence_detection)
 
     def clock_action(self, action, staff_code):
-        # Get staff details for enhanced logging
-        conn = sqlite3.connect(databasePath)
-        c = conn.cursor()
-
         try:
             # Check if the staff exists
-            c.execute('SELECT name, role FROM staff WHERE code = ?', (staff_code,))
-            staff = c.fetchone()
+            staff = self.staff_directory.get(staff_code)
             if not staff:
                 if logger:
                     logger.log_authentication_attempt(
@@ -2036,44 +1947,18 @@ Do you want to proceed anyway?
                         details=f"Attempted {action} with invalid staff code",
                         severity="WARNING"
                     )
-                conn.close()
-                self.msg("Invalid user ID or staff code.", "warning", "Error")
+                self.notify("Invalid user ID or staff code.", "warning")
                 return
                 
-            staff_name, staff_role = staff
+            staff_name, staff_role = staff.name, staff.role
             if logger:
                 logger.log_system_event("Clock Action Processing", f"Processing {action} for {staff_name} ({staff_code})")
 
             if action == 'in':
-                # Check if already clocked in but not on break
-                c.execute('SELECT id FROM clock_records WHERE staff_code = ? AND clock_out_time IS NULL', (staff_code,))
-                clock_record = c.fetchone()
-
-                if clock_record:
-                    if not self.on_break:
+                if self.clock_service.is_clocked_in(staff_code):
+                    if not self.clock_service.is_on_break(staff_code):
                         # Start Break
-                        self.break_start_time = datetime.now()
-                        self.on_break = True
-                        
-                        # Enhanced logging for break start
-                        if logger:
-                            logger.log_clock_operation(
-                                user=staff_code,
-                                operation="Break Start",
-                                success=True,
-                                user_name=staff_name,
-                                user_role=staff_role,
-                                timestamp=self.break_start_time.strftime('%H:%M:%S'),
-                                additional_info={
-                                    "previous_state": "clocked_in",
-                                    "break_type": "manual"
-                                }
-                            )
-                        
-                        # Clear input fields immediately when showing confirmation
-                        self.clear_input_fields()
-                        
-                        self.msg("Break started.", "info", "Success")
+                        self._submit_clock(self.clock_service.start_break(staff_code))
                     else:
                         # Enhanced logging for break error
                         if logger:
@@ -2084,89 +1969,19 @@ Do you want to proceed anyway?
                                 severity="WARNING",
                                 user_name=staff_name
                             )
-                        self.msg("You are already on break.", "warning", "Warning")
+                        self.notify("You are already on break.", "warning")
                 else:
                     # Regular Clock-In
-                    clock_in_time = datetime.now().isoformat()
-                    c.execute('INSERT INTO clock_records (staff_code, clock_in_time) VALUES (?, ?)',
-                              (staff_code, clock_in_time))
-                    conn.commit()
-                    
-                    # Get the record ID for backup
-                    record_id = c.lastrowid
-                    
-                    # Create real-time backup
-                    self.backup_clock_record(record_id, staff_code, clock_in_time, None)
-                    
-                    time_in = datetime.fromisoformat(clock_in_time).strftime('%H:%M')
-                    
-                    # Enhanced logging for clock-in
-                    if logger:
-                        logger.log_clock_operation(
-                            user=staff_code,
-                            operation="Clock In",
-                            success=True,
-                            user_name=staff_name,
-                            user_role=staff_role,
-                            timestamp=time_in,
-                            additional_info={
-                                "record_id": record_id,
-                                "shift_start": time_in
-                            }
-                        )
-                    
-                    # Clear input fields immediately when showing confirmation
-                    self.clear_input_fields()
-                    
-                    self.msg(f'Clock-in recorded successfully at {time_in}', 'info', 'Success')
+                    self._submit_clock(self.clock_service.clock_in(staff_code))
 
             elif action == 'out':
                 # Check if on break
-                if self.on_break:
+                if self.clock_service.is_on_break(staff_code):
                     # End Break
-                    break_end_time = datetime.now()
-                    if self.break_start_time:
-                        break_duration = (break_end_time - self.break_start_time).total_seconds() / 60
-                    else:
-                        break_duration = 0
-                    c.execute('UPDATE clock_records SET break_time = ? WHERE staff_code = ? AND clock_out_time IS NULL',
-                              (str(break_duration), staff_code))
-                    conn.commit()
-                    
-                    # Get the updated record for backup
-                    c.execute('SELECT id, clock_in_time, clock_out_time, notes FROM clock_records WHERE staff_code = ? AND clock_out_time IS NULL', (staff_code,))
-                    updated_record = c.fetchone()
-                    if updated_record:
-                        self.backup_clock_record(updated_record[0], staff_code, updated_record[1], updated_record[2], updated_record[3], str(break_duration))
-                    
-                    self.on_break = False
-                    self.break_start_time = None
-                    
-                    # Enhanced logging for break end
-                    if logger:
-                        logger.log_clock_operation(
-                            user=staff_code,
-                            operation="Break End",
-                            success=True,
-                            user_name=staff_name,
-                            user_role=staff_role,
-                            timestamp=break_end_time.strftime('%H:%M:%S'),
-                            additional_info={
-                                "break_duration_minutes": f"{break_duration:.2f}",
-                                "new_state": "clocked_in"
-                            }
-                        )
-                    
-                    # Clear input fields immediately when showing confirmation
-                    self.clear_input_fields()
-                    
-                    self.msg(f"Break ended. Duration: {break_duration:.2f} minutes.", "info", "Success")
+                    self._submit_clock(self.clock_service.end_break(staff_code))
                 else:
                     # Regular Clock-Out
-                    clock_out_time = datetime.now().isoformat()
-                    c.execute('SELECT id FROM clock_records WHERE staff_code = ? AND clock_out_time IS NULL', (staff_code,))
-                    clock_record = c.fetchone()
-                    if not clock_record:
+                    if not self.clock_service.is_clocked_in(staff_code):
                         if logger:
                             logger.log_security_event(
                                 event_type="INVALID_CLOCKOUT_ATTEMPT",
@@ -2175,40 +1990,9 @@ Do you want to proceed anyway?
                                 severity="WARNING",
                                 user_name=staff_name
                             )
-                        conn.close()
-                        self.msg("You are not clocked in.", "warning", "Error")
+                        self.notify(f"{staff_name}: you are not clocked in.", "warning")
                         return
-                    c.execute('UPDATE clock_records SET clock_out_time = ? WHERE id = ?', (clock_out_time, clock_record[0]))
-                    conn.commit()
-                    
-                    # Get the updated record for backup
-                    c.execute('SELECT clock_in_time, notes, break_time FROM clock_records WHERE id = ?', (clock_record[0],))
-                    updated_record = c.fetchone()
-                    if updated_record:
-                        self.backup_clock_record(clock_record[0], staff_code, updated_record[0], clock_out_time, updated_record[1], updated_record[2])
-                    
-                    time_out = datetime.fromisoformat(clock_out_time).strftime('%H:%M')
-                    
-                    # Enhanced logging for clock-out
-                    if logger:
-                        logger.log_clock_operation(
-                            user=staff_code,
-                            operation="Clock Out",
-                            success=True,
-                            user_name=staff_name,
-                            user_role=staff_role,
-                            timestamp=time_out,
-                            additional_info={
-                                "record_id": clock_record[0],
-                                "shift_end": time_out
-                            }
-                        )
-                    
-                    # Clear input fields immediately when showing confirmation
-                    self.clear_input_fields()
-                    
-                    # Show combined success message and note prompt
-                    self.show_clockout_note_prompt(clock_record[0], staff_code, time_out)
+                    self._submit_clock(self.clock_service.clock_out(staff_code))
 
             else:
                 if logger:
@@ -2221,8 +2005,7 @@ Do you want to proceed anyway?
                             "staff_code": staff_code
                         }
                     )
-                conn.close()
-                self.msg(f'Unknown action: {action}', 'warning', 'Error')
+                self.notify(f'Unknown action: {action}', 'warning')
 
         except Exception as e:
             if logger:
@@ -2237,9 +2020,105 @@ Do you want to proceed anyway?
                         "user_role": staff_role if 'staff_role' in locals() else "Unknown"
                     }
                 )
-            self.msg(f"An error occurred: {str(e)}", "warning", "Error")
-        finally:
-            conn.close()
+            self.notify(f"An error occurred: {str(e)}", "critical")
+
+    def _submit_clock(self, future):
+        """Free the keypad for the next person; the confirmation follows once the write commits."""
+        self.clear_input_fields()
+        # Done-callbacks run on the writer thread; the signal brings the result back to this one
+        future.add_done_callback(lambda done: self.clock_result_ready.emit(done.result()))
+
+    def _on_clock_result(self, result):
+        """Log and confirm a clock operation after its write has committed (or failed)."""
+        if not result.success:
+            self._report_clock_failure(result)
+            return
+
+        staff_code, staff_name = result.staff_code, result.staff_name
+        if result.action == 'start_break':
+            # Enhanced logging for break start
+            if logger and logger.is_enabled('clock'):
+                logger.log_clock_operation(
+                    user=staff_code,
+                    operation="Break Start",
+                    success=True,
+                    user_name=staff_name,
+                    user_role=result.staff_role,
+                    timestamp=result.timestamp.strftime('%H:%M:%S'),
+                    additional_info={
+                        "previous_state": "clocked_in",
+                        "break_type": "manual"
+                    }
+                )
+            self.notify(f"{staff_name}: {result.message}", "success")
+
+        elif result.action == 'clock_in':
+            if logger and logger.is_enabled('clock'):
+                time_in = result.timestamp.strftime('%H:%M')
+                logger.log_clock_operation(
+                    user=staff_code,
+                    operation="Clock In",
+                    success=True,
+                    user_name=staff_name,
+                    user_role=result.staff_role,
+                    timestamp=time_in,
+                    additional_info={
+                        "record_id": result.record_id,
+                        "shift_start": time_in
+                    }
+                )
+            self.notify(f"{staff_name}: {result.message}", "success")
+
+        elif result.action == 'end_break':
+            if logger and logger.is_enabled('clock'):
+                logger.log_clock_operation(
+                    user=staff_code,
+                    operation="Break End",
+                    success=True,
+                    user_name=staff_name,
+                    user_role=result.staff_role,
+                    timestamp=result.timestamp.strftime('%H:%M:%S'),
+                    additional_info={
+                        "break_duration_minutes": f"{result.break_minutes:.2f}",
+                        "new_state": "clocked_in"
+                    }
+                )
+            self.notify(f"{staff_name}: {result.message}", "success")
+
+        elif result.action == 'clock_out':
+            time_out = result.timestamp.strftime('%H:%M')
+            if logger and logger.is_enabled('clock'):
+                logger.log_clock_operation(
+                    user=staff_code,
+                    operation="Clock Out",
+                    success=True,
+                    user_name=staff_name,
+                    user_role=result.staff_role,
+                    timestamp=time_out,
+                    additional_info={
+                        "record_id": result.record_id,
+                        "shift_end": time_out
+                    }
+                )
+            # Confirmation with an optional note; the note editor only opens if asked for
+            self.notify(
+                f"{staff_name}: clock-out recorded at {time_out}",
+                "success",
+                action_text="Add Note",
+                on_action=partial(self.show_note_input_dialog, result.record_id, staff_code),
+            )
+
+    def _report_clock_failure(self, result):
+        """Log a clock operation the service refused or could not save, and tell the user."""
+        if logger and result.error is not None:
+            logger.log_error(result.error, context=f"clock_action - {result.action}", user=result.staff_code)
+        # A refusal (already clocked in, not on break) is a warning; a failed save is critical
+        self.notify(result.message, "critical" if result.error is not None else "warning")
+
+    def reconcile_open_shifts(self):
+        """Let queued clock writes land, then check the open-shift registry against the database."""
+        self.db_writer.flush(timeout=5)
+        return self.open_shifts.reconcile()
 
     def msg(self, message, state, title):
         msgBox = QMessageBox()
@@ -2257,17 +2136,15 @@ Do you want to proceed anyway?
         closeTimer.start(3000)
         msgBox.exec()
 
+    def notify(self, message, state="info", action_text=None, on_action=None):
+        """Show a non-modal toast; keypad input carries on while it is up."""
+        self.toasts.show_toast(message, state, action_text=action_text, on_action=on_action)
+
     def process_clock_action(self, user_id, action="in"):
         """Process clock-in or clock-out based on user ID or staff code."""
-        conn = sqlite3.connect(databasePath)
-        c = conn.cursor()
-
         # Check if the staff exists
-        c.execute('SELECT * FROM staff WHERE code = ?', (user_id,))
-        staff = c.fetchone()
-        if not staff:
-            conn.close()
-            self.msg("Invalid user ID or staff code.", "warning", "Error")
+        if not self.staff_directory.exists(user_id):
+            self.notify("Invalid user ID or staff code.", "warning")
             return
 
         if action == "in":
@@ -2275,31 +2152,23 @@ Do you want to proceed anyway?
         elif action == "out":
             self.clock_action("out", user_id)
         else:
-            self.msg(f"Unknown action: {action}", "warning", "Error")
-        conn.close()
+            self.notify(f"Unknown action: {action}", "warning")
 
     def on_staff_code_change(self):
         staff_code = self.staff_code_entry.text()
+        if staff_code:
+            # Someone new is at the keypad: the last person's "Add Note" is no longer theirs to press
+            self.toasts.withdraw_actions()
         if len(staff_code) == 4 and staff_code.isdigit():
-            conn = sqlite3.connect(databasePath)
-            c = conn.cursor()
-            c.execute('SELECT name, role FROM staff WHERE code = ?', (staff_code,))
-            staff = c.fetchone()
-            conn.close()
+            staff = self.staff_directory.get(staff_code)
             if staff:
-                self.greeting_label.setText(f'Hello, {staff[0]}!')
+                self.greeting_label.setText(f'Hello, {staff.name}!')
                 if hasattr(self, 'role_entry'):
-                    self.role_entry.setText(staff[1] if staff[1] else '')
+                    self.role_entry.setText(staff.role if staff.role else '')
 
                 # Check if clocked in
-                conn = sqlite3.connect(databasePath)
-                c = conn.cursor()
-                c.execute('SELECT id FROM clock_records WHERE staff_code = ? AND clock_out_time IS NULL', (staff_code,))
-                clock_record = c.fetchone()
-                conn.close()
-
-                if clock_record:
-                    if self.on_break:
+                if self.open_shifts.is_clocked_in(staff_code):
+                    if self.clock_service.is_on_break(staff_code):
                         self.clock_out_button.setText("End Break")
                     else:
                         self.clock_in_button.setText("Start Break")
@@ -2370,9 +2239,9 @@ Do you want to proceed anyway?
         try:
             # First handle staff records
             logging.info("Gathering current time and staff records")
-            time_now = datetime.now().strftime('%Y-%m-%d')
+            day_start, day_end = day_bounds(datetime.now())
             
-            conn = sqlite3.connect(databasePath)
+            conn = get_connection(databasePath)
             c = conn.cursor()
 
             # Get staff records
@@ -2380,21 +2249,20 @@ Do you want to proceed anyway?
                 SELECT s.name, c.clock_in_time
                 FROM clock_records c
                 JOIN staff s ON c.staff_code = s.code
-                WHERE DATE(c.clock_in_time) = ?
-            ''', (time_now,))
+                WHERE c.clock_in_epoch >= ? AND c.clock_in_epoch < ?
+            ''', (day_start, day_end))
             staff_records = c.fetchall()
 
             # Get visitor records - modified query to get current visitors
             c.execute('''
                 SELECT name, car_reg, purpose, time_in 
                 FROM visitors 
-                WHERE DATE(time_in) = ? 
-                AND (time_out IS NULL OR DATE(time_out) > ?)
-            ''', (time_now, time_now))
+                WHERE time_in_epoch >= ? AND time_in_epoch < ?
+                AND (time_out IS NULL OR time_out_epoch >= ?)
+            ''', (day_start, day_end, day_end))
             visitor_records = c.fetchall()
 
             logging.info(f"Found {len(staff_records)} staff records and {len(visitor_records)} visitor records")
-            conn.close()
 
             # Remove duplicates and keep only the first occurrence of each staff name
             unique_records = {}
@@ -2873,6 +2741,9 @@ Do you want to proceed anyway?
             ("🗑️ Delete Staff", self.COLORS['danger'], self.remove_staff, 0, 1),
             ("📝 Add Comment", self.COLORS['purple'], self.add_comment, 1, 0),
             ("📋 View Records", self.COLORS['primary'], self.open_records_tab, 1, 1),
+            ("📤 Bulk Offboard", self.COLORS['danger'], self.open_bulk_offboarding, 2, 0),
+            ("📥 Import Staff", self.COLORS['success'], self.import_staff_file, 2, 1),
+            ("📥 Import Clock Records", self.COLORS['primary'], self.import_clock_records_file, 3, 0),
         ]
 
         for text, color, callback, row, col in staff_buttons:
@@ -3184,19 +3055,17 @@ Do you want to proceed anyway?
     def update_timesheet_status(self):
         """Update the timesheet status display."""
         try:
-            conn = sqlite3.connect(databasePath)
+            conn = get_connection(databasePath)
             c = conn.cursor()
             
             # Get worker counts
             c.execute('SELECT COUNT(*) FROM staff')
             total_workers = c.fetchone()[0]
             
-            c.execute('SELECT COUNT(DISTINCT cr.staff_code) FROM clock_records cr WHERE cr.clock_out_time IS NULL')
-            active_workers = c.fetchone()[0]
+            active_workers = self.open_shifts.count()
             
             completed_workers = total_workers - active_workers
             
-            conn.close()
             
             # Update display
             status_text = f"""📊 WORKER STATUS OVERVIEW
@@ -3254,7 +3123,7 @@ Do you want to proceed anyway?
                 self.active_workers_list.clear()
                 
                 if status['worker_list']:
-                    conn = sqlite3.connect(databasePath)
+                    conn = get_connection(databasePath)
                     c = conn.cursor()
                     for staff_code in status['worker_list']:
                         c.execute('SELECT name, role FROM staff WHERE code = ?', (staff_code,))
@@ -3262,7 +3131,6 @@ Do you want to proceed anyway?
                         if result:
                             name, role = result
                             self.active_workers_list.addItem(f"👤 {name} ({staff_code}) - {role}")
-                    conn.close()
                 else:
                     self.active_workers_list.addItem("✅ No workers currently being monitored")
                     
@@ -3277,21 +3145,11 @@ Do you want to proceed anyway?
                 
                 # Show all active workers
                 self.active_workers_list.clear()
-                conn = sqlite3.connect(databasePath)
-                c = conn.cursor()
-                c.execute("""
-                    SELECT DISTINCT cr.staff_code, s.name, s.role
-                    FROM clock_records cr
-                    JOIN staff s ON cr.staff_code = s.code
-                    WHERE cr.clock_out_time IS NULL
-                    ORDER BY s.name
-                """)
-                active_workers = c.fetchall()
-                conn.close()
+                active_workers = self.open_shifts.active_shifts()
                 
                 if active_workers:
-                    for staff_code, name, role in active_workers:
-                        self.active_workers_list.addItem(f"⏳ {name} ({staff_code}) - {role}")
+                    for shift in active_workers:
+                        self.active_workers_list.addItem(f"⏳ {shift.name} ({shift.staff_code}) - {shift.role}")
                 else:
                     self.active_workers_list.addItem("✅ No active workers found")
                     
@@ -3302,20 +3160,13 @@ Do you want to proceed anyway?
         '''Show current status of timesheet generation.'''
         try:
             # Check how many workers are currently active
-            conn = sqlite3.connect(databasePath)
-            c = conn.cursor()
-            
-            c.execute('''
-                SELECT COUNT(DISTINCT cr.staff_code) 
-                FROM clock_records cr 
-                WHERE cr.clock_out_time IS NULL
-            ''')
-            active_workers = c.fetchone()[0]
+            active_workers = self.open_shifts.count()
             
+            conn = get_connection(databasePath)
+            c = conn.cursor()
             c.execute('SELECT COUNT(*) FROM staff')
             total_workers = c.fetchone()[0]
             
-            conn.close()
             
             if active_workers == 0:
                 status_msg = "✅ ALL WORKERS COMPLETED\n\n"
@@ -3347,12 +3198,11 @@ Do you want to proceed anyway?
         staff_name = self.name_entry.text().strip()
 
         try:
-            conn = sqlite3.connect(self.database_path)
+            conn = get_connection(self.database_path)
             cursor = conn.cursor()
             # Fetch the PIN based on the cleaned staff name
             cursor.execute("SELECT code FROM staff WHERE name = ?", (staff_name,))
             result = cursor.fetchone()
-            conn.close()
 
             if result:
                 staff_code = result[0]
@@ -3371,17 +3221,15 @@ Do you want to proceed anyway?
             return
 
         # Check if staff exists
-        conn = sqlite3.connect(databasePath)
+        conn = get_connection(databasePath)
         c = conn.cursor()
         c.execute("SELECT code FROM staff WHERE name = ?", (staff_name,))
         staff = c.fetchone()
         if not staff:
-            conn.close()
             self.msg("Staff not found.", "warning", "Error")
             logging.error(f"No staff found for name: {staff_name}")
             return
         staff_code = staff[0]
-        conn.close()
 
         # Open the menu to choose where to add the comment
         comment_menu = QDialog(self)
@@ -3463,11 +3311,13 @@ Do you want to proceed anyway?
             return
 
         try:
-            conn = sqlite3.connect(databasePath)
+            conn = get_connection(databasePath)
             c = conn.cursor()
-            c.execute("UPDATE staff SET notes = ? WHERE name = ?", (comment, staff_name))
-            conn.commit()
-            conn.close()
+            with conn:
+                c.execute("UPDATE staff SET notes = ? WHERE name = ?", (comment, staff_name))
+            for code, name, role, notes in c.execute(
+                    "SELECT code, name, role, notes FROM staff WHERE name = ?", (staff_name,)).fetchall():
+                self.backup_staff_record(code, name, role, notes)
             self.msg("Comment saved successfully.", "info", "Success")
             logging.info(f"Added comment to staff {staff_name}: {comment}")
             dialog.close()
@@ -3518,12 +3368,11 @@ Do you want to proceed anyway?
     def fetch_clock_records(self, staff_code):
         """Retrieve clock records for a specific staff member."""
         try:
-            conn = sqlite3.connect(self.database_path)
+            conn = get_connection(self.database_path)
             cursor = conn.cursor()
             cursor.execute("SELECT id, clock_in_time, clock_out_time FROM clock_records WHERE staff_code = ?",
                            (staff_code,))
             records = cursor.fetchall()
-            conn.close()
             return records
         except sqlite3.Error as e:
             logging.error(f"Database error while fetching records: {e}")
@@ -3540,7 +3389,7 @@ Do you want to proceed anyway?
             return
 
         try:
-            conn = sqlite3.connect(databasePath)
+            conn = get_connection(databasePath)
             cursor = conn.cursor()
             cursor.execute('SELECT code FROM staff WHERE name = ?', (staff_name,))
             staff = cursor.fetchone()
@@ -3554,7 +3403,6 @@ Do you want to proceed anyway?
             cursor.execute('SELECT id, clock_in_time, clock_out_time FROM clock_records WHERE staff_code = ?',
                            (staff_code,))
             records = cursor.fetchall()
-            conn.close()
 
             if not records:
                 self.msg("No records found for this staff member.", "info", "Info")
@@ -3629,11 +3477,10 @@ Do you want to proceed anyway?
 
     def fetch_staff_names_and_roles(self):
         try:
-            conn = sqlite3.connect(databasePath)
+            conn = get_connection(databasePath)
             cursor = conn.cursor()
             cursor.execute('SELECT name FROM staff')
             staff_data = cursor.fetchall()
-            conn.close()
             return [name[0] for name in staff_data]
         except sqlite3.Error as e:
             logging.error(f"Database error when fetching staff data: {e}")
@@ -3649,7 +3496,7 @@ Do you want to proceed anyway?
             return
 
         try:
-            conn = sqlite3.connect(databasePath)
+            conn = get_connection(databasePath)
             cursor = conn.cursor()
             cursor.execute('SELECT code FROM staff WHERE name = ?', (staff_name,))
             staff = cursor.fetchone()
@@ -3663,7 +3510,6 @@ Do you want to proceed anyway?
             cursor.execute('SELECT id, clock_in_time, clock_out_time, notes FROM clock_records WHERE staff_code = ?',
                            (staff_code,))
             records = cursor.fetchall()
-            conn.close()
 
             if not records:
                 self.msg("No records found for this staff member.", "info", "Info")
@@ -3835,12 +3681,11 @@ Do you want to proceed anyway?
     def refresh_records_table(self, table, staff_code):
         """Refresh the records table with latest data."""
         try:
-            conn = sqlite3.connect(databasePath)
+            conn = get_connection(databasePath)
             cursor = conn.cursor()
             cursor.execute('SELECT id, clock_in_time, clock_out_time, notes FROM clock_records WHERE staff_code = ?',
                            (staff_code,))
             records = cursor.fetchall()
-            conn.close()
 
             table.setRowCount(len(records))
             for row, record in enumerate(records):
@@ -3869,11 +3714,10 @@ Do you want to proceed anyway?
         logging.info(f"Editing clock record ID: {record_id}")
 
         # Fetch the record details
-        conn = sqlite3.connect(databasePath)
+        conn = get_connection(databasePath)
         cursor = conn.cursor()
         cursor.execute("SELECT clock_in_time, clock_out_time, notes FROM clock_records WHERE id = ?", (record_id,))
         record = cursor.fetchone()
-        conn.close()
 
         if not record:
             self.msg("Record not found.", "warning", "Error")
@@ -3914,15 +3758,21 @@ Do you want to proceed anyway?
     def save_clock_record(self, record_id, clock_in, clock_out, notes, dialog):
         """Saves the edited clock record."""
         try:
-            conn = sqlite3.connect(databasePath)
+            conn = get_connection(databasePath)
             cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE clock_records
-                SET clock_in_time = ?, clock_out_time = ?, notes = ?
-                WHERE id = ?
-            """, (clock_in, clock_out, notes, record_id))
-            conn.commit()
-            conn.close()
+            with conn:
+                cursor.execute("""
+                    UPDATE clock_records
+                    SET clock_in_time = ?, clock_out_time = ?, notes = ?
+                    WHERE id = ?
+                """, (clock_in, clock_out, notes, record_id))
+
+            self.backup_clock_record_by_id(record_id, conn)
+            
+            # An edited clock-out time can open or close a shift
+            staff_row = cursor.execute("SELECT staff_code FROM clock_records WHERE id = ?", (record_id,)).fetchone()
+            if staff_row:
+                self.open_shifts.refresh_staff(staff_row[0], conn)
 
             self.msg("Record updated successfully.", "info", "Success")
             logging.info(
@@ -3942,11 +3792,11 @@ Do you want to proceed anyway?
             return
 
         try:
-            conn = sqlite3.connect(databasePath)
+            conn = get_connection(databasePath)
             cursor = conn.cursor()
-            cursor.execute("UPDATE clock_records SET notes = ? WHERE id = ?", (comment.strip(), record_id))
-            conn.commit()
-            conn.close()
+            with conn:
+                cursor.execute("UPDATE clock_records SET notes = ? WHERE id = ?", (comment.strip(), record_id))
+            self.backup_clock_record_by_id(record_id, conn)
             self.msg("Comment saved successfully.", "info", "Success")
             dialog.close()
             logging.info(f"Added comment to record ID {record_id}: {comment}")
@@ -3987,39 +3837,24 @@ Do you want to proceed anyway?
             logging.error("Missing staff name.")
             return
 
-        max_retries = 1000
-        retries = 0
-        while retries < max_retries:
-            staff_code = random.randint(1000, 9999)
-            conn = sqlite3.connect(databasePath)
-            c = conn.cursor()
-            while c.execute('SELECT * FROM staff WHERE code = ?', (staff_code,)).fetchone():
-                staff_code = random.randint(1000, 9999)
+        try:
+            allocator = get_staff_code_allocator(self.database_path, self.settings.get("staff_code_allocation"))
+            success, message, staff_code = allocator.create_one(staff_name, staff_role)
+            if not success:
+                self.msg(f"Failed to add staff member: {message}", "warning", "Error")
+                logging.error(f"Failed to add staff member {staff_name}: {message}")
+                return
 
-            try:
-                c.execute('INSERT INTO staff (name, code, role) VALUES (?, ?, ?)', 
-                         (staff_name, staff_code, staff_role))
-                conn.commit()
-                
-                # Create real-time backup for staff record
-                self.backup_staff_record(staff_code, staff_name, staff_role)
-                
-                self.msg(f"Staff member {staff_name} added with code {staff_code}.", "info", "Success")
-                logging.info(f"Staff member {staff_name} added with code {staff_code} and role {staff_role}.")
+            self.staff_directory.refresh_staff(staff_code)
+            # Create real-time backup for staff record
+            self.backup_staff_record(staff_code, staff_name, staff_role)
 
-                break
-            except sqlite3.Error as e:
-                self.msg(f"Database error occurred: {e}", "warning", "Database Error")
-                logging.error(f"Database error in add_staff: {e}")
-            except Exception as e:
-                self.msg(f"Unexpected error occurred: {e}", "warning", "Error")
-                logging.error(f"Unexpected error in add_staff: {e}", exc_info=True)
-            finally:
-                conn.close()
-            retries += 1
-        else:
-            self.msg("Failed to add staff member. Please try again.", "warning", "Error")
-            logging.error(f"Failed to add staff member {staff_name}.")
+            self.msg(f"Staff member {staff_name} added with code {staff_code}.", "info", "Success")
+            logging.info(f"Staff member {staff_name} added with code {staff_code} and role {staff_role}.")
+
+        except Exception as e:
+            self.msg(f"Unexpected error occurred: {e}", "warning", "Error")
+            logging.error(f"Unexpected error in add_staff: {e}", exc_info=True)
 
     def remove_staff(self):
         staff_name = self.name_entry.text().strip()
@@ -4029,45 +3864,19 @@ Do you want to proceed anyway?
             return
 
         try:
-            conn = sqlite3.connect(databasePath)
-            c = conn.cursor()
+            conn = get_connection(databasePath)
 
             # Check if the staff member exists
-            c.execute('SELECT code FROM staff WHERE name = ?', (staff_name,))
-            staff = c.fetchone()
+            staff = conn.execute('SELECT code FROM staff WHERE name = ?', (staff_name,)).fetchone()
             if not staff:
                 self.msg("Staff member not found.", "warning", "Error")
                 logging.error(f"Staff member '{staff_name}' not found.")
                 return
-            staff_code = staff[0]
 
-            # Fetch all clock records for the staff member
-            c.execute('SELECT clock_in_time, clock_out_time, "" AS notes FROM clock_records WHERE staff_code = ?',
-                      (staff_code,))
-            clock_records = c.fetchall()
-
-            # Archive records if any exist
-            if clock_records:
-                for record in clock_records:
-                    c.execute(
-                        'INSERT INTO archive_records (staff_name, staff_code, clock_in, clock_out, notes) VALUES (?, ?, ?, ?, ?)',
-                        (staff_name, staff_code, *record)
-                    )
-
-            # If no records exist, still archive the staff's details
-            if not clock_records:
-                c.execute(
-                    'INSERT INTO archive_records (staff_name, staff_code, clock_in, clock_out, notes) VALUES (?, ?, NULL, NULL, NULL)',
-                    (staff_name, staff_code)
-                )
-
-            # Commit archive records
-            conn.commit()
-
-            # Delete clock records and staff record from main tables
-            c.execute('DELETE FROM clock_records WHERE staff_code = ?', (staff_code,))
-            c.execute('DELETE FROM staff WHERE code = ?', (staff_code,))
-            conn.commit()
+            success, message, _ = self.offboard_staff([staff[0]])
+            if not success:
+                self.msg(message, "warning", "Database Error")
+                return
 
             self.msg(f"Staff member {staff_name} removed successfully.", "info", "Success")
             logging.info(f"Archived and removed staff member: {staff_name}")
@@ -4078,8 +3887,144 @@ Do you want to proceed anyway?
         except Exception as e:
             self.msg(f"Unexpected error occurred: {e}", "warning", "Error")
             logging.error(f"Unexpected error in remove_staff: {e}", exc_info=True)
-        finally:
-            conn.close()
+
+    def offboard_staff(self, staff_codes):
+        """Archive and remove staff members in one transaction, then journal and forget them."""
+        # Queued clock writes for these staff must land before their records are archived
+        self.db_writer.flush()
+        success, message, removed = remove_staff_members(self.database_path, staff_codes)
+        if not success:
+            return success, message, removed
+
+        for staff_code, _ in removed:
+            self.backup_delete('clock_records', {'staff_code': staff_code})
+            self.backup_delete('staff', {'code': staff_code})
+            self.open_shifts.discard_staff(staff_code)
+            self.staff_directory.remove(staff_code)
+            self.shift_breaks.discard_staff(staff_code)
+        get_staff_code_allocator(self.database_path).release(code for code, _ in removed)
+        # One journal write for the whole batch
+        self.change_journal.flush()
+
+        if logger:
+            logger.log_admin_action(
+                admin_user="ADMIN",
+                action="Offboard Staff",
+                target=", ".join(f"{name} ({code})" for code, name in removed),
+                details=message,
+                success=True
+            )
+        return success, message, removed
+
+    def open_bulk_offboarding(self):
+        """Dialog for removing many staff members at once from a list of codes or a CSV file."""
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Bulk Staff Offboarding")
+        dialog.setMinimumSize(450, 400)
+        layout = QVBoxLayout(dialog)
+
+        layout.addWidget(QLabel("Staff codes to remove (one per line, or separated by commas/spaces):"))
+        codes_edit = QTextEdit()
+        codes_edit.setPlaceholderText("1234\n5678\n...")
+        layout.addWidget(codes_edit)
+
+        def load_csv():
+            path, _ = QFileDialog.getOpenFileName(dialog, "Select Staff CSV", "", "CSV Files (*.csv);;All Files (*)")
+            if not path:
+                return
+            try:
+                codes = read_staff_codes_csv(path)
+            except Exception as e:
+                self.msg(f"Could not read {os.path.basename(path)}: {e}", "warning", "Error")
+                return
+            codes_edit.setPlainText("\n".join(codes))
+
+        buttons = QHBoxLayout()
+        load_button = QPushButton("Load CSV...")
+        load_button.clicked.connect(load_csv)
+        remove_button = QPushButton("Remove Staff")
+        cancel_button = QPushButton("Cancel")
+        cancel_button.clicked.connect(dialog.reject)
+        buttons.addWidget(load_button)
+        buttons.addStretch()
+        buttons.addWidget(remove_button)
+        buttons.addWidget(cancel_button)
+        layout.addLayout(buttons)
+
+        def remove():
+            codes = [code for code in codes_edit.toPlainText().replace(",", " ").split() if code]
+            if not codes:
+                self.msg("Please enter at least one staff code.", "warning", "Error")
+                return
+            reply = QMessageBox.question(
+                dialog,
+                "Confirm Offboarding",
+                f"Archive and remove {len(codes)} staff member(s) and all of their clock records?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+
+            success, message, _ = self.offboard_staff(codes)
+            if success:
+                self.msg(message, "info", "Offboarding Complete")
+                dialog.accept()
+            else:
+                self.msg(message, "warning", "Offboarding Failed")
+
+        remove_button.clicked.connect(remove)
+        dialog.exec()
+
+    def import_staff_file(self):
+        """Import staff members from a CSV/JSON file and journal them as one batch."""
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Staff", "", "Staff Files (*.csv *.json *.jsonl);;All Files (*)"
+        )
+        if not path:
+            return
+
+        success, message, report = import_staff(self.database_path, path)
+        if success:
+            try:
+                # Straight to the journal: one flush, without an admin-log line per person
+                for staff_code, name, role in report.imported:
+                    self.change_journal.upsert('staff', {'code': staff_code, 'name': name, 'role': role, 'notes': None})
+                self.change_journal.flush()
+            except Exception as e:
+                logging.error(f"Failed to journal imported staff: {e}")
+            self.staff_directory.invalidate()
+        self._show_import_result("Staff Import", path, success, message)
+
+    def import_clock_records_file(self):
+        """Import historical clock records exported from a legacy system."""
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Clock Records", "", "Clock Record Files (*.csv *.json *.jsonl);;All Files (*)"
+        )
+        if not path:
+            return
+
+        # Let queued clock writes land first so duplicates are recognised
+        self.db_writer.flush()
+        success, message, report = import_clock_records(self.database_path, path)
+        if success:
+            for row in report.imported:
+                self.backup_clock_record(*row)
+            self.change_journal.flush()
+            # Imported open records are open shifts
+            self.open_shifts.load()
+        self._show_import_result("Clock Record Import", path, success, message)
+
+    def _show_import_result(self, title, path, success, message):
+        if logger:
+            logger.log_admin_action(
+                admin_user="ADMIN",
+                action=title,
+                target=os.path.basename(path),
+                details=message.splitlines()[0],
+                success=success
+            )
+        self.msg(message, "info" if success else "warning", title)
 
     def generate_pdf(self, file_path, staff_name, records):
         """Generate a PDF for the given staff member and save it to file_path."""
@@ -4236,7 +4181,7 @@ Do you want to proceed anyway?
 
         try:
             # Fetch the staff details
-            conn = sqlite3.connect(databasePath)
+            conn = get_connection(databasePath)
             cursor = conn.cursor()
             cursor.execute('SELECT code, role FROM staff WHERE name = ?', (staff_name,))
             staff = cursor.fetchone()
@@ -4284,11 +4229,13 @@ Do you want to proceed anyway?
                 end_date = datetime.now()
 
                 # Get timesheet records
+                period_start, period_end = period_bounds(start_date, end_date)
                 cursor.execute("""
-                    SELECT clock_in_time, clock_out_time
+                    SELECT clock_in_time, clock_out_time, break_time
                     FROM clock_records
-                    WHERE staff_code = ? AND DATE(clock_in_time) BETWEEN ? AND ?
-                """, (staff_code, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')))
+                    WHERE staff_code = ? AND clock_in_epoch >= ? AND clock_in_epoch < ?
+                    ORDER BY clock_in_epoch
+                """, (staff_code, period_start, period_end))
                 records = cursor.fetchall()
                 
                 if not records:
@@ -4313,8 +4260,6 @@ Do you want to proceed anyway?
         except sqlite3.Error as e:
             self.msg(f"Database error: {e}", "warning", "Error")
             logging.error(f"Database error in preparePrint: {e}")
-        finally:
-            conn.close()
 
     def print_via_jetdirect(self, file_path):
         printerIP = self.settings["printer_IP"]
@@ -4346,13 +4291,14 @@ Do you want to proceed anyway?
 
     def fetch_timesheet_records(self, conn, start_date, end_date):
         c = conn.cursor()
+        period_start, period_end = period_bounds(start_date, end_date)
         c.execute("""
             SELECT s.name, s.role, c.clock_in_time, c.clock_out_time
             FROM staff s
             LEFT JOIN clock_records c ON s.code = c.staff_code
-            WHERE DATE(c.clock_in_time) BETWEEN ? AND ?
+            WHERE c.clock_in_epoch >= ? AND c.clock_in_epoch < ?
             ORDER BY s.role, s.name, c.clock_in_time
-        """, (start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')))
+        """, (period_start, period_end))
         records = c.fetchall()
         logging.info(f"Fetched records for time sheet")
         return records
@@ -4385,11 +4331,10 @@ Do you want to proceed anyway?
                                                   staff_names, 0, False)
 
             if ok and staff_name:
-                conn = sqlite3.connect(self.database_path)
+                conn = get_connection(self.database_path)
                 c = conn.cursor()
                 c.execute("SELECT code FROM staff WHERE name = ?", (staff_name,))
                 result = c.fetchone()
-                conn.close()
 
                 if result:
                     staff_code = result[0]
@@ -4418,15 +4363,16 @@ Do you want to proceed anyway?
         end_date = datetime.now()
 
         # Fetch clock records for the staff member
-        conn = sqlite3.connect(databasePath)
+        period_start, period_end = period_bounds(start_date, end_date)
+        conn = get_connection(databasePath)
         cursor = conn.cursor()
         cursor.execute("""
-            SELECT clock_in_time, clock_out_time
+            SELECT clock_in_time, clock_out_time, break_time
             FROM clock_records
-            WHERE staff_code = ? AND DATE(clock_in_time) BETWEEN ? AND ?
-        """, (staff_code, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')))
+            WHERE staff_code = ? AND clock_in_epoch >= ? AND clock_in_epoch < ?
+            ORDER BY clock_in_epoch
+        """, (staff_code, period_start, period_end))
         records = cursor.fetchall()
-        conn.close()
 
         if not records:
             self.msg(f"No records found for {staff_name} between {start_date} and {end_date}.", "info", "Info")
@@ -4475,8 +4421,9 @@ Do you want to proceed anyway?
         for record in records:
             clock_in = datetime.fromisoformat(record[0]) if record[0] else None
             clock_out = datetime.fromisoformat(record[1]) if record[1] else None
+            break_total = break_minutes(record[2])
             hours_worked = (
-                (clock_out - clock_in).total_seconds() / 3600 if clock_in and clock_out else ""
+                worked_hours(clock_in, clock_out, break_total) if clock_in and clock_out else ""
             )
             data.append([
                 clock_in.strftime('%d-%m-%Y') if clock_in else '',
@@ -4484,7 +4431,7 @@ Do you want to proceed anyway?
                 clock_in.strftime('%H:%M') if clock_in else '',
                 clock_out.strftime('%H:%M') if clock_out else '',
                 f"{hours_worked:.2f}" if hours_worked else '',
-                ""
+                f"Break {break_total:.0f} min" if break_total else ""
             ])
 
         # Add totals row
@@ -4536,11 +4483,10 @@ Do you want to proceed anyway?
 
     def fetch_unique_roles(self):
         try:
-            conn = sqlite3.connect(databasePath)
+            conn = get_connection(databasePath)
             cursor = conn.cursor()
             cursor.execute('SELECT DISTINCT role FROM staff WHERE role IS NOT NULL')
             roles = [role[0] for role in cursor.fetchall() if role[0]]
-            conn.close()
             return roles
         except sqlite3.Error as e:
             logging.error(f"Database error when fetching roles: {e}")
@@ -4548,11 +4494,10 @@ Do you want to proceed anyway?
 
     def update_role_from_name(self, name):
         if name:
-            conn = sqlite3.connect(databasePath)
+            conn = get_connection(databasePath)
             c = conn.cursor()
             c.execute('SELECT role FROM staff WHERE name = ?', (name,))
             result = c.fetchone()
-            conn.close()
             
             if result and result[0]:
                 self.role_entry.setText(result[0])
@@ -4562,11 +4507,10 @@ Do you want to proceed anyway?
     def update_role_label(self):
         name = self.name_entry.text().strip()
         try:
-            conn = sqlite3.connect(databasePath)
+            conn = get_connection(databasePath)
             c = conn.cursor()
             c.execute('SELECT role FROM staff WHERE name = ?', (name,))
             result = c.fetchone()
-            conn.close()
 
             if result and result[0]:
                 self.role_entry.setText(result[0])
@@ -4706,8 +4650,9 @@ Do you want to proceed anyway?
             self.msg("Please enter both name and car registration.", "warning", "Error")
             return
 
+        conn = None
         try:
-            conn = sqlite3.connect(databasePath)
+            conn = get_connection(databasePath)
             c = conn.cursor()
 
             if action == "in":
@@ -4729,8 +4674,8 @@ Do you want to proceed anyway?
                 # Clear input fields immediately when showing confirmation
                 self.clear_input_fields()
                 
-                self.msg("Visitor checked in successfully.", "info", "Success")
                 dialog.close()
+                self.notify(f"Visitor {name} checked in.", "success")
 
             elif action == "out":
                 # Find matching unchecked-out visit
@@ -4752,19 +4697,21 @@ Do you want to proceed anyway?
                 # Clear input fields immediately when showing confirmation
                 self.clear_input_fields()
                 
-                self.msg("Visitor checked out successfully.", "info", "Success")
                 dialog.close()
+                self.notify(f"Visitor {name} checked out.", "success")
 
         except sqlite3.Error as e:
             self.msg(f"Database error: {e}", "warning", "Error")
             logging.error(f"Database error in handle_visitor: {e}")
         finally:
-            conn.close()
+            # Roll back anything an error path left uncommitted on the shared connection
+            if conn is not None and conn.in_transaction:
+                conn.rollback()
 
     def open_visitors_tab(self):
         """Opens a tab to view all visitor records."""
         try:
-            conn = sqlite3.connect(databasePath)
+            conn = get_connection(databasePath)
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT name, car_reg, purpose, time_in, time_out 
@@ -4772,7 +4719,6 @@ Do you want to proceed anyway?
                 ORDER BY time_in DESC
             ''')
             records = cursor.fetchall()
-            conn.close()
 
             if not records:
                 self.msg("No visitor records found.", "info", "Info")
@@ -4960,8 +4906,9 @@ Do you want to proceed anyway?
             self.msg("Name and car registration are required.", "warning", "Error")
             return
 
+        conn = None
         try:
-            conn = sqlite3.connect(databasePath)
+            conn = get_connection(databasePath)
             cursor = conn.cursor()
             
             # Update the record
@@ -4982,7 +4929,9 @@ Do you want to proceed anyway?
             self.msg(f"Database error: {e}", "warning", "Error")
             logging.error(f"Database error in save_visitor_changes: {e}")
         finally:
-            conn.close()
+            # Roll back anything an error path left uncommitted on the shared connection
+            if conn is not None and conn.in_transaction:
+                conn.rollback()
 
     def ping_printer(self, ip_address):
         """Test if a printer is reachable at the given IP address."""
@@ -5190,19 +5139,9 @@ Do you want to proceed anyway?
         
         # Check current archive safety status
         try:
-            conn = sqlite3.connect(self.database_path)
-            c = conn.cursor()
-            c.execute("""
-                SELECT COUNT(DISTINCT cr.staff_code), 
-                       GROUP_CONCAT(s.name) as names
-                FROM clock_records cr
-                JOIN staff s ON cr.staff_code = s.code
-                WHERE cr.clock_out_time IS NULL
-            """)
-            result = c.fetchone()
-            active_count = result[0] if result[0] else 0
-            active_names = result[1] if result[1] else ""
-            conn.close()
+            active_shifts = self.open_shifts.active_shifts()
+            active_count = len(active_shifts)
+            active_names = ",".join(shift.name for shift in active_shifts)
             
             if active_count == 0:
                 archive_status_label.setText("✅ SAFE TO ARCHIVE: No users currently clocked in")
@@ -5236,6 +5175,11 @@ Do you want to proceed anyway?
             """)
         
         layout.addWidget(archive_status_label)
+        
+        # Progress of a running archive copy
+        archive_progress_bar = QProgressBar()
+        archive_progress_bar.setVisible(False)
+        layout.addWidget(archive_progress_bar)
 
         # Manual archive button
         manual_archive_button = QPushButton("Create Manual Archive")
@@ -5244,7 +5188,12 @@ Do you want to proceed anyway?
             background-color: {self.COLORS['warning']};
             min-width: 150px;
         """)
-        manual_archive_button.clicked.connect(lambda: self.create_manual_archive(archive_dialog))
+        manual_archive_button.clicked.connect(lambda: self.create_manual_archive(archive_dialog, archive_progress_bar))
+        
+        # Move closed records from past pay periods out of the live database
+        period_archive_button = QPushButton("Archive Closed Periods")
+        period_archive_button.setFont(QFont("Inter", 12))
+        period_archive_button.clicked.connect(lambda: self.archive_closed_periods(archive_dialog, archive_progress_bar))
         
         # Force archive button (with protection)
         force_archive_button = QPushButton("Archive & Reset Database")
@@ -5253,7 +5202,12 @@ Do you want to proceed anyway?
             background-color: {self.COLORS['danger']};
             min-width: 150px;
         """)
-        force_archive_button.clicked.connect(lambda: self.archive_with_confirmation(archive_dialog))
+        force_archive_button.clicked.connect(lambda: self.archive_with_confirmation(archive_dialog, archive_progress_bar))
+        
+        # Search across the live database and every archive
+        search_button = QPushButton("Search Records")
+        search_button.setFont(QFont("Inter", 12))
+        search_button.clicked.connect(self.open_archive_search)
         
         # Refresh button
         refresh_button = QPushButton("Refresh")
@@ -5266,13 +5220,134 @@ Do you want to proceed anyway?
         close_button.clicked.connect(archive_dialog.close)
         
         button_layout.addWidget(manual_archive_button)
+        button_layout.addWidget(period_archive_button)
         button_layout.addWidget(force_archive_button)
+        button_layout.addWidget(search_button)
         button_layout.addWidget(refresh_button)
         button_layout.addWidget(close_button)
         layout.addLayout(button_layout)
 
         archive_dialog.exec()
 
+    def open_archive_search(self):
+        """Search clock records for a staff member across the live database and every archive."""
+        search_dialog = QDialog(self)
+        search_dialog.setWindowTitle("Search Archived Records")
+        search_dialog.setFixedSize(1000, 700)
+        search_dialog.setStyleSheet(f"""
+            QDialog {{
+                background: {self.COLORS['dark']};
+                color: {self.COLORS['light']};
+            }}
+            QLabel {{
+                color: {self.COLORS['light']};
+                font-family: Inter;
+            }}
+            QTableWidget {{
+                background: {self.COLORS['dark']};
+                color: {self.COLORS['light']};
+                border: none;
+                gridline-color: {self.COLORS['gray']};
+            }}
+            QHeaderView::section {{
+                background: {self.COLORS['primary']};
+                color: {self.COLORS['light']};
+                padding: 8px;
+                border: none;
+            }}
+            QPushButton {{
+                background: {self.COLORS['primary']};
+                color: {self.COLORS['light']};
+                border: none;
+                border-radius: 5px;
+                padding: 10px;
+                min-width: 100px;
+            }}
+        """)
+
+        layout = QVBoxLayout(search_dialog)
+        layout.setSpacing(10)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        title_label = QLabel("Search Records Across All Archives")
+        title_label.setFont(QFont("Inter", 16, QFont.Weight.Bold))
+        title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(title_label)
+
+        # Filters
+        filter_layout = QHBoxLayout()
+        staff_code_input = QLineEdit()
+        staff_code_input.setPlaceholderText("Staff code (blank for everyone)")
+        start_date_input = QDateEdit(QDate.currentDate().addYears(-2))
+        start_date_input.setCalendarPopup(True)
+        start_date_input.setDisplayFormat("dd/MM/yyyy")
+        end_date_input = QDateEdit(QDate.currentDate())
+        end_date_input.setCalendarPopup(True)
+        end_date_input.setDisplayFormat("dd/MM/yyyy")
+        search_button = QPushButton("Search")
+        filter_layout.addWidget(QLabel("Staff:"))
+        filter_layout.addWidget(staff_code_input)
+        filter_layout.addWidget(QLabel("From:"))
+        filter_layout.addWidget(start_date_input)
+        filter_layout.addWidget(QLabel("To:"))
+        filter_layout.addWidget(end_date_input)
+        filter_layout.addWidget(search_button)
+        layout.addLayout(filter_layout)
+
+        summary_label = QLabel("")
+        summary_label.setFont(QFont("Inter", 12))
+        summary_label.setWordWrap(True)
+        layout.addWidget(summary_label)
+
+        results_table = QTableWidget(0, 6)
+        results_table.setHorizontalHeaderLabels(["Staff Code", "Name", "Clock In", "Clock Out", "Notes", "Source"])
+        results_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        results_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        layout.addWidget(results_table)
+
+        max_rows_shown = 1000
+
+        def run_search():
+            try:
+                staff_code = staff_code_input.text().strip()
+                start_date = start_date_input.date().toPyDate()
+                end_date = end_date_input.date().toPyDate()
+                query = ArchiveQuery(self.database_path, self.archive_folder)
+
+                results_table.setRowCount(0)
+                total_records = 0
+                total_hours = 0.0
+                for record in query.clock_records(start_date, end_date, [staff_code] if staff_code else None):
+                    total_records += 1
+                    if record['clock_in_time'] and record['clock_out_time']:
+                        try:
+                            total_hours += worked_hours(record['clock_in_time'], record['clock_out_time'],
+                                                        record['break_time'])
+                        except ValueError:
+                            pass
+                    if total_records <= max_rows_shown:
+                        row = results_table.rowCount()
+                        results_table.insertRow(row)
+                        for column, key in enumerate(('staff_code', 'name', 'clock_in_time', 'clock_out_time', 'notes', 'source')):
+                            results_table.setItem(row, column, QTableWidgetItem(str(record[key] or '')))
+
+                summary = f"{total_records} record(s), {total_hours:.2f} hours worked"
+                if total_records > max_rows_shown:
+                    summary += f" (showing the first {max_rows_shown})"
+                summary_label.setText(summary)
+                logging.info(f"Archive search for '{staff_code or 'all staff'}' {start_date} to {end_date}: {summary}")
+            except Exception as e:
+                logging.error(f"Archive search failed: {e}")
+                self.msg(f"Error searching archives: {str(e)}", "warning", "Error")
+
+        search_button.clicked.connect(run_search)
+
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(search_dialog.close)
+        layout.addWidget(close_button)
+
+        search_dialog.exec()
+
     def view_archive_database(self, archive_path):
         """View the contents of an archived database with detailed information."""
         try:
@@ -5347,20 +5422,12 @@ Do you want to proceed anyway?
             conn = sqlite3.connect(archive_path)
             cursor = conn.cursor()
             
-            # Get summary information
-            cursor.execute("SELECT COUNT(*) FROM staff")
-            staff_count = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM clock_records")
-            records_count = cursor.fetchone()[0]
-            
-            # Check if visitors table exists
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='visitors'")
-            visitors_table_exists = cursor.fetchone() is not None
-            visitors_count = 0
-            if visitors_table_exists:
-                cursor.execute("SELECT COUNT(*) FROM visitors")
-                visitors_count = cursor.fetchone()[0]
+            # Summary information comes from the archive catalog rather than counting every table
+            info = get_archive_catalog(self.archive_folder).get_info(archive_path)
+            staff_count = info.get('staff_count', 0)
+            records_count = info.get('records_count', 0)
+            visitors_table_exists = info.get('visitors_table_exists', False)
+            visitors_count = info.get('visitors_count', 0)
 
             # Summary section
             summary_text = f"Staff Members: {staff_count} | Clock Records: {records_count} | Visitor Records: {visitors_count}"
@@ -5506,6 +5573,7 @@ Do you want to proceed anyway?
             
             if reply == QMessageBox.StandardButton.Yes:
                 os.remove(archive_path)
+                get_archive_catalog(self.archive_folder).remove(archive_path)
                 self.msg(f"Archive '{filename}' deleted successfully.", "info", "Archive Deleted")
                 logging.info(f"Deleted archive database: {filename}")
                 
@@ -5517,7 +5585,7 @@ Do you want to proceed anyway?
             self.msg(f"Error deleting archive: {str(e)}", "warning", "Error")
             logging.error(f"Error deleting archive {archive_path}: {e}")
 
-    def create_manual_archive(self, parent_dialog):
+    def create_manual_archive(self, parent_dialog, progress_bar=None):
         """Create a manual archive of the current database."""
         try:
             reply = QMessageBox.question(
@@ -5534,19 +5602,74 @@ Do you want to proceed anyway?
                 archive_filename = f"manual_archive_{archive_date}.db"
                 archive_path = os.path.join(self.archive_folder, archive_filename)
                 
-                shutil.copy2(self.database_path, archive_path)
-                self.msg(f"Manual archive created: {archive_filename}", "info", "Archive Created")
-                logging.info(f"Manual archive created: {archive_filename}")
-                
-                # Refresh the dialog
-                parent_dialog.close()
-                self.open_archive_management()
+                # Copies in the background; the dialog is refreshed when it finishes
+                self.start_archive_snapshot(
+                    archive_path,
+                    partial(self._on_archive_snapshot_finished, False, parent_dialog, True),
+                    progress_bar
+                )
                 
         except Exception as e:
             self.msg(f"Error creating manual archive: {str(e)}", "warning", "Error")
             logging.error(f"Error creating manual archive: {e}")
 
-    def archive_with_confirmation(self, parent_dialog):
+    def archive_closed_periods(self, parent_dialog, progress_bar=None):
+        """Move finished shifts and visits from past pay periods into per-period archive databases."""
+        try:
+            if self.period_archive_thread is not None and self.period_archive_thread.isRunning():
+                self.msg("Period archiving is already running. Please wait for it to finish.", "warning", "Archive In Progress")
+                return
+            
+            # Everything before the current pay period
+            cutoff, _ = pay_period(datetime.now(), self.settings["start_day"])
+            reply = QMessageBox.question(
+                parent_dialog,
+                "Archive Closed Periods",
+                f"This will move completed clock records and signed-out visitors from before "
+                f"{cutoff.strftime('%d/%m/%Y')} into one archive database per pay period.\n\n"
+                "Staff who are still clocked in are not affected.\n\n"
+                "Do you want to proceed?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+            
+            thread = PeriodArchiveThread(
+                self.database_path, self.archive_folder, cutoff, self.settings["start_day"],
+                on_deleted=self._journal_archived_rows, parent=self
+            )
+            if progress_bar is not None:
+                progress_bar.setFormat("Archiving pay periods... %v/%m")
+                progress_bar.setValue(0)
+                progress_bar.setVisible(True)
+                
+                def update_progress(done, total):
+                    progress_bar.setMaximum(max(total, 1))
+                    progress_bar.setValue(done)
+                thread.period_progress.connect(update_progress)
+            thread.period_finished.connect(partial(self._on_period_archive_finished, parent_dialog))
+            self.period_archive_thread = thread
+            thread.start()
+            
+        except Exception as e:
+            self.msg(f"Error archiving closed periods: {str(e)}", "warning", "Error")
+            logging.error(f"Error archiving closed periods: {e}")
+
+    def _journal_archived_rows(self, table, ids):
+        """Record rows moved out of the live database (called on the archive thread)."""
+        for row_id in ids:
+            self.backup_delete(table, {'id': row_id})
+
+    def _on_period_archive_finished(self, parent_dialog, success, message):
+        if success:
+            self.msg(message, "info", "Archive Complete")
+        else:
+            self.msg(message, "warning", "Archive Error")
+        parent_dialog.close()
+        self.open_archive_management()
+
+    def archive_with_confirmation(self, parent_dialog, progress_bar=None):
         """Archive database with user confirmation and protection."""
         try:
             reply = QMessageBox.question(
@@ -5564,9 +5687,8 @@ Do you want to proceed anyway?
             )
             
             if reply == QMessageBox.StandardButton.Yes:
-                # Close the dialog first, then archive
-                parent_dialog.close()
-                self.archive_current_database()  # This will now check for active users
+                # The dialog stays open to show progress and is closed once archiving finishes
+                self.archive_current_database(parent_dialog=parent_dialog, progress_bar=progress_bar)  # This will now check for active users
                 
         except Exception as e:
             self.msg(f"Error during archive confirmation: {str(e)}", "warning", "Error")
@@ -5580,33 +5702,20 @@ Do you want to proceed anyway?
             list: List of dictionaries containing active user information
         """
         try:
-            conn = sqlite3.connect(self.database_path)
-            c = conn.cursor()
-            
-            c.execute("""
-                SELECT cr.staff_code, s.name, s.role, cr.clock_in_time, cr.id
-                FROM clock_records cr
-                JOIN staff s ON cr.staff_code = s.code
-                WHERE cr.clock_out_time IS NULL
-                ORDER BY cr.clock_in_time
-            """)
-            
             active_users = []
-            for staff_code, name, role, clock_in_time, record_id in c.fetchall():
-                clock_in_dt = datetime.fromisoformat(clock_in_time)
-                hours_worked = (datetime.now() - clock_in_dt).total_seconds() / 3600
+            for shift in self.open_shifts.active_shifts(order_by='clock_in_time'):
+                clock_in_dt = datetime.fromisoformat(shift.clock_in_time)
                 
                 active_users.append({
-                    'staff_code': staff_code,
-                    'name': name,
-                    'role': role,
-                    'clock_in_time': clock_in_time,
+                    'staff_code': shift.staff_code,
+                    'name': shift.name,
+                    'role': shift.role,
+                    'clock_in_time': shift.clock_in_time,
                     'clock_in_formatted': clock_in_dt.strftime('%H:%M on %d/%m/%Y'),
-                    'hours_worked': hours_worked,
-                    'record_id': record_id
+                    'hours_worked': shift.hours_so_far(),
+                    'record_id': shift.record_id
                 })
             
-            conn.close()
             return active_users
             
         except Exception as e:
@@ -5619,32 +5728,14 @@ Do you want to proceed anyway?
         
         Args:
             staff_code (str): The staff code to clock out
-            record_id (int): The specific record ID to close
+            record_id (int): The specific record ID to close; None while the clock-in is
+                still being saved, in which case the latest open record is closed
         """
         try:
-            conn = sqlite3.connect(self.database_path)
-            c = conn.cursor()
-            
-            # Force clock out with current time
-            clock_out_time = datetime.now().isoformat()
-            c.execute('UPDATE clock_records SET clock_out_time = ? WHERE id = ?', 
-                     (clock_out_time, record_id))
-            conn.commit()
-            
-            # Get staff name for logging
-            c.execute('SELECT name FROM staff WHERE code = ?', (staff_code,))
-            result = c.fetchone()
-            staff_name = result[0] if result else 'Unknown'
-            conn.close()
-            
-            # Create backup of the forced clock-out
-            self.backup_clock_record(record_id, staff_code, None, clock_out_time, f"FORCE CLOCK-OUT: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            
-            logging.warning(f"⚠️ FORCE CLOCK-OUT: {staff_name} ({staff_code}) - Record ID {record_id}")
-            return True
-            
-        except Exception as e:
-            logging.error(f"Error force clocking out user {staff_code}: {e}")
+            return self.clock_service.force_clock_out(staff_code, record_id).result(timeout=10).success
+        except FuturesTimeoutError:
+            # Still queued behind other writes; the open shift registry updates when it commits
+            logging.error(f"⚠️ Force clock-out for {staff_code} not confirmed within 10s")
             return False
 
     def refresh_archive_management(self, dialog):
@@ -5717,7 +5808,7 @@ Do you want to proceed anyway?
 
         # Get all staff and their fingerprint status
         try:
-            conn = sqlite3.connect(self.database_path)
+            conn = get_connection(self.database_path)
             cursor = conn.cursor()
             
             # Get all staff with their fingerprint enrollment status in one efficient query
@@ -5729,7 +5820,6 @@ Do you want to proceed anyway?
                 ORDER BY s.name
             ''')
             staff_data = cursor.fetchall()
-            conn.close()
             
             logging.info(f"Loaded {len(staff_data)} staff members for fingerprint management")
                     
@@ -5826,8 +5916,7 @@ Do you want to proceed anyway?
 
             # **UI SAFEGUARD**: Validate staff exists before allowing enrollment
             try:
-                import sqlite3
-                with sqlite3.connect(self.database_path) as conn:
+                with get_connection(self.database_path) as conn:
                     cursor = conn.cursor()
                     cursor.execute('SELECT COUNT(*) FROM staff WHERE code = ?', (staff_code,))
                     staff_exists = cursor.fetchone()[0] > 0
@@ -5866,8 +5955,7 @@ Do you want to proceed anyway?
     def _validate_enrollment_success(self, staff_code, staff_name):
         """Validate that enrollment was successful and data is consistent."""
         try:
-            import sqlite3
-            with sqlite3.connect(self.database_path) as conn:
+            with get_connection(self.database_path) as conn:
                 cursor = conn.cursor()
                 
                 # Check that both staff and fingerprint records exist
@@ -5914,6 +6002,7 @@ Do you want to proceed anyway?
                 success, message = self.fingerprint_manager.remove_employee_enrollment(staff_code)
                 
                 if success:
+                    self.staff_directory.set_enrolled(staff_code, False)
                     self.msg(f"Fingerprint removed for {staff_name}.", "info", "Success")
                     logging.info(f"Fingerprint removed for {staff_name} ({staff_code})")
                     
@@ -5951,7 +6040,7 @@ Do you want to proceed anyway?
         
         maintenance_dialog = QDialog(self)
         maintenance_dialog.setWindowTitle("Database Maintenance")
-        maintenance_dialog.setFixedSize(600, 500)
+        maintenance_dialog.setFixedSize(600, 640)
         maintenance_dialog.setStyleSheet(f"""
             QDialog {{
                 background: {self.COLORS['dark']};
@@ -6036,13 +6125,31 @@ Do you want to proceed anyway?
             validator.validate_data_consistency, "Data Consistency Validation", results_area
         ))
 
+        # Incremental runs only check new and changed records; this re-checks everything
+        validate_all_btn = QPushButton("Full Data Validation")
+        validate_all_btn.clicked.connect(lambda: self.run_maintenance_task(
+            validator.validate_all_data, "Full Data Consistency Validation", results_area
+        ))
+
         # Optimization buttons
-        vacuum_btn = QPushButton("Optimize Database (VACUUM)")
+        vacuum_btn = QPushButton("Full Rewrite (VACUUM)")
         vacuum_btn.setProperty("cleanup", "true")
         vacuum_btn.clicked.connect(lambda: self.run_maintenance_task(
             cleaner.vacuum_database, "Database Optimization", results_area
         ))
 
+        # Gives free pages back a step at a time instead of rewriting the whole file
+        incremental_vacuum_btn = QPushButton("Reclaim Free Space (Incremental)")
+        incremental_vacuum_btn.setProperty("cleanup", "true")
+        incremental_vacuum_btn.clicked.connect(lambda: self.run_maintenance_task(
+            cleaner.incremental_vacuum, "Incremental Vacuum", results_area
+        ))
+
+        free_space_btn = QPushButton("Free Space Report")
+        free_space_btn.clicked.connect(lambda: self.run_maintenance_task(
+            cleaner.free_space_report, "Free Space Report", results_area
+        ))
+
         integrity_btn = QPushButton("Check Database Integrity")
         integrity_btn.clicked.connect(lambda: self.run_maintenance_task(
             cleaner.check_database_integrity, "Database Integrity Check", results_area
@@ -6056,62 +6163,132 @@ Do you want to proceed anyway?
             "Reset Clock Records",
             "This will delete all clock records but keep staff data. Continue?",
             results_area,
-            maintenance_dialog
+            maintenance_dialog,
+            on_success=self.on_clock_records_reset
         ))
 
         # Add buttons to layout
         button_layout.addWidget(validate_structure_btn)
         button_layout.addWidget(validate_data_btn)
+        button_layout.addWidget(validate_all_btn)
         button_layout.addWidget(integrity_btn)
+        button_layout.addWidget(free_space_btn)
+        button_layout.addWidget(incremental_vacuum_btn)
         button_layout.addWidget(vacuum_btn)
         button_layout.addWidget(reset_records_btn)
 
         layout.addLayout(button_layout)
 
-        # Close button
+        # Cancel and close buttons
         close_button_layout = QHBoxLayout()
+        cancel_button = QPushButton("Cancel Running Task")
+        cancel_button.setProperty("cleanup", "true")
+        cancel_button.clicked.connect(lambda: self.cancel_maintenance_task(results_area))
         close_button = QPushButton("Close")
         close_button.clicked.connect(maintenance_dialog.close)
+        close_button_layout.addWidget(cancel_button)
         close_button_layout.addStretch()
         close_button_layout.addWidget(close_button)
         layout.addLayout(close_button_layout)
 
+        # Tasks keep running after the dialog closes; their results go to the log
+        self.maintenance_results_area = results_area
         maintenance_dialog.exec()
+        self.maintenance_results_area = None
+
+    def run_maintenance_task(self, task_func, task_name, results_area, on_success=None):
+        """Queue a maintenance task on the maintenance thread; results stream into results_area."""
+        self.maintenance_results_area = results_area
+        if on_success is not None:
+            self.maintenance_followups[task_name] = on_success
+        if self.maintenance_executor.current_task() is not None:
+            results_area.append(f"\n⏳ {task_name} queued behind {self.maintenance_executor.current_task()}")
+        self.maintenance_executor.submit(task_name, task_func)
+
+    def cancel_maintenance_task(self, results_area):
+        """Cancel the running maintenance task and anything queued after it."""
+        if self.maintenance_executor.current_task() is None:
+            results_area.append("\nNo maintenance task is running")
+            return
+        results_area.append(f"\nCancelling {self.maintenance_executor.current_task()}...")
+        self.maintenance_executor.cancel_all()
 
-    def run_maintenance_task(self, task_func, task_name, results_area):
-        """Run a maintenance task and display results."""
-        try:
-            results_area.append(f"\n--- {task_name} ---")
-            results_area.append("Running...")
-            
-            # Process events to update UI
-            QApplication.processEvents()
-            
-            success, result = task_func()
-            
-            if success:
-                if isinstance(result, list):
-                    if result:  # Has validation issues
-                        results_area.append("❌ Issues found:")
-                        for issue in result:
-                            results_area.append(f"  • {issue}")
-                    else:  # No issues
-                        results_area.append("✅ No issues found")
-                else:
-                    results_area.append(f"✅ {result}")
-            else:
-                if isinstance(result, list):
+    def _on_maintenance_started(self, task_name):
+        if self.maintenance_results_area is not None:
+            self.maintenance_results_area.append(f"\n--- {task_name} ---")
+            self.maintenance_results_area.append("Running...")
+
+    def _on_maintenance_progress(self, task_name, message):
+        if self.maintenance_results_area is not None:
+            self.maintenance_results_area.append(f"  {message}")
+
+    def _on_maintenance_finished(self, task_name, success, result):
+        followup = self.maintenance_followups.pop(task_name, None)
+        if success and followup is not None:
+            try:
+                followup()
+            except Exception as e:
+                logging.error(f"Follow-up to maintenance task {task_name} failed: {e}")
+
+        results_area = self.maintenance_results_area
+        if results_area is None:
+            # Routine runs with the dialog closed only go to the log
+            if not success:
+                logging.warning(f"Maintenance task {task_name} failed: {result}")
+            return
+
+        if success:
+            if isinstance(result, list):
+                if result:  # Has validation issues
                     results_area.append("❌ Issues found:")
                     for issue in result:
                         results_area.append(f"  • {issue}")
-                else:
-                    results_area.append(f"❌ {result}")
-                    
-        except Exception as e:
-            results_area.append(f"❌ Error: {str(e)}")
-            logging.error(f"Maintenance task error: {e}")
+                else:  # No issues
+                    results_area.append("✅ No issues found")
+            else:
+                results_area.append(f"✅ {result}")
+        else:
+            if isinstance(result, list):
+                results_area.append("❌ Issues found:")
+                for issue in result:
+                    results_area.append(f"  • {issue}")
+            else:
+                results_area.append(f"❌ {result}")
+
+    def run_routine_maintenance(self):
+        """Queue PRAGMA optimize, quick_check and incremental vacuum once a day during quiet hours."""
+        from utils.database_utils import DatabaseCleaner
 
-    def confirm_and_run_maintenance(self, task_func, task_name, confirmation_msg, results_area, parent_dialog):
+        quiet_start = int(self.settings.get("maintenance_quiet_start", 2))
+        quiet_end = int(self.settings.get("maintenance_quiet_end", 5))
+        now = datetime.now()
+        if quiet_start <= quiet_end:
+            in_quiet_hours = quiet_start <= now.hour < quiet_end
+        else:  # window wraps past midnight
+            in_quiet_hours = now.hour >= quiet_start or now.hour < quiet_end
+        if not in_quiet_hours or self.last_routine_maintenance == now.date():
+            return
+        # Open shifts don't block it (with night or 24h cover someone is always clocked in):
+        # each routine task aborts its statement as soon as a clock write is waiting
+        executor = self.maintenance_executor
+        if executor.current_task() is not None or executor.pending_count() or self.db_writer.has_pending_writes():
+            return  # clock writes are waiting or maintenance is running or queued; try again next tick
+
+        self.last_routine_maintenance = now.date()
+        logging.info("🔧 Queuing routine database maintenance")
+        cleaner = DatabaseCleaner(self.database_path)
+        give_way = self.db_writer.has_pending_writes
+        self.maintenance_executor.submit("Routine Statistics Optimization", cleaner.optimize_database, give_way)
+        self.maintenance_executor.submit("Routine Quick Check", cleaner.quick_check_database, give_way)
+        self.maintenance_executor.submit("Routine Incremental Vacuum", cleaner.incremental_vacuum, give_way)
+
+    def _on_maintenance_deferred(self, task_name):
+        """A routine task gave way to clock writes; run the routine again on a later tick."""
+        logging.info(f"🔧 {task_name} gave way to clock writes; will retry")
+        self.last_routine_maintenance = None
+
+    def confirm_and_run_maintenance(self, task_func, task_name, confirmation_msg, results_area, parent_dialog,
+                                    on_success=None):
         """Confirm and run a potentially destructive maintenance task."""
         reply = QMessageBox.question(
             parent_dialog,
@@ -6122,12 +6299,11 @@ Do you want to proceed anyway?
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            self.run_maintenance_task(task_func, task_name, results_area)
+            self.run_maintenance_task(task_func, task_name, results_area, on_success)
 
 if __name__ == '__main__':
     get_os_specific_path()
     app = QApplication(sys.argv)
     window = StaffClockInOutSystem()
     window.show()
-    logging.basicConfig(level=logging.DEBUG)
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Database Maintenance Executor
+=============================
+
+Runs database maintenance (VACUUM, integrity checks, validation, routine
+optimisation) one task at a time on a worker thread, so the kiosk stays
+usable while it works.
+
+Features:
+- Progress messages while a long statement is running
+- Cancellation of the running task through SQLite's progress handler
+- Routine jobs that can be queued from a quiet-hours timer, and that give
+  way (abort and report themselves deferred) when other writes are waiting
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from utils.db_connection import get_connection, close_thread_connections
+
+MaintenanceFunc = Callable[[], Tuple[bool, Any]]
+YieldCheck = Callable[[], bool]
+
+_STOP = object()
+
+
+class MaintenanceExecutor(QThread):
+    """Queue of maintenance tasks executed in order on a single worker thread."""
+
+    task_started = pyqtSignal(str)                 # task name
+    task_progress = pyqtSignal(str, str)           # task name, message
+    task_finished = pyqtSignal(str, bool, object)  # task name, success, result (str or list of findings)
+    task_deferred = pyqtSignal(str)                # task name; it gave way to other writes
+
+    # SQLite VM instructions between progress-handler calls
+    PROGRESS_STEPS = 10000
+    # Minimum seconds between calls to a task's yield_to check
+    YIELD_CHECK_SECONDS = 0.05
+
+    def __init__(self, database_path: str, heartbeat_seconds: float = 2.0, parent=None):
+        super().__init__(parent)
+        self.database_path = database_path
+        self.heartbeat_seconds = heartbeat_seconds
+        self._tasks: "queue.Queue" = queue.Queue()
+        self._cancel = threading.Event()
+        self._current: Optional[str] = None
+        self._current_lock = threading.Lock()
+        self._task_started_at = 0.0
+        self._last_heartbeat = 0.0
+        self._yield_to: Optional[YieldCheck] = None
+        self._last_yield_check = 0.0
+        self._yielded = False
+
+    # ------------------------------------------------------------------ GUI side
+
+    def submit(self, name: str, func: MaintenanceFunc, yield_to: Optional[YieldCheck] = None):
+        """Queue a task; func returns (success, result) like the DatabaseCleaner/Validator methods.
+
+        With yield_to, the running statement is aborted as soon as yield_to()
+        returns True, and task_deferred is emitted before task_finished.
+        """
+        self._tasks.put((name, func, yield_to))
+        if not self.isRunning():
+            self.start()
+
+    def cancel_current(self) -> bool:
+        """Ask the running task to stop; returns False if nothing is running."""
+        with self._current_lock:
+            if self._current is None:
+                return False
+        self._cancel.set()
+        return True
+
+    def cancel_all(self):
+        """Drop queued tasks and cancel the running one."""
+        try:
+            while True:
+                self._tasks.get_nowait()
+        except queue.Empty:
+            pass
+        self.cancel_current()
+
+    def current_task(self) -> Optional[str]:
+        with self._current_lock:
+            return self._current
+
+    def pending_count(self) -> int:
+        return self._tasks.qsize()
+
+    def stop(self):
+        """Cancel everything and let the thread exit."""
+        self.cancel_all()
+        self._tasks.put(_STOP)
+
+    # ------------------------------------------------------------------ worker side
+
+    def run(self):
+        conn = get_connection(self.database_path)
+        # Every statement the tasks run on this thread's connection goes through the handler
+        conn.set_progress_handler(self._on_sqlite_progress, self.PROGRESS_STEPS)
+        try:
+            while True:
+                item = self._tasks.get()
+                if item is _STOP:
+                    break
+                self._run_task(*item)
+        finally:
+            conn.set_progress_handler(None, 0)
+            close_thread_connections()
+
+    def _run_task(self, name: str, func: MaintenanceFunc, yield_to: Optional[YieldCheck] = None):
+        self._cancel.clear()
+        self._yielded = False
+        self._yield_to = yield_to
+        with self._current_lock:
+            self._current = name
+        self._task_started_at = self._last_heartbeat = self._last_yield_check = time.monotonic()
+        self.task_started.emit(name)
+        logging.info(f"🔧 Maintenance task started: {name}")
+
+        try:
+            success, result = func()
+            if self._yielded:
+                success, result = False, f"{name} gave way to pending writes"
+            elif self._cancel.is_set():
+                success, result = False, f"{name} was cancelled"
+        except Exception as e:
+            if self._yielded:
+                success, result = False, f"{name} gave way to pending writes"
+                logging.info(f"Maintenance task {name} gave way to pending writes")
+            elif self._cancel.is_set():
+                # The progress handler aborted the statement ("interrupted")
+                success, result = False, f"{name} was cancelled"
+                logging.info(f"Maintenance task {name} cancelled")
+            else:
+                logging.error(f"Maintenance task {name} failed: {e}")
+                success, result = False, f"Error: {str(e)}"
+        finally:
+            self._yield_to = None
+            with self._current_lock:
+                self._current = None
+
+        if self._yielded:
+            self.task_deferred.emit(name)
+        elapsed = time.monotonic() - self._task_started_at
+        logging.info(f"🔧 Maintenance task finished: {name} ({'ok' if success else 'failed'}, {elapsed:.1f}s)")
+        self.task_finished.emit(name, success, result)
+
+    def _on_sqlite_progress(self) -> int:
+        """SQLite progress handler: non-zero aborts the running statement."""
+        if self._cancel.is_set():
+            return 1
+        now = time.monotonic()
+        if self._yield_to is not None and now - self._last_yield_check >= self.YIELD_CHECK_SECONDS:
+            self._last_yield_check = now
+            if self._yield_to():
+                self._yielded = True
+                return 1
+        if now - self._last_heartbeat >= self.heartbeat_seconds:
+            self._last_heartbeat = now
+            name = self.current_task()
+            if name:
+                self.task_progress.emit(name, f"Still running ({now - self._task_started_at:.0f}s)...")
+        return 0
@@ -17,7 +17,6 @@ Author: StaffClock Progressive System
 Date: December 2024
 """
 
-import sqlite3
 import datetime
 import time
 import threading
@@ -32,6 +31,13 @@ from PyQt6.QtGui import QFont, QMovie, QPalette, QColor
 from PyQt6.QtCore import Qt
 import os
 
+from utils.db_connection import get_connection, close_thread_connections
+from utils.logging_manager import get_subsystem_logger
+from utils.time_utils import period_bounds, from_epoch, break_minutes, worked_hours
+
+# Level set by settings.json "log_levels" ("timesheets"); per-worker lines use deferred formatting
+_log = get_subsystem_logger('timesheets')
+
 class ProgressiveTimesheetGenerator(QThread):
     # Signals for UI updates
     worker_completed = pyqtSignal(str, str, dict)  # worker_name, status, details
@@ -73,12 +79,14 @@ class ProgressiveTimesheetGenerator(QThread):
             
         except Exception as e:
             self.status_update.emit(f"❌ Error in generation: {e}")
-            logging.error(f"Progressive timesheet generation error: {e}")
+            _log.error(f"Progressive timesheet generation error: {e}")
+        finally:
+            close_thread_connections()
     
     def analyze_all_workers(self):
         """Analyze all workers and categorize by completion status."""
         try:
-            conn = sqlite3.connect(self.database_path)
+            conn = get_connection(self.database_path)
             c = conn.cursor()
             
             # Get all staff members
@@ -87,9 +95,10 @@ class ProgressiveTimesheetGenerator(QThread):
             self.generation_stats['total_workers'] = len(all_staff)
             
             self.status_update.emit(f"📊 Analyzing {len(all_staff)} workers...")
-            logging.info(f"🔍 WORKER ANALYSIS STARTED")
-            logging.info(f"   • Date range: {self.start_date.strftime('%Y-%m-%d')} to {self.end_date.strftime('%Y-%m-%d')}")
-            logging.info(f"   • Total staff to analyze: {len(all_staff)}")
+            if _log.isEnabledFor(logging.INFO):
+                _log.info(f"🔍 WORKER ANALYSIS STARTED")
+                _log.info(f"   • Date range: {self.start_date.strftime('%Y-%m-%d')} to {self.end_date.strftime('%Y-%m-%d')}")
+                _log.info(f"   • Total staff to analyze: {len(all_staff)}")
             
             analysis_counters = {
                 'workers_with_records': 0,
@@ -108,7 +117,7 @@ class ProgressiveTimesheetGenerator(QThread):
                     # Log detailed analysis for each worker
                     if 'error' in status:
                         analysis_counters['workers_with_errors'] += 1
-                        logging.error(f"❌ {name} ({code}): Analysis error - {status['error']}")
+                        _log.error("❌ %s (%s): Analysis error - %s", name, code, status['error'])
                         self.worker_completed.emit(name, "❌ Analysis Error", status)
                         continue
                     
@@ -118,14 +127,14 @@ class ProgressiveTimesheetGenerator(QThread):
                     
                     if records_count == 0:
                         analysis_counters['workers_without_records'] += 1
-                        logging.info(f"📭 {name} ({code}): No records in timesheet period")
+                        _log.info("📭 %s (%s): No records in timesheet period", name, code)
                         self.completed_workers.add(code)  # No records = ready for empty timesheet
                         self.worker_completed.emit(name, "📭 No Records", status)
                     elif status['completed']:
                         analysis_counters['workers_with_records'] += 1
                         analysis_counters['completed_workers'] += 1
                         self.completed_workers.add(code)
-                        logging.info(f"✅ {name} ({code}): Ready - {status['completed_records']} complete shifts, {hours:.2f}h total")
+                        _log.info("✅ %s (%s): Ready - %s complete shifts, %.2fh total", name, code, status['completed_records'], hours)
                         self.worker_completed.emit(name, "✅ Ready for generation", status)
                     else:
                         analysis_counters['workers_with_records'] += 1
@@ -133,27 +142,26 @@ class ProgressiveTimesheetGenerator(QThread):
                         self.pending_workers.add(code)
                         active_shifts = status.get('active_incomplete', 0)
                         incomplete_shifts = status.get('incomplete_records', 0)
-                        logging.info(f"⏳ {name} ({code}): Pending - {active_shifts} active shifts, {incomplete_shifts} total incomplete")
+                        _log.info("⏳ %s (%s): Pending - %s active shifts, %s total incomplete", name, code, active_shifts, incomplete_shifts)
                         self.worker_pending.emit(name, f"⏳ {incomplete_shifts} incomplete shifts", status)
                         
                 except Exception as worker_error:
                     analysis_counters['workers_with_errors'] += 1
-                    logging.error(f"❌ {name} ({code}): Worker analysis failed - {worker_error}")
+                    _log.error("❌ %s (%s): Worker analysis failed - %s", name, code, worker_error)
                     error_status = {'name': name, 'role': role, 'staff_code': code, 'error': str(worker_error)}
                     self.worker_status[code] = error_status
                     self.worker_completed.emit(name, "❌ Analysis Failed", error_status)
             
-            conn.close()
-            
             # Log comprehensive analysis summary
-            logging.info(f"📊 WORKER ANALYSIS COMPLETE:")
-            logging.info(f"   • Total workers: {len(all_staff)}")
-            logging.info(f"   • Workers with records: {analysis_counters['workers_with_records']}")
-            logging.info(f"   • Workers without records: {analysis_counters['workers_without_records']}")
-            logging.info(f"   • Ready for generation: {analysis_counters['completed_workers']}")
-            logging.info(f"   • Pending (active shifts): {analysis_counters['pending_workers']}")
-            logging.info(f"   • Analysis errors: {analysis_counters['workers_with_errors']}")
-            logging.info(f"   • Total hours found: {analysis_counters['total_hours_found']:.2f}")
+            if _log.isEnabledFor(logging.INFO):
+                _log.info(f"📊 WORKER ANALYSIS COMPLETE:")
+                _log.info(f"   • Total workers: {len(all_staff)}")
+                _log.info(f"   • Workers with records: {analysis_counters['workers_with_records']}")
+                _log.info(f"   • Workers without records: {analysis_counters['workers_without_records']}")
+                _log.info(f"   • Ready for generation: {analysis_counters['completed_workers']}")
+                _log.info(f"   • Pending (active shifts): {analysis_counters['pending_workers']}")
+                _log.info(f"   • Analysis errors: {analysis_counters['workers_with_errors']}")
+                _log.info(f"   • Total hours found: {analysis_counters['total_hours_found']:.2f}")
             
             self.generation_stats['completed'] = len(self.completed_workers)
             self.generation_stats['pending'] = len(self.pending_workers)
@@ -162,7 +170,7 @@ class ProgressiveTimesheetGenerator(QThread):
             self.status_update.emit(f"📋 Analysis complete: {len(self.completed_workers)} ready, {len(self.pending_workers)} pending")
             
         except Exception as e:
-            logging.error(f"❌ WORKER ANALYSIS FAILED: {e}")
+            _log.error(f"❌ WORKER ANALYSIS FAILED: {e}")
             self.status_update.emit(f"❌ Analysis failed: {e}")
             raise e
     
@@ -170,12 +178,13 @@ class ProgressiveTimesheetGenerator(QThread):
         """Check if a worker has completed all their shifts for the timesheet period."""
         try:
             # Get all clock records for this worker in the period
+            period_start, period_end = period_bounds(self.start_date, self.end_date)
             cursor.execute("""
                 SELECT id, clock_in_time, clock_out_time, break_time, notes
                 FROM clock_records
-                WHERE staff_code = ? AND DATE(clock_in_time) BETWEEN ? AND ?
-                ORDER BY clock_in_time
-            """, (staff_code, self.start_date.strftime('%Y-%m-%d'), self.end_date.strftime('%Y-%m-%d')))
+                WHERE staff_code = ? AND clock_in_epoch >= ? AND clock_in_epoch < ?
+                ORDER BY clock_in_epoch
+            """, (staff_code, period_start, period_end))
             
             records = cursor.fetchall()
             
@@ -209,10 +218,8 @@ class ProgressiveTimesheetGenerator(QThread):
                         'is_current': True  # If clock_out is NULL, this is ALWAYS an active shift regardless of age
                     })
                 elif clock_in and clock_out:
-                    # Complete record
-                    clock_in_dt = datetime.datetime.fromisoformat(clock_in)
-                    clock_out_dt = datetime.datetime.fromisoformat(clock_out)
-                    hours = (clock_out_dt - clock_in_dt).total_seconds() / 3600
+                    # Complete record, breaks deducted
+                    hours = worked_hours(clock_in, clock_out, break_time)
                     total_hours += hours
                     completed_records.append({
                         'record_id': record_id,
@@ -252,11 +259,11 @@ class ProgressiveTimesheetGenerator(QThread):
         """Generate timesheets for all completed workers."""
         if not self.completed_workers:
             self.status_update.emit("ℹ️ No completed workers to process")
-            logging.info("ℹ️ No completed workers found for timesheet generation")
+            _log.info("ℹ️ No completed workers found for timesheet generation")
             return
         
         self.status_update.emit(f"🏗️ Generating timesheets for {len(self.completed_workers)} completed workers...")
-        logging.info(f"🏗️ TIMESHEET GENERATION STARTED for {len(self.completed_workers)} workers")
+        _log.info("🏗️ TIMESHEET GENERATION STARTED for %d workers", len(self.completed_workers))
         
         generation_counters = {
             'successful': 0,
@@ -268,7 +275,7 @@ class ProgressiveTimesheetGenerator(QThread):
         
         for staff_code in self.completed_workers:
             if not self.running:
-                logging.info("🛑 Generation stopped by user")
+                _log.info("🛑 Generation stopped by user")
                 break
                 
             try:
@@ -282,7 +289,7 @@ class ProgressiveTimesheetGenerator(QThread):
                     generation_counters['successful'] += 1
                     hours = status.get('total_hours', 0)
                     records = status.get('completed_records', 0)
-                    logging.info(f"✅ {name} ({staff_code}): Timesheet generated successfully - {records} records, {hours:.2f}h")
+                    _log.info("✅ %s (%s): Timesheet generated successfully - %s records, %.2fh", name, staff_code, records, hours)
                     
                     self.worker_completed.emit(
                         name, 
@@ -301,7 +308,7 @@ class ProgressiveTimesheetGenerator(QThread):
                     else:
                         generation_counters['failed_other'] += 1
                     
-                    logging.error(f"❌ {name} ({staff_code}): Generation failed - {failure_reason}")
+                    _log.error("❌ %s (%s): Generation failed - %s", name, staff_code, failure_reason)
                     self.worker_completed.emit(
                         name, 
                         f"❌ Failed: {failure_reason}", 
@@ -314,19 +321,20 @@ class ProgressiveTimesheetGenerator(QThread):
             except Exception as e:
                 generation_counters['failed_other'] += 1
                 name = self.worker_status.get(staff_code, {}).get('name', 'Unknown')
-                logging.error(f"❌ {name} ({staff_code}): Unexpected generation error - {e}")
+                _log.error("❌ %s (%s): Unexpected generation error - %s", name, staff_code, e)
                 self.status_update.emit(f"❌ Failed to generate for {staff_code}: {e}")
         
         # Log generation summary
         total_processed = sum(generation_counters.values())
-        logging.info(f"🏁 TIMESHEET GENERATION COMPLETE:")
-        logging.info(f"   • Total processed: {total_processed}")
-        logging.info(f"   • Successful: {generation_counters['successful']}")
-        logging.info(f"   • Failed (no records): {generation_counters['failed_no_records']}")
-        logging.info(f"   • Failed (PDF error): {generation_counters['failed_pdf_error']}")
-        logging.info(f"   • Failed (database error): {generation_counters['failed_database_error']}")
-        logging.info(f"   • Failed (other): {generation_counters['failed_other']}")
-        logging.info(f"   • Success rate: {(generation_counters['successful']/total_processed*100):.1f}%" if total_processed > 0 else "   • Success rate: N/A")
+        if _log.isEnabledFor(logging.INFO):
+            _log.info(f"🏁 TIMESHEET GENERATION COMPLETE:")
+            _log.info(f"   • Total processed: {total_processed}")
+            _log.info(f"   • Successful: {generation_counters['successful']}")
+            _log.info(f"   • Failed (no records): {generation_counters['failed_no_records']}")
+            _log.info(f"   • Failed (PDF error): {generation_counters['failed_pdf_error']}")
+            _log.info(f"   • Failed (database error): {generation_counters['failed_database_error']}")
+            _log.info(f"   • Failed (other): {generation_counters['failed_other']}")
+            _log.info(f"   • Success rate: {(generation_counters['successful']/total_processed*100):.1f}%" if total_processed > 0 else "   • Success rate: N/A")
         
         self.status_update.emit(f"✅ Generated {generation_counters['successful']} timesheets for completed workers")
     
@@ -357,20 +365,19 @@ class ProgressiveTimesheetGenerator(QThread):
             
             # Get timesheet records from database
             try:
-                conn = sqlite3.connect(self.database_path)
+                conn = get_connection(self.database_path)
                 c = conn.cursor()
                 
+                period_start, period_end = period_bounds(self.start_date, self.end_date)
                 c.execute("""
-                    SELECT clock_in_time, clock_out_time
+                    SELECT clock_in_time, clock_out_time, break_time
                     FROM clock_records
                     WHERE staff_code = ? AND clock_out_time IS NOT NULL 
-                    AND DATE(clock_in_time) BETWEEN ? AND ?
-                    ORDER BY clock_in_time
-                """, (staff_code, self.start_date.strftime('%Y-%m-%d'), self.end_date.strftime('%Y-%m-%d')))
+                    AND clock_in_epoch >= ? AND clock_in_epoch < ?
+                    ORDER BY clock_in_epoch
+                """, (staff_code, period_start, period_end))
                 
                 records = c.fetchall()
-                conn.close()
-                
                 if not records:
                     return False, f"No complete records found in database for date range {self.start_date.strftime('%Y-%m-%d')} to {self.end_date.strftime('%Y-%m-%d')}"
                 
@@ -419,7 +426,7 @@ class ProgressiveTimesheetGenerator(QThread):
             safe_name = "".join(c for c in employee_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
             output_file = os.path.join(timesheets_dir, f"{safe_name}_timesheet.pdf")
             
-            logging.info(f"📄 Generating PDF timesheet for {employee_name} ({len(records)} records)")
+            _log.info("📄 Generating PDF timesheet for %s (%d records)", employee_name, len(records))
             
             # Create PDF document
             doc = SimpleDocTemplate(output_file, pagesize=A4)
@@ -449,18 +456,18 @@ class ProgressiveTimesheetGenerator(QThread):
             if not records:
                 # Empty timesheet
                 data.append(["No records found", "in period", "", "", "0.00", ""])
-                logging.info(f"📋 Empty timesheet generated for {employee_name}")
+                _log.info("📋 Empty timesheet generated for %s", employee_name)
             else:
                 # Process records
-                for clock_in_str, clock_out_str in records:
+                for clock_in_str, clock_out_str, break_time in records:
                     try:
                         clock_in = dt.fromisoformat(clock_in_str)
                         clock_out = dt.fromisoformat(clock_out_str)
                         
-                        # Calculate hours worked
-                        duration = clock_out - clock_in
-                        hours_worked = duration.total_seconds() / 3600
+                        # Calculate hours worked, less breaks
+                        hours_worked = worked_hours(clock_in, clock_out, break_time)
                         total_hours += hours_worked
+                        break_total = break_minutes(break_time)
                         
                         # Format data
                         date_str = clock_in.strftime('%d/%m/%Y')
@@ -469,10 +476,12 @@ class ProgressiveTimesheetGenerator(QThread):
                         out_str = clock_out.strftime('%H:%M')
                         hours_str = f"{hours_worked:.2f}"
                         
-                        data.append([date_str, day_str, in_str, out_str, hours_str, ""])
+                        notes_str = f"Break {break_total:.0f} min" if break_total else ""
+                        
+                        data.append([date_str, day_str, in_str, out_str, hours_str, notes_str])
                         
                     except Exception as record_error:
-                        logging.error(f"⚠️ Error processing record for {employee_name}: {record_error}")
+                        _log.error("⚠️ Error processing record for %s: %s", employee_name, record_error)
                         data.append(["Error", "processing", "record", "", "0.00", str(record_error)[:20]])
             
             # Add total row
@@ -501,15 +510,14 @@ class ProgressiveTimesheetGenerator(QThread):
             
             # Verify file was created
             if os.path.exists(output_file):
-                file_size = os.path.getsize(output_file)
-                logging.info(f"✅ PDF timesheet saved: {output_file} ({file_size} bytes)")
+                _log.info("✅ PDF timesheet saved: %s (%d bytes)", output_file, os.path.getsize(output_file))
             else:
                 raise Exception("PDF file was not created successfully")
                 
         except ImportError as import_error:
             raise Exception(f"Missing required library for PDF generation: {import_error}")
         except Exception as pdf_error:
-            logging.error(f"❌ PDF generation error for {employee_name}: {pdf_error}")
+            _log.error("❌ PDF generation error for %s: %s", employee_name, pdf_error)
             raise Exception(f"PDF generation failed: {pdf_error}")
     
     def monitor_pending_workers(self):
@@ -519,7 +527,7 @@ class ProgressiveTimesheetGenerator(QThread):
             return
         
         self.status_update.emit(f"👀 Monitoring {len(self.pending_workers)} workers with active shifts...")
-        logging.info(f"👀 MONITORING PHASE STARTED for {len(self.pending_workers)} workers with active shifts")
+        _log.info(f"👀 MONITORING PHASE STARTED for {len(self.pending_workers)} workers with active shifts")
         
         check_interval = 30  # Check every 30 seconds
         while self.running and self.pending_workers:
@@ -532,7 +540,7 @@ class ProgressiveTimesheetGenerator(QThread):
             newly_completed = []
             
             try:
-                conn = sqlite3.connect(self.database_path)
+                conn = get_connection(self.database_path)
                 c = conn.cursor()
                 
                 for staff_code in list(self.pending_workers):
@@ -579,8 +587,6 @@ class ProgressiveTimesheetGenerator(QThread):
                             updated_status
                         )
                 
-                conn.close()
-                
                 if newly_completed:
                     self.status_update.emit(f"🎉 {len(newly_completed)} workers just completed their shifts!")
                 
@@ -595,7 +601,7 @@ class ProgressiveTimesheetGenerator(QThread):
         
         # Start background monitoring for pending workers if any
         if self.pending_workers:
-            logging.info(f"🔄 Starting background monitoring for {len(self.pending_workers)} pending workers")
+            _log.info(f"🔄 Starting background monitoring for {len(self.pending_workers)} pending workers")
             try:
                 from .background_timesheet_monitor import start_background_monitoring
                 
@@ -607,33 +613,34 @@ class ProgressiveTimesheetGenerator(QThread):
                 )
                 
                 if background_monitor:
-                    logging.info(f"✅ Background monitoring started for pending workers")
+                    _log.info(f"✅ Background monitoring started for pending workers")
                     self.status_update.emit(f"🔄 Background monitoring started for {len(self.pending_workers)} workers")
                 else:
-                    logging.error("❌ Failed to start background monitoring")
+                    _log.error("❌ Failed to start background monitoring")
                     
             except Exception as bg_error:
-                logging.error(f"❌ Error starting background monitoring: {bg_error}")
-        
-        # Final comprehensive logging summary
-        logging.info(f"🎊 PROGRESSIVE TIMESHEET GENERATION COMPLETE!")
-        logging.info(f"📊 FINAL SUMMARY:")
-        logging.info(f"   • Total workers processed: {self.generation_stats.get('total_workers', 0)}")
-        logging.info(f"   • Initially completed: {self.generation_stats.get('completed', 0)}")
-        logging.info(f"   • Initially pending: {self.generation_stats.get('pending', 0)}")
-        logging.info(f"   • Total hours processed: {self.generation_stats.get('hours_generated', 0):.2f}")
-        logging.info(f"   • Total duration: {self.generation_stats['total_duration']:.1f} seconds")
-        logging.info(f"   • Average time per worker: {self.generation_stats['total_duration']/max(1, self.generation_stats.get('total_workers', 1)):.2f} seconds")
-        
-        # Check timesheets directory
-        try:
-            if os.path.exists("Timesheets"):
-                pdf_files = [f for f in os.listdir("Timesheets") if f.endswith('.pdf')]
-                logging.info(f"📁 Timesheets folder contains {len(pdf_files)} PDF files")
-            else:
-                logging.warning("📁 Timesheets folder not found")
-        except Exception as dir_error:
-            logging.error(f"📁 Error checking Timesheets directory: {dir_error}")
+                _log.error(f"❌ Error starting background monitoring: {bg_error}")
+        
+        # Final comprehensive logging summary (and the folder listing that only feeds it)
+        if _log.isEnabledFor(logging.INFO):
+            _log.info(f"🎊 PROGRESSIVE TIMESHEET GENERATION COMPLETE!")
+            _log.info(f"📊 FINAL SUMMARY:")
+            _log.info(f"   • Total workers processed: {self.generation_stats.get('total_workers', 0)}")
+            _log.info(f"   • Initially completed: {self.generation_stats.get('completed', 0)}")
+            _log.info(f"   • Initially pending: {self.generation_stats.get('pending', 0)}")
+            _log.info(f"   • Total hours processed: {self.generation_stats.get('hours_generated', 0):.2f}")
+            _log.info(f"   • Total duration: {self.generation_stats['total_duration']:.1f} seconds")
+            _log.info(f"   • Average time per worker: {self.generation_stats['total_duration']/max(1, self.generation_stats.get('total_workers', 1)):.2f} seconds")
+        
+            # Check timesheets directory
+            try:
+                if os.path.exists("Timesheets"):
+                    pdf_files = [f for f in os.listdir("Timesheets") if f.endswith('.pdf')]
+                    _log.info(f"📁 Timesheets folder contains {len(pdf_files)} PDF files")
+                else:
+                    _log.warning("📁 Timesheets folder not found")
+            except Exception as dir_error:
+                _log.error(f"📁 Error checking Timesheets directory: {dir_error}")
         
         self.all_completed.emit(self.generation_stats)
         
@@ -878,19 +885,18 @@ def get_timesheet_date_range(database_path: str) -> tuple[datetime.datetime, dat
     with a fallback to the traditional monthly calculation.
     """
     try:
-        conn = sqlite3.connect(database_path)
+        conn = get_connection(database_path)
         c = conn.cursor()
         
-        c.execute("SELECT MIN(DATE(clock_in_time)), MAX(DATE(clock_in_time)) FROM clock_records")
+        c.execute("SELECT MIN(clock_in_epoch), MAX(clock_in_epoch) FROM clock_records")
         date_range = c.fetchone()
-        conn.close()
         
-        if date_range and date_range[0] and date_range[1]:
-            start_date = datetime.datetime.strptime(date_range[0], '%Y-%m-%d')
-            end_date = datetime.datetime.strptime(date_range[1], '%Y-%m-%d') + datetime.timedelta(days=1)
+        if date_range and date_range[0] is not None and date_range[1] is not None:
+            start_date = datetime.datetime.combine(from_epoch(date_range[0]).date(), datetime.time())
+            end_date = datetime.datetime.combine(from_epoch(date_range[1]).date(), datetime.time()) + datetime.timedelta(days=1)
             return start_date, end_date
     except Exception as e:
-        logging.warning(f"Could not determine date range from database, using fallback. Error: {e}")
+        _log.warning(f"Could not determine date range from database, using fallback. Error: {e}")
 
     # Fallback to traditional calculation
     today = datetime.datetime.now()
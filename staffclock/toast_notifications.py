@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Toast Notifications
+===================
+
+Non-modal confirmation banners for the kiosk. Messages are queued and
+shown one at a time over the bottom of the main window, without taking
+keyboard focus, so the next person can type their code while the last
+confirmation is still on screen.
+
+Features:
+- FIFO queue; display time shrinks when a backlog builds up (shift change)
+- Optional action button (e.g. "Add Note" after clock-out), withdrawn as
+  soon as the next person starts typing
+- Repeated identical messages refresh the current toast instead of queuing
+"""
+
+import logging
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+from PyQt6.QtCore import Qt, QTimer, QEvent, QObject
+from PyQt6.QtWidgets import QFrame, QLabel, QPushButton, QHBoxLayout, QWidget
+
+# How long each level stays up when nothing is waiting behind it (ms)
+DEFAULT_DURATIONS = {
+    'info': 2500,
+    'success': 2500,
+    'warning': 4000,
+    'critical': 5000,
+}
+
+# Display time when other toasts are queued behind this one (ms)
+BACKLOG_DURATION = 1200
+
+MAX_QUEUE = 20
+
+
+class Toast:
+    """One queued notification."""
+
+    __slots__ = ('message', 'level', 'duration_ms', 'action_text', 'on_action')
+
+    def __init__(self, message: str, level: str = 'info', duration_ms: Optional[int] = None,
+                 action_text: Optional[str] = None, on_action: Optional[Callable[[], None]] = None):
+        self.message = message
+        self.level = level if level in DEFAULT_DURATIONS else 'info'
+        self.duration_ms = duration_ms
+        self.action_text = action_text
+        self.on_action = on_action
+
+
+class ToastOverlay(QFrame):
+    """Queue of toasts drawn on top of a parent widget.
+
+    The overlay is a child of the window rather than a dialog, so nothing is
+    modal and focus stays wherever it was (normally the staff code entry).
+    Toasts with an action button get their full duration even under a
+    backlog, so the person who asked for it has time to press it; the kiosk
+    calls withdraw_actions() when the next person starts typing, so nobody
+    can press someone else's button.
+    """
+
+    def __init__(self, parent: QWidget, colors: Dict[str, str],
+                 durations: Optional[Dict[str, int]] = None,
+                 backlog_duration: int = BACKLOG_DURATION, max_queue: int = MAX_QUEUE):
+        super().__init__(parent)
+        self.colors = colors
+        self.durations = dict(DEFAULT_DURATIONS, **(durations or {}))
+        self.backlog_duration = backlog_duration
+        self.max_queue = max_queue
+        self._queue: Deque[Toast] = deque()
+        self._current: Optional[Toast] = None
+
+        self.setObjectName("toast_overlay")
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setAttribute(Qt.WidgetAttribute.WA_ShowWithoutActivating)
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(24, 14, 14, 14)
+        layout.setSpacing(16)
+
+        self._label = QLabel()
+        self._label.setWordWrap(True)
+        self._label.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        layout.addWidget(self._label, 1)
+
+        self._action_button = QPushButton()
+        self._action_button.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self._action_button.clicked.connect(self._on_action_clicked)
+        layout.addWidget(self._action_button)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._show_next)
+
+        parent.installEventFilter(self)
+        self.hide()
+
+    # ------------------------------------------------------------------ queue
+
+    def show_toast(self, message: str, level: str = 'info', duration_ms: Optional[int] = None,
+                   action_text: Optional[str] = None, on_action: Optional[Callable[[], None]] = None):
+        """Queue a notification; returns immediately."""
+        toast = Toast(message, level, duration_ms, action_text, on_action)
+
+        # Same message again (double-tap on a button): just keep the current one up
+        current = self._current
+        if current is not None and current.message == toast.message and current.level == toast.level \
+                and toast.on_action is None:
+            self._timer.start(self._duration_for(current))
+            return
+
+        if len(self._queue) >= self.max_queue:
+            self._drop_oldest()
+        self._queue.append(toast)
+
+        if current is None:
+            self._show_next()
+        elif current.on_action is None:
+            # Something is waiting: shorten what's on screen now
+            remaining = self._timer.remainingTime()
+            if remaining > self.backlog_duration:
+                self._timer.start(self.backlog_duration)
+
+    def _drop_oldest(self):
+        # Prefer to lose an old confirmation over a warning or an action prompt
+        for index, queued in enumerate(self._queue):
+            if queued.level in ('info', 'success') and queued.on_action is None:
+                del self._queue[index]
+                logging.debug(f"Toast queue full, dropped: {queued.message}")
+                return
+        dropped = self._queue.popleft()
+        logging.debug(f"Toast queue full, dropped: {dropped.message}")
+
+    def pending_count(self) -> int:
+        return len(self._queue)
+
+    def withdraw_actions(self):
+        """Remove the action buttons from the current and queued toasts; the messages stay."""
+        for queued in self._queue:
+            queued.on_action = None
+        current = self._current
+        if current is not None and current.on_action is not None:
+            current.on_action = None
+            self._action_button.hide()
+            self._reposition()
+            remaining = self._timer.remainingTime()
+            duration = self._duration_for(current)
+            if remaining > duration:
+                self._timer.start(duration)
+
+    def clear(self):
+        """Drop everything queued and hide the current toast."""
+        self._queue.clear()
+        self._timer.stop()
+        self._current = None
+        self.hide()
+
+    def _duration_for(self, toast: Toast) -> int:
+        duration = toast.duration_ms or self.durations[toast.level]
+        if self._queue and toast.on_action is None:
+            return min(duration, self.backlog_duration)
+        return duration
+
+    def _show_next(self):
+        if not self._queue:
+            self._current = None
+            self.hide()
+            return
+
+        toast = self._queue.popleft()
+        self._current = toast
+        self._label.setText(toast.message)
+        if toast.on_action is not None:
+            self._action_button.setText(toast.action_text or "OK")
+            self._action_button.show()
+        else:
+            self._action_button.hide()
+        self._apply_style(toast.level)
+        self._reposition()
+        self.show()
+        self.raise_()
+        self._timer.start(self._duration_for(toast))
+
+    def _on_action_clicked(self):
+        toast = self._current
+        self._timer.stop()
+        self._show_next()
+        if toast is not None and toast.on_action is not None:
+            try:
+                toast.on_action()
+            except Exception as e:
+                logging.error(f"Toast action failed: {e}")
+
+    # ------------------------------------------------------------------ layout
+
+    def _apply_style(self, level: str):
+        accent = {
+            'info': self.colors['primary'],
+            'success': self.colors['success'],
+            'warning': self.colors['warning'],
+            'critical': self.colors['danger'],
+        }[level]
+        self.setStyleSheet(f"""
+            QFrame#toast_overlay {{
+                background: {self.colors['dark']};
+                border: 3px solid {accent};
+                border-radius: 12px;
+            }}
+            QLabel {{
+                color: {self.colors['light']};
+                background: transparent;
+                border: none;
+                font-family: Arial, sans-serif;
+                font-size: 20px;
+                font-weight: bold;
+            }}
+            QPushButton {{
+                background-color: {accent};
+                color: {self.colors['light']};
+                border: none;
+                border-radius: 8px;
+                padding: 12px 24px;
+                font-family: Arial, sans-serif;
+                font-size: 16px;
+                font-weight: bold;
+            }}
+        """)
+
+    def _reposition(self):
+        parent = self.parentWidget()
+        if parent is None:
+            return
+        width = min(720, max(320, parent.width() - 40))
+        self.setFixedWidth(width)
+        self.adjustSize()
+        self.move((parent.width() - width) // 2, parent.height() - self.height() - 30)
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        if watched is self.parentWidget() and event.type() == QEvent.Type.Resize and self.isVisible():
+            self._reposition()
+        return super().eventFilter(watched, event)
@@ -0,0 +1,296 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .time_utils import to_epoch
+
+# Deliberately not *.db so the catalog never shows up as an archive itself
+CATALOG_FILENAME = "archive_catalog.sqlite"
+
+_ARCHIVE_PREFIXES = (
+    ("database_archive_", "Automatic"),
+    ("manual_archive_", "Manual"),
+    ("period_archive_", "Period"),
+)
+
+
+def is_archive_filename(filename: str) -> bool:
+    return filename.endswith(".db") and "archive" in filename.lower()
+
+
+def parse_archive_filename(filename: str) -> Optional[Tuple[datetime, str]]:
+    """Archive date and type from the file name, or None if the name doesn't follow a known pattern."""
+    for prefix, archive_type in _ARCHIVE_PREFIXES:
+        if filename.startswith(prefix):
+            date_part = filename[len(prefix):].replace(".db", "")
+            try:
+                if archive_type == "Period":
+                    # Named by pay period: <first day>_<last day>
+                    return datetime.strptime(date_part[:10], "%Y-%m-%d"), archive_type
+                return datetime.strptime(date_part, "%Y-%m-%d_%H-%M-%S"), archive_type
+            except ValueError:
+                return None
+    return None
+
+
+def _file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArchiveCatalog:
+    """Persistent index of the archive databases in an archive folder.
+
+    Stores each archive's date range, row counts, size, checksum and schema
+    version so the archive dialog never has to open the archives themselves.
+    The folder is only re-listed when its mtime changes (a file added, removed
+    or renamed); every cataloged archive is still stat'ed on each refresh and
+    re-inspected when its own size or mtime changes, since rewriting a file in
+    place does not touch the folder mtime.
+    """
+
+    def __init__(self, archive_folder: str):
+        self.archive_folder = archive_folder
+        self.catalog_path = os.path.join(archive_folder, CATALOG_FILENAME)
+        self._lock = threading.RLock()
+        os.makedirs(archive_folder, exist_ok=True)
+        self._ensure_schema()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.catalog_path, timeout=10.0)
+        # The catalog can always be rebuilt from the archives, so skip an on-disk journal;
+        # journal files would also keep bumping the folder mtime we watch
+        conn.execute('PRAGMA journal_mode=MEMORY')
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _ensure_schema(self):
+        try:
+            with self._connect() as conn:
+                self._create_tables(conn)
+        except sqlite3.DatabaseError as e:
+            logging.warning(f"Archive catalog unreadable ({e}); rebuilding it")
+            os.remove(self.catalog_path)
+            with self._connect() as conn:
+                self._create_tables(conn)
+
+    @staticmethod
+    def _create_tables(conn: sqlite3.Connection):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS archives (
+                filename TEXT PRIMARY KEY,
+                archive_type TEXT NOT NULL,
+                archive_date TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                checksum TEXT,
+                schema_version INTEGER,
+                tables TEXT,
+                staff_count INTEGER DEFAULT 0,
+                records_count INTEGER DEFAULT 0,
+                visitors_count INTEGER DEFAULT 0,
+                first_clock_in TEXT,
+                last_clock_in TEXT,
+                first_epoch INTEGER,
+                last_epoch INTEGER,
+                cataloged_at TEXT NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS catalog_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+
+    # ------------------------------------------------------------------ updates
+
+    def refresh(self, force: bool = False) -> int:
+        """Bring the catalog up to date with the folder; returns the number of archives re-inspected."""
+        with self._lock:
+            folder_mtime = str(os.stat(self.archive_folder).st_mtime_ns)
+            with self._connect() as conn:
+                row = conn.execute("SELECT value FROM catalog_state WHERE key = 'folder_mtime_ns'").fetchone()
+                relist = force or not row or row['value'] != folder_mtime
+
+                known = {r['filename']: (r['size'], r['mtime_ns'])
+                         for r in conn.execute("SELECT filename, size, mtime_ns FROM archives")}
+                if relist:
+                    candidates = [filename for filename in os.listdir(self.archive_folder)
+                                  if is_archive_filename(filename)]
+                else:
+                    candidates = list(known)
+                present = set()
+                inspected = 0
+                for filename in candidates:
+                    try:
+                        stat = os.stat(os.path.join(self.archive_folder, filename))
+                    except FileNotFoundError:
+                        continue
+                    present.add(filename)
+                    if force or known.get(filename) != (stat.st_size, stat.st_mtime_ns):
+                        self._record(conn, filename)
+                        inspected += 1
+
+                for filename in known.keys() - present:
+                    conn.execute("DELETE FROM archives WHERE filename = ?", (filename,))
+
+                conn.execute("INSERT OR REPLACE INTO catalog_state (key, value) VALUES ('folder_mtime_ns', ?)",
+                             (folder_mtime,))
+
+            if inspected:
+                logging.info(f"Archive catalog refreshed: {inspected} archive(s) inspected")
+            return inspected
+
+    def record(self, archive_path: str) -> bool:
+        """Catalog (or re-catalog) one archive right after it was written."""
+        try:
+            with self._lock, self._connect() as conn:
+                self._record(conn, os.path.basename(archive_path))
+            return True
+        except Exception as e:
+            logging.error(f"Failed to catalog archive {archive_path}: {e}")
+            return False
+
+    def remove(self, archive_path: str):
+        """Drop an archive from the catalog after it was deleted."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM archives WHERE filename = ?", (os.path.basename(archive_path),))
+
+    def _record(self, conn: sqlite3.Connection, filename: str):
+        path = os.path.join(self.archive_folder, filename)
+        stat = os.stat(path)
+        parsed = parse_archive_filename(filename)
+        if parsed:
+            archive_date, archive_type = parsed
+        else:
+            archive_date, archive_type = datetime.fromtimestamp(stat.st_mtime), 'Unknown'
+
+        metadata = self._inspect(path)
+        conn.execute('''
+            INSERT OR REPLACE INTO archives (
+                filename, archive_type, archive_date, size, mtime_ns, checksum, schema_version, tables,
+                staff_count, records_count, visitors_count, first_clock_in, last_clock_in,
+                first_epoch, last_epoch, cataloged_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            filename, archive_type, archive_date.isoformat(), stat.st_size, stat.st_mtime_ns,
+            _file_checksum(path), metadata['schema_version'], json.dumps(metadata['tables']),
+            metadata['staff_count'], metadata['records_count'], metadata['visitors_count'],
+            metadata['first_clock_in'], metadata['last_clock_in'],
+            to_epoch(metadata['first_clock_in']), to_epoch(metadata['last_clock_in']),
+            datetime.now().isoformat(),
+        ))
+
+    @staticmethod
+    def _inspect(path: str) -> Dict[str, Any]:
+        metadata = {
+            'schema_version': 0, 'tables': [], 'staff_count': 0, 'records_count': 0,
+            'visitors_count': 0, 'first_clock_in': None, 'last_clock_in': None,
+        }
+        try:
+            conn = sqlite3.connect(path)
+        except sqlite3.Error as e:
+            logging.warning(f"Could not open archive {path} for cataloging: {e}")
+            return metadata
+        try:
+            tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+            metadata['tables'] = tables
+            if 'schema_version' in tables:
+                metadata['schema_version'] = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] or 0
+            if 'staff' in tables:
+                metadata['staff_count'] = conn.execute("SELECT COUNT(*) FROM staff").fetchone()[0]
+            if 'clock_records' in tables:
+                count, first, last = conn.execute(
+                    "SELECT COUNT(*), MIN(clock_in_time), MAX(clock_in_time) FROM clock_records"
+                ).fetchone()
+                metadata.update(records_count=count, first_clock_in=first, last_clock_in=last)
+            if 'visitors' in tables:
+                metadata['visitors_count'] = conn.execute("SELECT COUNT(*) FROM visitors").fetchone()[0]
+        except sqlite3.Error as e:
+            logging.warning(f"Could not read archive {path} for cataloging: {e}")
+        finally:
+            conn.close()
+        return metadata
+
+    # ------------------------------------------------------------------ queries
+
+    def list_archives(self) -> List[Dict[str, Any]]:
+        """All cataloged archives, newest first, in the shape get_archive_list has always returned."""
+        self.refresh()
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM archives ORDER BY archive_date DESC").fetchall()
+        return [self._as_entry(row) for row in rows]
+
+    def get_info(self, archive_path: str) -> Dict[str, Any]:
+        """Catalog entry for one archive, or {} if it isn't cataloged."""
+        self.refresh()
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM archives WHERE filename = ?",
+                               (os.path.basename(archive_path),)).fetchone()
+        return self._as_entry(row) if row else {}
+
+    def archives_overlapping(self, start_epoch: Optional[int], end_epoch: Optional[int]) -> List[Dict[str, Any]]:
+        """Archives whose clock-in range intersects [start_epoch, end_epoch); empty archives are skipped."""
+        self.refresh()
+        query = "SELECT * FROM archives WHERE records_count > 0"
+        params: List[Any] = []
+        if start_epoch is not None:
+            query += " AND last_epoch >= ?"
+            params.append(start_epoch)
+        if end_epoch is not None:
+            query += " AND first_epoch < ?"
+            params.append(end_epoch)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY first_epoch", params).fetchall()
+        return [self._as_entry(row) for row in rows]
+
+    def _as_entry(self, row: sqlite3.Row) -> Dict[str, Any]:
+        tables = json.loads(row['tables'] or '[]')
+        return {
+            'filename': row['filename'],
+            'path': os.path.join(self.archive_folder, row['filename']),
+            'date': datetime.fromisoformat(row['archive_date']),
+            'size': row['size'],
+            'type': row['archive_type'],
+            'checksum': row['checksum'],
+            'schema_version': row['schema_version'],
+            'tables': tables,
+            'staff_count': row['staff_count'],
+            'records_count': row['records_count'],
+            'visitors_count': row['visitors_count'],
+            'visitors_table_exists': 'visitors' in tables,
+            'first_clock_in': row['first_clock_in'],
+            'last_clock_in': row['last_clock_in'],
+            'first_epoch': row['first_epoch'],
+            'last_epoch': row['last_epoch'],
+        }
+
+
+_catalogs: Dict[str, ArchiveCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_archive_catalog(archive_folder: str) -> ArchiveCatalog:
+    """Get the process-wide catalog for an archive folder."""
+    key = os.path.abspath(archive_folder)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = ArchiveCatalog(archive_folder)
+            _catalogs[key] = catalog
+        return catalog
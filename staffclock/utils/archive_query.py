@@ -0,0 +1,187 @@
+import heapq
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .archive_catalog import get_archive_catalog
+from .db_connection import release_connection_manager
+from .time_utils import DateLike, day_bounds, from_epoch, worked_hours
+
+# SQLITE_MAX_ATTACHED defaults to 10; used when the runtime can't tell us
+DEFAULT_ATTACH_LIMIT = 10
+
+_RESULT_COLUMNS = ('staff_code', 'name', 'clock_in_time', 'clock_out_time', 'notes', 'break_time', 'source')
+# Positions in a group's rows, which carry an extra open flag after the result columns
+_STAFF_CODE, _CLOCK_IN, _OPEN = 0, 2, len(_RESULT_COLUMNS)
+
+
+def _attach_limit(conn: sqlite3.Connection) -> int:
+    getlimit = getattr(conn, 'getlimit', None)  # Python 3.11+
+    if getlimit is not None:
+        return getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    return DEFAULT_ATTACH_LIMIT
+
+
+class ArchiveQuery:
+    """Queries clock records across the live database and every archive in one stream.
+
+    Archives whose cataloged date range can't match are skipped. The rest are
+    ATTACHed in groups no larger than SQLite's attach limit; each group runs one
+    UNION ALL query with the date and staff filters pushed down to every
+    archive and is read into a sorted list before its connection is closed, so
+    only one group's archives are open at a time. The lists are then merged
+    lazily. Records copied
+    into more than one archive (manual archives are full copies) are returned
+    once, keyed on (staff_code, clock_in_time), preferring a closed copy.
+    """
+
+    def __init__(self, database_path: str, archive_folder: str):
+        self.database_path = database_path
+        self.archive_folder = archive_folder
+
+    def clock_records(self, start_date: Optional[DateLike] = None, end_date: Optional[DateLike] = None,
+                      staff_codes: Optional[Sequence[str]] = None,
+                      include_live: bool = True) -> Iterator[Dict[str, Any]]:
+        """Yield clock records (oldest first) with clock-in between start_date and end_date inclusive."""
+        start_epoch = day_bounds(start_date)[0] if start_date is not None else None
+        end_epoch = day_bounds(end_date)[1] if end_date is not None else None
+
+        sources = [(entry['path'], entry['filename'])
+                   for entry in get_archive_catalog(self.archive_folder).archives_overlapping(start_epoch, end_epoch)]
+        if include_live:
+            sources.append((self.database_path, 'live'))
+        if not sources:
+            return
+
+        probe = sqlite3.connect(':memory:')
+        group_size = _attach_limit(probe)
+        probe.close()
+
+        groups = [
+            self._query_group(sources[i:i + group_size], start_epoch, end_epoch, staff_codes)
+            for i in range(0, len(sources), group_size)
+        ]
+        logging.info(f"Archive query across {len(sources)} database(s) in {len(groups)} group(s)")
+
+        # Period archives don't carry the staff table, so fall back to current names
+        live_names = self._live_staff_names()
+
+        merged = heapq.merge(*groups, key=lambda values: (values[_CLOCK_IN] or '', values[_STAFF_CODE], values[_OPEN]))
+        previous_key = None
+        try:
+            for values in merged:
+                key = (values[_STAFF_CODE], values[_CLOCK_IN])
+                if key == previous_key:
+                    continue
+                previous_key = key
+                row = dict(zip(_RESULT_COLUMNS, values))
+                if row['name'] is None:
+                    row['name'] = live_names.get(row['staff_code'])
+                yield row
+        finally:
+            # Archives written through the connection manager (period archives) would
+            # otherwise keep a cached manager, and possibly a connection, each
+            for path, label in sources:
+                if label != 'live':
+                    release_connection_manager(path)
+
+    def _live_staff_names(self) -> Dict[str, str]:
+        try:
+            conn = sqlite3.connect(self.database_path)
+            try:
+                return dict(conn.execute("SELECT code, name FROM staff").fetchall())
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logging.warning(f"Could not read staff names for archive query: {e}")
+            return {}
+
+    def hours_by_staff(self, start_date: Optional[DateLike] = None, end_date: Optional[DateLike] = None,
+                       staff_codes: Optional[Sequence[str]] = None) -> Dict[str, float]:
+        """Total completed hours per staff code over the period, across all archives, less breaks."""
+        totals: Dict[str, float] = {}
+        for row in self.clock_records(start_date, end_date, staff_codes):
+            if row['clock_in_time'] and row['clock_out_time']:
+                try:
+                    # Same rule as the live timesheets
+                    worked = worked_hours(row['clock_in_time'], row['clock_out_time'], row['break_time'])
+                except ValueError:
+                    continue
+                totals[row['staff_code']] = totals.get(row['staff_code'], 0.0) + worked
+        return totals
+
+    def _query_group(self, sources: List[Tuple[str, str]], start_epoch: Optional[int],
+                     end_epoch: Optional[int], staff_codes: Optional[Sequence[str]]) -> List[Tuple[Any, ...]]:
+        """One group's matching rows, sorted, as _RESULT_COLUMNS plus an open flag."""
+        conn = sqlite3.connect('file::memory:', uri=True)
+        try:
+            selects: List[str] = []
+            params: List[Any] = []
+            for index, (path, label) in enumerate(sources):
+                alias = f"src{index}"
+                if label == 'live':
+                    conn.execute(f"ATTACH DATABASE ? AS {alias}", (path,))
+                else:
+                    # as_uri() percent-encodes the path (Windows drives, '#', '?', '%')
+                    conn.execute(f"ATTACH DATABASE ? AS {alias}", (Path(path).resolve().as_uri() + "?mode=ro",))
+                select, select_params = self._source_select(conn, alias, label, start_epoch, end_epoch, staff_codes)
+                if select:
+                    selects.append(select)
+                    params.extend(select_params)
+
+            if not selects:
+                return []
+            sql = " UNION ALL ".join(selects) + " ORDER BY clock_in_time, staff_code, _open"
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _source_select(conn: sqlite3.Connection, alias: str, label: str, start_epoch: Optional[int],
+                       end_epoch: Optional[int], staff_codes: Optional[Sequence[str]]) -> Tuple[Optional[str], List[Any]]:
+        tables = {row[0] for row in conn.execute(f"SELECT name FROM {alias}.sqlite_master WHERE type='table'")}
+        if 'clock_records' not in tables:
+            return None, []
+        columns = {row[1] for row in conn.execute(f"PRAGMA {alias}.table_info(clock_records)")}
+
+        conditions: List[str] = []
+        params: List[Any] = [label]
+        if 'clock_in_epoch' in columns:
+            # Indexed integer range on archives that have the epoch columns
+            if start_epoch is not None:
+                conditions.append("cr.clock_in_epoch >= ?")
+                params.append(start_epoch)
+            if end_epoch is not None:
+                conditions.append("cr.clock_in_epoch < ?")
+                params.append(end_epoch)
+        else:
+            # Older archives: the ISO text sorts the same way
+            if start_epoch is not None:
+                conditions.append("cr.clock_in_time >= ?")
+                params.append(from_epoch(start_epoch).isoformat())
+            if end_epoch is not None:
+                conditions.append("cr.clock_in_time < ?")
+                params.append(from_epoch(end_epoch).isoformat())
+        if staff_codes:
+            conditions.append(f"cr.staff_code IN ({', '.join('?' for _ in staff_codes)})")
+            params.extend(str(code) for code in staff_codes)
+
+        name_column = "s.name" if 'staff' in tables else "NULL"
+        join = f"LEFT JOIN {alias}.staff s ON s.code = cr.staff_code" if 'staff' in tables else ""
+        notes_column = "cr.notes" if 'notes' in columns else "NULL"
+        break_column = "cr.break_time" if 'break_time' in columns else "NULL"
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        select = f"""
+            SELECT cr.staff_code, {name_column} AS name, cr.clock_in_time, cr.clock_out_time,
+                   {notes_column} AS notes, {break_column} AS break_time, ? AS source,
+                   cr.clock_out_time IS NULL AS _open
+            FROM {alias}.clock_records cr {join}
+            {where}
+        """
+        return select, params
+
+
+def query_archived_clock_records(database_path: str, archive_folder: str, **filters) -> Iterator[Dict[str, Any]]:
+    """Shortcut for ArchiveQuery(database_path, archive_folder).clock_records(**filters)."""
+    return ArchiveQuery(database_path, archive_folder).clock_records(**filters)
@@ -0,0 +1,116 @@
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .db_connection import get_connection
+
+
+class OpenBreak:
+    """A break that has been started but not ended."""
+
+    __slots__ = ('staff_code', 'break_id', 'clock_record_id', 'break_start')
+
+    def __init__(self, staff_code: str, break_id: Optional[int], clock_record_id: Optional[int], break_start: str):
+        self.staff_code = staff_code
+        self.break_id = break_id
+        self.clock_record_id = clock_record_id
+        self.break_start = break_start
+
+    def minutes_until(self, when: datetime) -> float:
+        """Break length in minutes if it ended at `when`."""
+        try:
+            started = datetime.fromisoformat(self.break_start)
+        except (TypeError, ValueError):
+            return 0.0
+        return max(0.0, (when - started).total_seconds() / 60)
+
+
+class BreakRegistry:
+    """In-memory index of breaks in progress, keyed by staff code.
+
+    Loaded from shift_breaks (break_end IS NULL) so breaks survive a restart,
+    then kept current by ClockService as breaks start and end. Each staff
+    member has their own slot, so any number of people can be on break at once.
+    """
+
+    def __init__(self, database_path: str):
+        self.database_path = database_path
+        self._breaks: Dict[str, OpenBreak] = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    def load(self) -> int:
+        """(Re)load all open breaks from the database."""
+        rows = get_connection(self.database_path).execute('''
+            SELECT staff_code, id, clock_record_id, break_start
+            FROM shift_breaks WHERE break_end IS NULL
+            ORDER BY break_start
+        ''').fetchall()
+        with self._lock:
+            # Latest wins if a person somehow has more than one open break
+            self._breaks = {code: OpenBreak(code, break_id, record_id, start)
+                            for code, break_id, record_id, start in rows}
+            self._loaded = True
+        logging.info(f"Break registry loaded: {len(self._breaks)} staff on break")
+        return len(self._breaks)
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def is_on_break(self, staff_code: str) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            return staff_code in self._breaks
+
+    def get(self, staff_code: str) -> Optional[OpenBreak]:
+        with self._lock:
+            self._ensure_loaded()
+            return self._breaks.get(staff_code)
+
+    def on_break(self) -> List[OpenBreak]:
+        with self._lock:
+            self._ensure_loaded()
+            return sorted(self._breaks.values(), key=lambda b: b.break_start)
+
+    def start(self, open_break: OpenBreak):
+        with self._lock:
+            self._ensure_loaded()
+            self._breaks[open_break.staff_code] = open_break
+
+    def end(self, staff_code: str):
+        with self._lock:
+            self._breaks.pop(staff_code, None)
+
+    def discard_staff(self, staff_code: str):
+        self.end(staff_code)
+
+    def refresh_staff(self, staff_code: str):
+        """Re-read one staff member's open break, e.g. after a break write failed."""
+        row = get_connection(self.database_path).execute('''
+            SELECT id, clock_record_id, break_start FROM shift_breaks
+            WHERE staff_code = ? AND break_end IS NULL
+            ORDER BY break_start DESC LIMIT 1
+        ''', (staff_code,)).fetchone()
+        with self._lock:
+            if row:
+                self._breaks[staff_code] = OpenBreak(staff_code, *row)
+            else:
+                self._breaks.pop(staff_code, None)
+
+
+_registries: Dict[str, BreakRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_break_registry(database_path: str) -> BreakRegistry:
+    """Get the process-wide break registry for a database."""
+    key = os.path.abspath(database_path)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = BreakRegistry(database_path)
+            _registries[key] = registry
+        return registry
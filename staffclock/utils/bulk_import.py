@@ -0,0 +1,290 @@
+import csv
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .db_connection import transaction
+from .staff_codes import STAFF_CODE_MIN, STAFF_CODE_MAX, get_staff_code_allocator
+
+# Timestamp layouts accepted from legacy exports besides ISO 8601
+_LEGACY_TIME_FORMATS = (
+    "%Y-%m-%d %H:%M",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%d-%m-%Y %H:%M:%S",
+    "%d-%m-%Y %H:%M",
+)
+
+# Alternative column names seen in exports, mapped to ours
+_COLUMN_ALIASES = {
+    'staff code': 'code', 'staff_code': 'code', 'pin': 'code',
+    'full name': 'name', 'staff name': 'name', 'staff_name': 'name',
+    'job title': 'role', 'position': 'role',
+    'clock in': 'clock_in_time', 'clock_in': 'clock_in_time',
+    'clock out': 'clock_out_time', 'clock_out': 'clock_out_time',
+    'break': 'break_time', 'break minutes': 'break_time',
+}
+
+
+class ImportReport:
+    """Outcome of an import: what went in, and every row that was rejected and why."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.imported: List[Tuple] = []
+        self.errors: List[Tuple[int, str]] = []  # (source row number, reason)
+        self.duplicates = 0
+
+    @property
+    def imported_count(self) -> int:
+        return len(self.imported)
+
+    def summary(self, limit: int = 10) -> str:
+        lines = [f"Imported {self.imported_count} {self.kind}"]
+        if self.duplicates:
+            lines.append(f"Skipped {self.duplicates} row(s) already in the database")
+        if self.errors:
+            lines.append(f"Rejected {len(self.errors)} row(s):")
+            lines.extend(f"  row {row}: {reason}" for row, reason in sorted(self.errors)[:limit])
+            if len(self.errors) > limit:
+                lines.append(f"  ... and {len(self.errors) - limit} more")
+        return "\n".join(lines)
+
+
+def iter_import_rows(file_path: str,
+                     errors: Optional[List[Tuple[int, str]]] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Stream (row number, row) pairs from a CSV, JSON array or JSON Lines file, with normalised keys.
+
+    With errors, a JSON Lines line that doesn't parse or a row that isn't an
+    object is recorded there as (row number, reason) and skipped; without it,
+    the ValueError is raised.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.csv':
+        with open(file_path, newline='', encoding='utf-8-sig') as handle:
+            # Row 1 is the header
+            for number, row in enumerate(csv.DictReader(handle), start=2):
+                yield number, _normalise(row)
+    elif extension in ('.jsonl', '.ndjson'):
+        with open(file_path, encoding='utf-8') as handle:
+            for number, line in enumerate(handle, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = _normalise(json.loads(line))
+                except ValueError as e:  # json.JSONDecodeError is one
+                    if errors is None:
+                        raise
+                    reason = f"invalid JSON ({e})" if isinstance(e, json.JSONDecodeError) else str(e)
+                    errors.append((number, reason))
+                    continue
+                yield number, row
+    elif extension == '.json':
+        with open(file_path, encoding='utf-8') as handle:
+            data = json.load(handle)
+        if isinstance(data, dict):
+            # Accept {"staff": [...]} / {"clock_records": [...]} wrappers
+            data = next((value for value in data.values() if isinstance(value, list)), [])
+        for number, row in enumerate(data, start=1):
+            try:
+                row = _normalise(row)
+            except ValueError as e:
+                if errors is None:
+                    raise
+                errors.append((number, str(e)))
+                continue
+            yield number, row
+    else:
+        raise ValueError(f"Unsupported import file type: {extension or file_path}")
+
+
+def _normalise(row: Any) -> Dict[str, Any]:
+    if not isinstance(row, dict):
+        raise ValueError(f"Expected an object per row, got {type(row).__name__}")
+    normalised = {}
+    for key, value in row.items():
+        key = str(key or '').strip().lower()
+        normalised[_COLUMN_ALIASES.get(key, key)] = value.strip() if isinstance(value, str) else value
+    return normalised
+
+
+def _chunks(rows: Iterable[Tuple[int, Dict[str, Any]]], size: int) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+    chunk: List[Tuple[int, Dict[str, Any]]] = []
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _parse_time(value: Any) -> Optional[str]:
+    """Legacy timestamp to the naive ISO text clock_records stores; None if empty."""
+    if value is None or value == '':
+        return None
+    text = str(value).strip()
+    try:
+        return datetime.fromisoformat(text).replace(tzinfo=None).isoformat()
+    except ValueError:
+        pass
+    for layout in _LEGACY_TIME_FORMATS:
+        try:
+            return datetime.strptime(text, layout).isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised timestamp '{text}'")
+
+
+def import_staff(database_path: str, file_path: str, chunk_size: int = 500) -> Tuple[bool, str, ImportReport]:
+    """Import staff members from a file in one transaction.
+
+    Rows need a name; role is optional. A row may carry its existing code (kept
+    if it is a free 4-digit code), otherwise one is allocated. Rows are read,
+    validated and inserted with executemany chunk by chunk; rows without a code
+    get theirs in one bulk allocation at the end. Any database error rolls the
+    whole import back.
+    """
+    report = ImportReport("staff member(s)")
+    allocator = get_staff_code_allocator(database_path)
+    reserved: List[str] = []
+    try:
+        with transaction(database_path) as conn:
+            seen_codes = set()
+            needs_code: List[Tuple[str, Optional[str]]] = []
+            for chunk in _chunks(iter_import_rows(file_path, report.errors), chunk_size):
+                valid: List[Tuple[int, Optional[str], str, Optional[str]]] = []
+                for number, row in chunk:
+                    name = str(row.get('name') or '').strip()
+                    role = str(row.get('role') or '').strip() or None
+                    code = str(row.get('code') or '').strip() or None
+                    if not name:
+                        report.errors.append((number, "missing name"))
+                        continue
+                    if code is not None:
+                        if not code.isdigit() or not STAFF_CODE_MIN <= int(code) <= STAFF_CODE_MAX:
+                            report.errors.append((number, f"invalid code '{code}'"))
+                            continue
+                        if code in seen_codes:
+                            report.errors.append((number, f"code {code} appears twice in the file"))
+                            continue
+                        seen_codes.add(code)
+                    valid.append((number, code, name, role))
+
+                explicit = [code for _, code, _, _ in valid if code is not None]
+                taken = set()
+                if explicit:
+                    placeholders = ', '.join('?' for _ in explicit)
+                    taken = {row[0] for row in conn.execute(
+                        f"SELECT code FROM staff WHERE code IN ({placeholders})", explicit)}
+
+                rows: List[Tuple[str, str, Optional[str]]] = []
+                for number, code, name, role in valid:
+                    if code in taken:
+                        report.errors.append((number, f"code {code} is already in use"))
+                    elif code is None:
+                        needs_code.append((name, role))
+                    else:
+                        rows.append((code, name, role))
+
+                conn.executemany('INSERT INTO staff (code, name, role) VALUES (?, ?, ?)', rows)
+                report.imported.extend(rows)
+
+            # Codes are allocated once every explicit code is in, so none can be handed out twice;
+            # the allocator reads the pool on this thread's connection and sees the uncommitted rows
+            if needs_code:
+                allocator.invalidate()
+                codes = allocator.reserve(len(needs_code))
+                reserved.extend(codes)
+                for start in range(0, len(needs_code), chunk_size):
+                    rows = [(code, name, role) for code, (name, role)
+                            in zip(codes[start:start + chunk_size], needs_code[start:start + chunk_size])]
+                    conn.executemany('INSERT INTO staff (code, name, role) VALUES (?, ?, ?)', rows)
+                    report.imported.extend(rows)
+
+        # Explicit codes bypassed the allocator, so let it re-read what is in use
+        allocator.invalidate()
+        logging.info(f"Staff import from {file_path}: {report.imported_count} added, {len(report.errors)} rejected")
+        return True, report.summary(), report
+
+    except LookupError as e:
+        allocator.release(reserved)
+        logging.error(f"Staff import from {file_path} ran out of codes: {e}")
+        return False, f"Import cancelled: {str(e)}", report
+    except Exception as e:
+        allocator.invalidate()
+        logging.error(f"Staff import from {file_path} failed: {e}")
+        report.imported.clear()
+        return False, f"Error importing staff: {str(e)}", report
+
+
+def import_clock_records(database_path: str, file_path: str, chunk_size: int = 1000) -> Tuple[bool, str, ImportReport]:
+    """Import historical clock records from a legacy system in one transaction.
+
+    Rows need staff_code (of an existing staff member) and clock_in_time;
+    clock_out_time, notes and break_time (minutes) are optional. Records already
+    present for the same staff member and clock-in time are skipped, so an
+    import can be re-run. report.imported holds the inserted rows with their ids
+    for journaling.
+    """
+    report = ImportReport("clock record(s)")
+    try:
+        with transaction(database_path) as conn:
+            staff_codes = {row[0] for row in conn.execute("SELECT code FROM staff")}
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM clock_records").fetchone()[0]
+
+            for chunk in _chunks(iter_import_rows(file_path, report.errors), chunk_size):
+                rows: List[Tuple[str, str, Optional[str], Optional[str], Optional[str]]] = []
+                for number, row in chunk:
+                    code = str(row.get('code') or '').strip()
+                    if code not in staff_codes:
+                        report.errors.append((number, f"unknown staff code '{code}'"))
+                        continue
+                    try:
+                        clock_in = _parse_time(row.get('clock_in_time'))
+                        clock_out = _parse_time(row.get('clock_out_time'))
+                    except ValueError as e:
+                        report.errors.append((number, str(e)))
+                        continue
+                    if clock_in is None:
+                        report.errors.append((number, "missing clock-in time"))
+                        continue
+                    if clock_out is not None and clock_out < clock_in:
+                        report.errors.append((number, "clock-out is before clock-in"))
+                        continue
+                    break_time = row.get('break_time')
+                    if break_time not in (None, ''):
+                        try:
+                            break_time = str(float(break_time))
+                        except (TypeError, ValueError):
+                            report.errors.append((number, f"invalid break minutes '{break_time}'"))
+                            continue
+                    else:
+                        break_time = None
+                    notes = str(row['notes']) if row.get('notes') not in (None, '') else None
+                    rows.append((code, clock_in, clock_out, notes, break_time))
+
+                cursor = conn.executemany('''
+                    INSERT INTO clock_records (staff_code, clock_in_time, clock_out_time, notes, break_time)
+                    SELECT ?1, ?2, ?3, ?4, ?5
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM clock_records WHERE staff_code = ?1 AND clock_in_time = ?2
+                    )
+                ''', rows)
+                report.duplicates += len(rows) - max(cursor.rowcount, 0)
+
+            report.imported = conn.execute('''
+                SELECT id, staff_code, clock_in_time, clock_out_time, notes, break_time
+                FROM clock_records WHERE id > ? ORDER BY id
+            ''', (last_id,)).fetchall()
+
+        logging.info(f"Clock record import from {file_path}: {report.imported_count} added, "
+                     f"{report.duplicates} duplicate(s), {len(report.errors)} rejected")
+        return True, report.summary(), report
+
+    except Exception as e:
+        logging.error(f"Clock record import from {file_path} failed: {e}")
+        report.imported = []
+        return False, f"Error importing clock records: {str(e)}", report
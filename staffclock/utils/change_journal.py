@@ -0,0 +1,404 @@
+import json
+import logging
+import os
+import sqlite3
+import struct
+import threading
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .db_connection import get_connection, release_connection_manager
+from .schema_migrations import run_migrations
+
+# File layout: an 8 byte magic header, then records of
+#   4 byte big-endian payload length | 4 byte big-endian CRC32 | JSON payload
+# A record is only trusted if its length and checksum both hold, so a torn
+# write at the end of the file (power loss mid-append) is detected and dropped.
+JOURNAL_MAGIC = b'SCJRNL01'
+_RECORD_HEADER = struct.Struct('>II')
+# Set on the delete-all that opens a snapshot; json.dumps with compact separators writes it exactly so
+_SNAPSHOT_MARKER = b'"snapshot":true'
+
+# Columns the journal captures and replay restores, per table
+JOURNALED_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    'clock_records': ('id', 'staff_code', 'clock_in_time', 'clock_out_time', 'notes', 'break_time'),
+    'staff': ('code', 'name', 'role', 'notes'),
+}
+
+
+class ChangeJournal:
+    """Append-only, checksummed log of changes to clock_records and staff.
+
+    Keeps a single file handle open and buffers records in memory; the buffer
+    is written and fsynced every flush_interval seconds or as soon as it grows
+    past flush_bytes, so a burst of clock actions costs one fsync rather than
+    one backup-database commit each.
+
+    Every snapshot starts a new file: the current one is rotated to
+    <journal>.1 (older ones to .2, .3, ...; at most keep_rotated are kept), so
+    each file begins with the full state it can be replayed from. The file is
+    opened and checked on the flusher thread, and with database_path a journal
+    that doesn't begin with a snapshot gets one there; records appended in the
+    meantime are buffered.
+    """
+
+    def __init__(self, journal_path: str, flush_interval: float = 1.0, flush_bytes: int = 64 * 1024,
+                 database_path: Optional[str] = None, keep_rotated: int = 3):
+        self.journal_path = journal_path
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.keep_rotated = keep_rotated
+        self._buffer = bytearray()
+        self._pending = 0
+        self._file = None
+        # Reentrant: snapshot() appends while holding it
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._closed = threading.Event()
+
+        os.makedirs(os.path.dirname(journal_path) or '.', exist_ok=True)
+        self._flusher = threading.Thread(target=self._run, args=(database_path,),
+                                         name="ChangeJournalFlusher", daemon=True)
+        self._flusher.start()
+
+    def _run(self, database_path: Optional[str]):
+        try:
+            with self._lock:
+                self._file = self._open()
+        except Exception as e:
+            logging.error(f"❌ Could not open change journal {self.journal_path}: {e}")
+            return
+        finally:
+            self._ready.set()
+
+        if database_path and not has_snapshot(self.journal_path):
+            try:
+                self.snapshot(database_path)
+            except Exception as e:
+                logging.error(f"Failed to write the change journal baseline from {database_path}: {e}")
+
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+    def _open(self):
+        """Open for appending, writing the header or cutting off a torn tail first."""
+        if not os.path.exists(self.journal_path) or os.path.getsize(self.journal_path) == 0:
+            return self._create()
+
+        try:
+            valid_end, count, torn = scan_journal(self.journal_path)
+        except ValueError as e:
+            # Not a journal we can read: keep it for inspection and start a fresh one
+            damaged_path = f"{self.journal_path}.bad-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+            os.replace(self.journal_path, damaged_path)
+            logging.error(f"❌ {e}; moved it to {damaged_path} and started a new change journal")
+            return self._open()
+        if torn:
+            logging.warning(f"Change journal {self.journal_path} had a damaged tail; "
+                            f"truncating to {count} valid record(s)")
+            with open(self.journal_path, 'r+b') as handle:
+                handle.truncate(valid_end)
+        return open(self.journal_path, 'ab')
+
+    def _create(self):
+        handle = open(self.journal_path, 'wb')
+        handle.write(JOURNAL_MAGIC)
+        handle.flush()
+        os.fsync(handle.fileno())
+        return handle
+
+    def _rotate(self):
+        """Close the current file, shift it and its predecessors along, and start a new one."""
+        if not self._buffer and os.path.getsize(self.journal_path) <= len(JOURNAL_MAGIC):
+            # Nothing recorded yet, so nothing worth keeping
+            return
+        self._write_buffer()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.keep_rotated > 0:
+            oldest = f"{self.journal_path}.{self.keep_rotated}"
+            if os.path.exists(oldest):
+                os.remove(oldest)
+            for index in range(self.keep_rotated - 1, 0, -1):
+                rotated = f"{self.journal_path}.{index}"
+                if os.path.exists(rotated):
+                    os.replace(rotated, f"{self.journal_path}.{index + 1}")
+            os.replace(self.journal_path, f"{self.journal_path}.1")
+        else:
+            os.remove(self.journal_path)
+        self._file = self._create()
+
+    # ------------------------------------------------------------------ writing
+
+    def append(self, table: str, op: str, row: Optional[Dict[str, Any]] = None,
+               match: Optional[Dict[str, Any]] = None, snapshot: bool = False):
+        """Buffer one change record; op is 'upsert' (with row) or 'delete' (with match)."""
+        if table not in JOURNALED_COLUMNS:
+            raise ValueError(f"Table {table} is not journaled")
+        record = {'ts': datetime.now().isoformat(), 'table': table, 'op': op}
+        if snapshot:
+            record['snapshot'] = True
+        if row is not None:
+            record['row'] = {column: row.get(column) for column in JOURNALED_COLUMNS[table]}
+        if match is not None:
+            unknown = set(match) - set(JOURNALED_COLUMNS[table])
+            if unknown:
+                raise ValueError(f"Unknown column(s) for {table}: {sorted(unknown)}")
+            record['match'] = match
+        payload = json.dumps(record, separators=(',', ':')).encode('utf-8')
+
+        with self._lock:
+            # Before the flusher has opened the file, records just wait in the buffer
+            if self._ready.is_set() and self._file is None:
+                raise RuntimeError("Change journal is closed")
+            self._buffer += _RECORD_HEADER.pack(len(payload), zlib.crc32(payload))
+            self._buffer += payload
+            self._pending += 1
+            if len(self._buffer) >= self.flush_bytes:
+                self._write_buffer()
+
+    def snapshot(self, database_path: str) -> int:
+        """Start a new journal file with the full contents of every journaled table; returns rows written.
+
+        Each table gets a delete-all marked as a snapshot followed by an upsert per
+        row, so replaying the new file reproduces the database as it is now. Used as
+        the baseline of a new journal and after bulk deletes such as a records reset.
+        """
+        self._ready.wait()
+        conn = get_connection(database_path)
+        rows_written = 0
+        # Held throughout so no other record lands between the rotation and the snapshot
+        with self._lock:
+            if self._file is None:
+                raise RuntimeError("Change journal is not open")
+            self._rotate()
+            for table, columns in JOURNALED_COLUMNS.items():
+                self.append(table, 'delete', match={}, snapshot=True)
+                for values in conn.execute(f"SELECT {', '.join(columns)} FROM {table}"):
+                    self.append(table, 'upsert', row=dict(zip(columns, values)))
+                    rows_written += 1
+            self._write_buffer()
+        logging.info(f"📸 Change journal snapshot: {rows_written} row(s) from {database_path}")
+        return rows_written
+
+    def upsert(self, table: str, row: Dict[str, Any]):
+        """Record the full current state of a row."""
+        self.append(table, 'upsert', row=row)
+
+    def delete(self, table: str, match: Optional[Dict[str, Any]] = None):
+        """Record a delete of every row matching the given column values (all rows if None)."""
+        self.append(table, 'delete', match=match or {})
+
+    def flush(self) -> bool:
+        """Write and fsync anything buffered."""
+        self._ready.wait()
+        with self._lock:
+            return self._write_buffer()
+
+    def _write_buffer(self) -> bool:
+        if not self._buffer:
+            return True
+        if self._file is None:
+            return False
+        try:
+            self._file.write(self._buffer)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            logging.debug(f"Change journal flushed {self._pending} record(s)")
+            self._buffer.clear()
+            self._pending = 0
+            return True
+        except Exception as e:
+            # Keep the buffer so the next flush retries it
+            logging.error(f"Failed to flush change journal {self.journal_path}: {e}")
+            return False
+
+    def close(self):
+        """Flush and close the journal; used on shutdown."""
+        self._closed.set()
+        # Lets a baseline snapshot still being written finish first
+        self._flusher.join()
+        with self._lock:
+            if not self._write_buffer():
+                logging.error(f"❌ {self._pending} change journal record(s) could not be written "
+                              f"to {self.journal_path}")
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def scan_journal(journal_path: str) -> Tuple[int, int, bool]:
+    """Validate a journal file; returns (end of last good record, record count, damaged tail)."""
+    count = 0
+    valid_end = len(JOURNAL_MAGIC)
+    for _, end in _iter_raw(journal_path):
+        count += 1
+        valid_end = end
+    return valid_end, count, valid_end != os.path.getsize(journal_path)
+
+
+def _iter_raw(journal_path: str) -> Iterator[Tuple[bytes, int]]:
+    with open(journal_path, 'rb') as handle:
+        if handle.read(len(JOURNAL_MAGIC)) != JOURNAL_MAGIC:
+            raise ValueError(f"{journal_path} is not a change journal")
+        offset = len(JOURNAL_MAGIC)
+        while True:
+            header = handle.read(_RECORD_HEADER.size)
+            if len(header) < _RECORD_HEADER.size:
+                return
+            length, checksum = _RECORD_HEADER.unpack(header)
+            payload = handle.read(length)
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                return
+            offset += _RECORD_HEADER.size + length
+            yield payload, offset
+
+
+def has_snapshot(journal_path: str) -> bool:
+    """Whether the journal begins with a snapshot, i.e. a baseline a replay can start from."""
+    for payload, _ in _iter_raw(journal_path):
+        return _SNAPSHOT_MARKER in payload
+    return False
+
+
+def journal_files(journal_path: str) -> List[str]:
+    """The rotated files of a journal and the journal itself, oldest first."""
+    rotated = []
+    index = 1
+    while os.path.exists(f"{journal_path}.{index}"):
+        rotated.append(f"{journal_path}.{index}")
+        index += 1
+    files = list(reversed(rotated))
+    if os.path.exists(journal_path):
+        files.append(journal_path)
+    return files
+
+
+def _replay_source(journal_path: str, until: Optional[str]) -> str:
+    """The newest journal file that starts at or before `until`; each one begins with a snapshot."""
+    files = journal_files(journal_path)
+    if until is None or not files:
+        return journal_path
+    for path in reversed(files):
+        first = next(read_journal(path), None)
+        if first is not None and first['ts'] <= until:
+            return path
+    return files[0]
+
+
+def read_journal(journal_path: str, until: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Yield change records in order, stopping after `until` (ISO timestamp) if given."""
+    for payload, _ in _iter_raw(journal_path):
+        record = json.loads(payload.decode('utf-8'))
+        if until and record['ts'] > until:
+            return
+        yield record
+
+
+def _apply_record(conn: sqlite3.Connection, record: Dict[str, Any]):
+    table = record['table']
+    columns = JOURNALED_COLUMNS[table]
+    if record['op'] == 'upsert':
+        row = record['row']
+        placeholders = ', '.join('?' for _ in columns)
+        conn.execute(f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                     [row.get(column) for column in columns])
+    elif record['op'] == 'delete':
+        match = record.get('match', {})
+        unknown = set(match) - set(columns)
+        if unknown:
+            raise ValueError(f"Unknown column(s) in journal delete for {table}: {sorted(unknown)}")
+        where = ' AND '.join(f"{column} = ?" for column in match) or '1 = 1'
+        conn.execute(f"DELETE FROM {table} WHERE {where}", list(match.values()))
+    else:
+        raise ValueError(f"Unknown journal operation: {record['op']}")
+
+
+def replay_journal(journal_path: str, target_path: str, until: Optional[str] = None) -> Tuple[bool, str]:
+    """Rebuild clock_records and staff into a new database as of `until` (default: the end)."""
+    try:
+        if os.path.exists(target_path):
+            return False, f"Target database already exists: {target_path}"
+
+        # Same schema as a live database, indexes and epoch triggers included
+        success, message = run_migrations(target_path)
+        release_connection_manager(target_path)
+        if not success:
+            return False, message
+
+        # Older states live in the rotated files; start from the one covering `until`
+        source = _replay_source(journal_path, until)
+        applied = 0
+        conn = sqlite3.connect(target_path)
+        try:
+            with conn:
+                for record in read_journal(source, until):
+                    _apply_record(conn, record)
+                    applied += 1
+            counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                      for table in JOURNALED_COLUMNS}
+        finally:
+            conn.close()
+
+        message = (f"Replayed {applied} change(s) from {os.path.basename(source)} into {target_path}: "
+                   f"{counts['staff']} staff, {counts['clock_records']} clock records")
+        logging.info(message)
+        return True, message
+
+    except Exception as e:
+        logging.error(f"Failed to replay change journal {journal_path}: {e}")
+        return False, f"Error replaying change journal: {str(e)}"
+
+
+_journals: Dict[str, ChangeJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_change_journal(journal_path: str, database_path: Optional[str] = None) -> ChangeJournal:
+    """Get the process-wide journal writer for a journal file (snapshotting database_path if it has no baseline)."""
+    key = os.path.abspath(journal_path)
+    with _journals_lock:
+        journal = _journals.get(key)
+        if journal is None:
+            journal = ChangeJournal(journal_path, database_path=database_path)
+            _journals[key] = journal
+        return journal
+
+
+def close_change_journals():
+    """Flush and close every open journal, used on application shutdown."""
+    with _journals_lock:
+        journals: List[ChangeJournal] = list(_journals.values())
+        _journals.clear()
+    for journal in journals:
+        journal.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or replay the StaffClock change journal.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    dump_parser = subparsers.add_parser("dump", help="print journal records as JSON lines")
+    dump_parser.add_argument("journal")
+    dump_parser.add_argument("--until", help="stop after this ISO timestamp")
+
+    replay_parser = subparsers.add_parser("replay", help="rebuild staff and clock_records into a new database")
+    replay_parser.add_argument("journal")
+    replay_parser.add_argument("target", help="path of the database to create")
+    replay_parser.add_argument("--until", help="restore the state as of this ISO timestamp")
+
+    args = parser.parse_args()
+    if args.command == "dump":
+        for entry in read_journal(args.journal, args.until):
+            print(json.dumps(entry))
+        valid_end, count, torn = scan_journal(args.journal)
+        if torn:
+            print(f"⚠️ Damaged tail after record {count} (byte {valid_end})")
+    else:
+        ok, result = replay_journal(args.journal, args.target, args.until)
+        print(("✅ " if ok else "❌ ") + result)
+        raise SystemExit(0 if ok else 1)
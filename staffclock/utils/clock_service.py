@@ -0,0 +1,381 @@
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from .break_registry import BreakRegistry, OpenBreak, get_break_registry
+from .change_journal import ChangeJournal
+from .db_connection import transaction
+from .db_writer import DatabaseWriter
+from .logging_manager import get_subsystem_logger
+from .open_shift_registry import OpenShiftRegistry, get_open_shift_registry
+from .staff_directory import StaffDirectory, get_staff_directory
+
+_clock_log = get_subsystem_logger('clock')
+
+_CLOCK_RECORD_ROW = 'SELECT id, staff_code, clock_in_time, clock_out_time, notes, break_time FROM clock_records WHERE id = ?'
+
+# Adds one finished break to the shift's running total (break_time is minutes stored as text)
+_ADD_BREAK_MINUTES = '''
+    UPDATE clock_records
+    SET break_time = CAST(COALESCE(NULLIF(break_time, ''), '0') AS REAL) + ?
+    WHERE id = ?
+'''
+
+
+class ClockResult:
+    """Outcome of one clock operation, for whichever front end made the call."""
+
+    __slots__ = ('success', 'action', 'staff_code', 'staff_name', 'staff_role', 'message',
+                 'record_id', 'timestamp', 'break_minutes', 'error', 'elapsed_ms')
+
+    def __init__(self, success: bool, action: str, staff_code: str, message: str,
+                 staff_name: Optional[str] = None, staff_role: Optional[str] = None,
+                 record_id: Optional[int] = None, timestamp: Optional[datetime] = None,
+                 break_minutes: Optional[float] = None, error: Optional[Exception] = None):
+        self.success = success
+        self.action = action
+        self.staff_code = staff_code
+        self.staff_name = staff_name
+        self.staff_role = staff_role
+        self.message = message
+        self.record_id = record_id
+        self.timestamp = timestamp
+        self.break_minutes = break_minutes
+        self.error = error
+        self.elapsed_ms = 0.0
+
+    def __repr__(self) -> str:
+        state = 'ok' if self.success else 'failed'
+        return f"<ClockResult {self.action} {self.staff_code} {state}: {self.message}>"
+
+
+class ClockService:
+    """Clock-in, clock-out and break logic with no GUI attached.
+
+    Each call validates against the in-memory staff directory, open-shift and
+    break registries, updates those registries straight away, queues its change
+    as one transaction (through the shared writer thread when one is given, so
+    it group-commits with other writes) and returns a Future. The Future
+    resolves to a ClockResult once the write has committed or failed. By then
+    the row has been journaled, or the registries have been re-read from the
+    database. Nothing waits for the commit, so a front end should hand the
+    result back to its own thread (a Qt signal) rather than call .result().
+    elapsed_ms on the result runs from the call to the commit.
+    """
+
+    def __init__(self, database_path: str, writer: Optional[DatabaseWriter] = None,
+                 journal: Optional[ChangeJournal] = None,
+                 directory: Optional[StaffDirectory] = None,
+                 registry: Optional[OpenShiftRegistry] = None,
+                 breaks: Optional[BreakRegistry] = None):
+        self.database_path = database_path
+        self.writer = writer
+        self.journal = journal
+        self.directory = directory or get_staff_directory(database_path)
+        self.registry = registry or get_open_shift_registry(database_path)
+        self.breaks = breaks or get_break_registry(database_path)
+        # Serialises check-then-update of the registries for concurrent callers
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------ state
+
+    def is_clocked_in(self, staff_code: str) -> bool:
+        return self.registry.is_clocked_in(staff_code)
+
+    def is_on_break(self, staff_code: str) -> bool:
+        return self.breaks.is_on_break(staff_code)
+
+    # ------------------------------------------------------------------ operations
+
+    def clock_in(self, staff_code: str, when: Optional[datetime] = None) -> "Future[ClockResult]":
+        """Open a new shift."""
+        return self._timed(self._clock_in, staff_code, when or datetime.now())
+
+    def clock_out(self, staff_code: str, when: Optional[datetime] = None) -> "Future[ClockResult]":
+        """Close the open shift; a break still running is ended first."""
+        return self._timed(self._clock_out, staff_code, when or datetime.now())
+
+    def start_break(self, staff_code: str, when: Optional[datetime] = None) -> "Future[ClockResult]":
+        return self._timed(self._start_break, staff_code, when or datetime.now())
+
+    def end_break(self, staff_code: str, when: Optional[datetime] = None) -> "Future[ClockResult]":
+        return self._timed(self._end_break, staff_code, when or datetime.now())
+
+    def force_clock_out(self, staff_code: str, record_id: Optional[int],
+                        when: Optional[datetime] = None) -> "Future[ClockResult]":
+        """Administrative close of a specific open record (None: the latest open one)."""
+        return self._timed(self._force_clock_out, staff_code, when or datetime.now(), record_id)
+
+    def _timed(self, operation: Callable[..., "Future[ClockResult]"], *args) -> "Future[ClockResult]":
+        started = time.perf_counter()
+        future = operation(*args)
+
+        def finish(done: "Future[ClockResult]"):
+            result = done.result()
+            result.elapsed_ms = (time.perf_counter() - started) * 1000
+            _clock_log.debug("Clock service: %r in %.1f ms", result, result.elapsed_ms)
+
+        # Registered first, so elapsed_ms is set before any caller callback runs
+        future.add_done_callback(finish)
+        return future
+
+    def _clock_in(self, staff_code: str, when: datetime) -> "Future[ClockResult]":
+        staff = self.directory.get(staff_code)
+        if staff is None:
+            return _resolved(ClockResult(False, 'clock_in', staff_code, "Invalid user ID or staff code."))
+
+        clock_in_time = when.isoformat()
+        with self._lock:
+            if self.registry.is_clocked_in(staff_code):
+                return _resolved(ClockResult(False, 'clock_in', staff_code, "You are already clocked in.",
+                                             staff.name, staff.role))
+            # record_id is filled in when the INSERT commits
+            self.registry.open_shift(staff_code, None, clock_in_time, staff.name, staff.role)
+
+        def committed(record_id: int) -> ClockResult:
+            self.registry.attach_record_id(staff_code, clock_in_time, record_id)
+            self._journal_row((record_id, staff_code, clock_in_time, None, None, None))
+            return ClockResult(True, 'clock_in', staff_code, f"Clock-in recorded successfully at {when:%H:%M}",
+                               staff.name, staff.role, record_id, when)
+
+        def failed(error: Exception) -> ClockResult:
+            self.registry.refresh_staff(staff_code)
+            return self._failed('clock_in', staff_code, staff, "Clock-in", error)
+
+        return self._submit('clock_in', staff_code, lambda conn: conn.execute(
+            'INSERT INTO clock_records (staff_code, clock_in_time) VALUES (?, ?)',
+            (staff_code, clock_in_time)
+        ).lastrowid, committed, failed)
+
+    def _clock_out(self, staff_code: str, when: datetime) -> "Future[ClockResult]":
+        staff = self.directory.get(staff_code)
+        if staff is None:
+            return _resolved(ClockResult(False, 'clock_out', staff_code, "Invalid user ID or staff code."))
+
+        clock_out_time = when.isoformat()
+        with self._lock:
+            if not self.registry.is_clocked_in(staff_code):
+                return _resolved(ClockResult(False, 'clock_out', staff_code, "You are not clocked in.",
+                                             staff.name, staff.role))
+            open_break = self.breaks.get(staff_code)
+            break_minutes = open_break.minutes_until(when) if open_break else None
+            self.breaks.end(staff_code)
+            self.registry.close_shift(staff_code)
+
+        def command(conn: sqlite3.Connection):
+            # Looked up here: the clock-in may have been queued just before this
+            record_id = self._open_record_id(conn, staff_code)
+            if open_break is not None:
+                self._close_break(conn, open_break, when, break_minutes)
+            conn.execute('UPDATE clock_records SET clock_out_time = ? WHERE id = ? AND clock_out_time IS NULL',
+                         (clock_out_time, record_id))
+            return conn.execute(_CLOCK_RECORD_ROW, (record_id,)).fetchone()
+
+        def committed(row) -> ClockResult:
+            self._journal_row(row)
+            return ClockResult(True, 'clock_out', staff_code, f"Clock-out recorded successfully at {when:%H:%M}",
+                               staff.name, staff.role, row[0], when, break_minutes)
+
+        def failed(error: Exception) -> ClockResult:
+            # Put the registries back in line with whatever the database holds
+            self.registry.refresh_staff(staff_code)
+            self.breaks.refresh_staff(staff_code)
+            return self._failed('clock_out', staff_code, staff, "Clock-out", error)
+
+        return self._submit('clock_out', staff_code, command, committed, failed)
+
+    def _start_break(self, staff_code: str, when: datetime) -> "Future[ClockResult]":
+        staff = self.directory.get(staff_code)
+        if staff is None:
+            return _resolved(ClockResult(False, 'start_break', staff_code, "Invalid user ID or staff code."))
+
+        break_start = when.isoformat()
+        with self._lock:
+            shift = self.registry.get(staff_code)
+            if shift is None:
+                return _resolved(ClockResult(False, 'start_break', staff_code, "You are not clocked in.",
+                                             staff.name, staff.role))
+            if self.breaks.is_on_break(staff_code):
+                return _resolved(ClockResult(False, 'start_break', staff_code, "You are already on break.",
+                                             staff.name, staff.role, shift.record_id))
+            # Ids are filled in when the INSERT commits
+            open_break = OpenBreak(staff_code, None, shift.record_id, break_start)
+            self.breaks.start(open_break)
+
+        def command(conn: sqlite3.Connection):
+            record_id = shift.record_id or self._open_record_id(conn, staff_code)
+            break_id = conn.execute(
+                'INSERT INTO shift_breaks (clock_record_id, staff_code, break_start) VALUES (?, ?, ?)',
+                (record_id, staff_code, break_start)
+            ).lastrowid
+            return break_id, record_id
+
+        def committed(ids) -> ClockResult:
+            open_break.break_id, open_break.clock_record_id = ids
+            return ClockResult(True, 'start_break', staff_code, "Break started.",
+                               staff.name, staff.role, ids[1], when)
+
+        def failed(error: Exception) -> ClockResult:
+            self.breaks.refresh_staff(staff_code)
+            return self._failed('start_break', staff_code, staff, "Break start", error)
+
+        return self._submit('start_break', staff_code, command, committed, failed)
+
+    def _end_break(self, staff_code: str, when: datetime) -> "Future[ClockResult]":
+        staff = self.directory.get(staff_code)
+        if staff is None:
+            return _resolved(ClockResult(False, 'end_break', staff_code, "Invalid user ID or staff code."))
+
+        with self._lock:
+            open_break = self.breaks.get(staff_code)
+            if open_break is None:
+                return _resolved(ClockResult(False, 'end_break', staff_code, "You are not on break.",
+                                             staff.name, staff.role))
+            break_minutes = open_break.minutes_until(when)
+            self.breaks.end(staff_code)
+
+        def command(conn: sqlite3.Connection):
+            record_id = self._close_break(conn, open_break, when, break_minutes)
+            return conn.execute(_CLOCK_RECORD_ROW, (record_id,)).fetchone()
+
+        def committed(row) -> ClockResult:
+            self._journal_row(row)
+            return ClockResult(True, 'end_break', staff_code, f"Break ended. Duration: {break_minutes:.2f} minutes.",
+                               staff.name, staff.role, row[0], when, break_minutes)
+
+        def failed(error: Exception) -> ClockResult:
+            self.breaks.refresh_staff(staff_code)
+            return self._failed('end_break', staff_code, staff, "Break end", error)
+
+        return self._submit('end_break', staff_code, command, committed, failed)
+
+    def _force_clock_out(self, staff_code: str, when: datetime,
+                         record_id: Optional[int]) -> "Future[ClockResult]":
+        staff = self.directory.get(staff_code)
+        name = staff.name if staff else 'Unknown'
+        role = staff.role if staff else None
+        open_break = self.breaks.get(staff_code)
+
+        def command(conn: sqlite3.Connection):
+            # None while the clock-in is still queued; look it up the way _clock_out does
+            target = record_id if record_id is not None else self._open_record_id(conn, staff_code)
+            # A break with no record id yet belongs to a shift that is still being written
+            closes_break = open_break is not None and open_break.clock_record_id in (None, target)
+            if closes_break:
+                self._close_break(conn, open_break, when, open_break.minutes_until(when))
+            conn.execute('UPDATE clock_records SET clock_out_time = ? WHERE id = ?', (when.isoformat(), target))
+            return conn.execute(_CLOCK_RECORD_ROW, (target,)).fetchone(), closes_break
+
+        def committed(outcome) -> ClockResult:
+            row, closed_break = outcome
+            if row is None:
+                return ClockResult(False, 'force_clock_out', staff_code, f"Clock record {record_id} not found",
+                                   name, role, record_id)
+            if closed_break:
+                self.breaks.end(staff_code)
+            # Re-read in case this person had more than one open record
+            self.registry.refresh_staff(staff_code)
+            self._journal_row(row)
+            logging.warning(f"⚠️ FORCE CLOCK-OUT: {name} ({staff_code}) - Record ID {row[0]}")
+            return ClockResult(True, 'force_clock_out', staff_code, f"{name} clocked out",
+                               name, role, row[0], when)
+
+        def failed(error: Exception) -> ClockResult:
+            logging.error(f"Error force clocking out user {staff_code}: {error}")
+            return ClockResult(False, 'force_clock_out', staff_code, f"Force clock-out failed: {error}",
+                               name, role, record_id, error=error)
+
+        return self._submit('force_clock_out', staff_code, command, committed, failed)
+
+    # ------------------------------------------------------------------ helpers
+
+    @staticmethod
+    def _close_break(conn: sqlite3.Connection, open_break: OpenBreak, when: datetime, minutes: float) -> int:
+        """End a break row and add its length to the shift's break total; returns the clock record id."""
+        break_id, record_id = open_break.break_id, open_break.clock_record_id
+        if break_id is None:
+            # Started by a write that has not reported back yet (possibly the same batch)
+            row = conn.execute(
+                'SELECT id, clock_record_id FROM shift_breaks WHERE staff_code = ? AND break_end IS NULL '
+                'ORDER BY break_start DESC LIMIT 1',
+                (open_break.staff_code,)
+            ).fetchone()
+            if row is None:
+                raise LookupError(f"No open break for {open_break.staff_code}")
+            break_id, record_id = row
+        conn.execute('UPDATE shift_breaks SET break_end = ?, minutes = ? WHERE id = ? AND break_end IS NULL',
+                     (when.isoformat(), minutes, break_id))
+        conn.execute(_ADD_BREAK_MINUTES, (minutes, record_id))
+        return record_id
+
+    @staticmethod
+    def _open_record_id(conn: sqlite3.Connection, staff_code: str) -> int:
+        """Most recent open clock record for a staff member, via the open-shift index."""
+        row = conn.execute(
+            'SELECT id FROM clock_records WHERE staff_code = ? AND clock_out_time IS NULL '
+            'ORDER BY clock_in_time DESC LIMIT 1',
+            (staff_code,)
+        ).fetchone()
+        if row is None:
+            raise LookupError(f"No open clock record for {staff_code}")
+        return row[0]
+
+    def _submit(self, action: str, staff_code: str, command: Callable[[sqlite3.Connection], Any],
+                committed: Callable[[Any], ClockResult],
+                failed: Callable[[Exception], ClockResult]) -> "Future[ClockResult]":
+        """Queue a write command as one transaction; the Future resolves once it commits or fails.
+
+        committed/failed run on the writer thread (or inline without a writer)
+        and turn the outcome into the ClockResult.
+        """
+        outcome: "Future[ClockResult]" = Future()
+
+        def resolve(write: Future):
+            error = write.exception()
+            try:
+                result = failed(error) if error is not None else committed(write.result())
+            except Exception as e:
+                logging.error(f"❌ Follow-up to {action} for {staff_code} failed: {e}")
+                result = ClockResult(False, action, staff_code, f"Could not confirm {action}: {e}", error=e)
+            outcome.set_result(result)
+
+        if self.writer is not None:
+            self.writer.submit(command).add_done_callback(resolve)
+        else:
+            write: Future = Future()
+            try:
+                with transaction(self.database_path) as conn:
+                    write.set_result(command(conn))
+            except Exception as e:
+                write.set_exception(e)
+            resolve(write)
+        return outcome
+
+    def _journal_row(self, row):
+        if self.journal is None or row is None:
+            return
+        try:
+            self.journal.upsert('clock_records', dict(zip(
+                ('id', 'staff_code', 'clock_in_time', 'clock_out_time', 'notes', 'break_time'), row)))
+        except Exception as e:
+            logging.error(f"Failed to journal clock record {row[0]}: {e}")
+
+    @staticmethod
+    def _failed(action: str, staff_code: str, staff, operation: str, error: Exception) -> ClockResult:
+        logging.error(f"❌ {operation} for {staff_code} could not be saved: {error}")
+        if isinstance(error, LookupError):
+            message = "You are not clocked in."
+        else:
+            message = f"{operation} could not be saved: {error}"
+        return ClockResult(False, action, staff_code, message, staff.name, staff.role, error=error)
+
+
+def _resolved(result: ClockResult) -> "Future[ClockResult]":
+    """A Future that already holds a result, for calls refused before anything was queued."""
+    future: "Future[ClockResult]" = Future()
+    future.set_result(result)
+    return future
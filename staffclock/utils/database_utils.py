@@ -1,9 +1,77 @@
 import sqlite3
 import os
-import shutil
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, Optional, Tuple
+
+from .archive_catalog import get_archive_catalog
+from .db_connection import get_connection, release_connection_manager
+from .schema_migrations import run_migrations
+from .time_utils import DateLike, from_epoch, pay_period, period_bounds, to_epoch
+
+# Called with (pages copied, total pages) after each backup step
+SnapshotProgress = Callable[[int, int], None]
+
+# Rows moved by archive_period: only finished shifts and signed-out visitors
+_CLOSED_CLOCK_RECORDS = "clock_out_time IS NOT NULL AND clock_in_epoch >= ? AND clock_in_epoch < ?"
+_CHECKED_OUT_VISITORS = "time_out IS NOT NULL AND time_in_epoch >= ? AND time_in_epoch < ?"
+_CLOCK_RECORD_COLUMNS = "id, staff_code, clock_in_time, clock_out_time, notes, break_time"
+_VISITOR_COLUMNS = "id, name, car_reg, purpose, time_in, time_out"
+_SHIFT_BREAK_COLUMNS = "id, clock_record_id, staff_code, break_start, break_end, minutes"
+
+
+def snapshot_database(source_path: str, target_path: str, pages: int = 256,
+                      progress: Optional[SnapshotProgress] = None) -> Tuple[bool, str]:
+    """Copy a live database with the SQLite online backup API.
+
+    Copies `pages` pages per step so writers are only briefly held off, and
+    always produces a transactionally consistent file, unlike copying the
+    database file. The copy is checked with PRAGMA quick_check and only moved
+    into place at target_path if it passes.
+    """
+    partial_path = target_path + ".partial"
+    source = None
+    target = None
+    try:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+        source = sqlite3.connect(source_path, timeout=30.0)
+        target = sqlite3.connect(partial_path)
+
+        def on_step(status, remaining, total):
+            if progress:
+                progress(total - remaining, total)
+
+        source.backup(target, pages=pages, progress=on_step)
+
+        # Archives are read on their own, so don't leave them in WAL mode
+        target.execute('PRAGMA journal_mode=DELETE')
+        result = target.execute('PRAGMA quick_check').fetchone()[0]
+        target.close()
+        target = None
+        if result != 'ok':
+            os.remove(partial_path)
+            logging.error(f"Snapshot of {source_path} failed quick_check: {result}")
+            return False, f"Archive copy failed integrity check: {result}"
+
+        os.replace(partial_path, target_path)
+        logging.info(f"Database snapshot written to {target_path}")
+        return True, f"Snapshot created: {os.path.basename(target_path)}"
+
+    except Exception as e:
+        logging.error(f"Failed to snapshot database {source_path}: {e}")
+        if target is not None:
+            target.close()
+            target = None
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        return False, f"Error creating snapshot: {str(e)}"
+    finally:
+        if source is not None:
+            source.close()
+        if target is not None:
+            target.close()
 
 
 class ArchiveManager:
@@ -15,7 +83,10 @@ class ArchiveManager:
         os.makedirs(archive_folder, exist_ok=True)
     
     def create_archive(self, manual: bool = False) -> Tuple[bool, str]:
-        """Create an archive of the current database."""
+        """Create and catalog an archive of the current database.
+
+        Blocks for the copy and the catalog checksum; the GUI uses ArchiveSnapshotThread instead.
+        """
         try:
             # Create archive filename with current date
             archive_date = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
@@ -25,8 +96,10 @@ class ArchiveManager:
             
             logging.info(f"Starting database archival process for {archive_date}")
             
-            # Copy current database to archive
-            shutil.copy2(self.database_path, archive_path)
+            success, message = snapshot_database(self.database_path, archive_path)
+            if not success:
+                return False, message
+            get_archive_catalog(self.archive_folder).record(archive_path)
             logging.info(f"Database copied to archive: {archive_path}")
             
             return True, f"Archive created successfully: {archive_filename}"
@@ -35,51 +108,124 @@ class ArchiveManager:
             logging.error(f"Failed to create archive: {e}")
             return False, f"Error creating archive: {str(e)}"
     
+    def period_archive_path(self, period_start, period_end) -> str:
+        """Archive file holding one pay period's records."""
+        return os.path.join(
+            self.archive_folder,
+            f"period_archive_{period_start.strftime('%Y-%m-%d')}_{period_end.strftime('%Y-%m-%d')}.db"
+        )
+
+    def archive_period(self, cutoff: DateLike, start_day: int,
+                       progress: Optional[Callable[[int, int], None]] = None,
+                       on_deleted: Optional[Callable[[str, List[int]], None]] = None) -> Tuple[bool, str]:
+        """Move closed clock records and checked-out visitors before `cutoff` into per-period archives.
+
+        Each pay period (see time_utils.pay_period) gets its own archive database.
+        Open shifts and visitors still on site are never moved. Rows are copied into
+        the attached archive and committed first, then deleted from the live database
+        only where the archive has them: SQLite does not commit atomically across
+        attached WAL databases, and this order lets an interrupted run simply be
+        repeated without losing or duplicating anything.
+        """
+        try:
+            conn = get_connection(self.database_path)
+            cutoff_epoch = to_epoch(cutoff)
+
+            first = conn.execute("""
+                SELECT MIN(epoch) FROM (
+                    SELECT MIN(clock_in_epoch) AS epoch FROM clock_records
+                    WHERE clock_out_time IS NOT NULL AND clock_in_epoch < ?
+                    UNION ALL
+                    SELECT MIN(time_in_epoch) FROM visitors
+                    WHERE time_out IS NOT NULL AND time_in_epoch < ?
+                )
+            """, (cutoff_epoch, cutoff_epoch)).fetchone()[0]
+            if first is None:
+                return True, "Nothing to archive before the cutoff"
+
+            periods = []
+            period_start, period_end = pay_period(from_epoch(first), start_day)
+            while to_epoch(period_start) < cutoff_epoch:
+                periods.append((period_start, period_end))
+                period_start, period_end = pay_period(period_end + timedelta(days=1), start_day)
+
+            moved_records = moved_visitors = 0
+            for index, (period_start, period_end) in enumerate(periods):
+                start_epoch, end_epoch = period_bounds(period_start, period_end)
+                bounds = (start_epoch, min(end_epoch, cutoff_epoch))
+                records, visitors = self._move_period(
+                    conn, self.period_archive_path(period_start, period_end), bounds, on_deleted
+                )
+                moved_records += records
+                moved_visitors += visitors
+                if progress:
+                    progress(index + 1, len(periods))
+
+            message = (f"Archived {moved_records} clock records and {moved_visitors} visitor records "
+                       f"across {len(periods)} pay period(s)")
+            logging.info(message)
+            return True, message
+
+        except Exception as e:
+            logging.error(f"Failed to archive period data: {e}")
+            return False, f"Error archiving periods: {str(e)}"
+
+    def _move_period(self, conn: sqlite3.Connection, archive_path: str, bounds: Tuple[int, int],
+                     on_deleted: Optional[Callable[[str, List[int]], None]]) -> Tuple[int, int]:
+        has_rows = conn.execute(f"""
+            SELECT EXISTS(SELECT 1 FROM clock_records WHERE {_CLOSED_CLOCK_RECORDS})
+                OR EXISTS(SELECT 1 FROM visitors WHERE {_CHECKED_OUT_VISITORS})
+        """, bounds * 2).fetchone()[0]
+        if not has_rows:
+            return 0, 0
+
+        # Same schema as the live database, so archives can be queried the same way;
+        # archives made before shift_breaks existed are brought up to date as well
+        success, message = run_migrations(archive_path)
+        # Archives are read on their own, so don't leave them in WAL mode
+        get_connection(archive_path).execute('PRAGMA journal_mode=DELETE')
+        release_connection_manager(archive_path)
+        if not success:
+            raise RuntimeError(message)
+
+        conn.execute("ATTACH DATABASE ? AS period_archive", (archive_path,))
+        try:
+            with conn:
+                conn.execute(f"""
+                    INSERT OR IGNORE INTO period_archive.clock_records ({_CLOCK_RECORD_COLUMNS})
+                    SELECT {_CLOCK_RECORD_COLUMNS} FROM main.clock_records WHERE {_CLOSED_CLOCK_RECORDS}
+                """, bounds)
+                # Deleting the records below fires trg_clock_records_delete_breaks, so their breaks go too
+                conn.execute(f"""
+                    INSERT OR IGNORE INTO period_archive.shift_breaks ({_SHIFT_BREAK_COLUMNS})
+                    SELECT {_SHIFT_BREAK_COLUMNS} FROM main.shift_breaks
+                    WHERE clock_record_id IN (SELECT id FROM main.clock_records WHERE {_CLOSED_CLOCK_RECORDS})
+                """, bounds)
+                conn.execute(f"""
+                    INSERT OR IGNORE INTO period_archive.visitors ({_VISITOR_COLUMNS})
+                    SELECT {_VISITOR_COLUMNS} FROM main.visitors WHERE {_CHECKED_OUT_VISITORS}
+                """, bounds)
+
+            archived_records = f"id IN (SELECT id FROM period_archive.clock_records) AND {_CLOSED_CLOCK_RECORDS}"
+            archived_visitors = f"id IN (SELECT id FROM period_archive.visitors) AND {_CHECKED_OUT_VISITORS}"
+            with conn:
+                record_ids = [row[0] for row in conn.execute(
+                    f"SELECT id FROM main.clock_records WHERE {archived_records}", bounds)]
+                conn.execute(f"DELETE FROM main.clock_records WHERE {archived_records}", bounds)
+                visitors = conn.execute(f"DELETE FROM main.visitors WHERE {archived_visitors}", bounds).rowcount
+        finally:
+            conn.execute("DETACH DATABASE period_archive")
+
+        get_archive_catalog(self.archive_folder).record(archive_path)
+        logging.info(f"Moved {len(record_ids)} clock records and {visitors} visitors to {os.path.basename(archive_path)}")
+        if on_deleted and record_ids:
+            on_deleted('clock_records', record_ids)
+        return len(record_ids), visitors
+
     def get_archive_list(self) -> List[Dict]:
         """Get a list of all archive databases with their metadata."""
         try:
-            archive_files = []
-            if os.path.exists(self.archive_folder):
-                for filename in os.listdir(self.archive_folder):
-                    if filename.endswith(".db") and ("archive" in filename.lower()):
-                        file_path = os.path.join(self.archive_folder, filename)
-                        
-                        # Handle different archive naming patterns
-                        date_part = None
-                        if filename.startswith("database_archive_"):
-                            date_part = filename.replace("database_archive_", "").replace(".db", "")
-                        elif filename.startswith("manual_archive_"):
-                            date_part = filename.replace("manual_archive_", "").replace(".db", "")
-                        
-                        if date_part:
-                            try:
-                                archive_date = datetime.strptime(date_part, "%Y-%m-%d_%H-%M-%S")
-                                archive_files.append({
-                                    'filename': filename,
-                                    'path': file_path,
-                                    'date': archive_date,
-                                    'size': os.path.getsize(file_path),
-                                    'type': 'Manual' if filename.startswith("manual_") else 'Automatic'
-                                })
-                            except ValueError:
-                                # Try alternative date formats or use file modification time
-                                try:
-                                    file_stat = os.path.getmtime(file_path)
-                                    archive_date = datetime.fromtimestamp(file_stat)
-                                    archive_files.append({
-                                        'filename': filename,
-                                        'path': file_path,
-                                        'date': archive_date,
-                                        'size': os.path.getsize(file_path),
-                                        'type': 'Unknown'
-                                    })
-                                except:
-                                    continue
-            
-            # Sort by date (newest first)
-            archive_files.sort(key=lambda x: x['date'], reverse=True)
-            return archive_files
-            
+            return get_archive_catalog(self.archive_folder).list_archives()
         except Exception as e:
             logging.error(f"Failed to get archive databases: {e}")
             return []
@@ -89,6 +235,7 @@ class ArchiveManager:
         try:
             if os.path.exists(archive_path):
                 os.remove(archive_path)
+                get_archive_catalog(self.archive_folder).remove(archive_path)
                 filename = os.path.basename(archive_path)
                 logging.info(f"Deleted archive database: {filename}")
                 return True, f"Archive '{filename}' deleted successfully."
@@ -99,41 +246,9 @@ class ArchiveManager:
             return False, f"Error deleting archive: {str(e)}"
     
     def get_archive_info(self, archive_path: str) -> Dict:
-        """Get detailed information about an archive database."""
+        """Get detailed information about an archive database (from the archive catalog)."""
         try:
-            conn = sqlite3.connect(archive_path)
-            cursor = conn.cursor()
-            
-            info = {
-                'staff_count': 0,
-                'records_count': 0,
-                'visitors_count': 0,
-                'visitors_table_exists': False,
-                'tables': []
-            }
-            
-            # Get table names
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = cursor.fetchall()
-            info['tables'] = [table[0] for table in tables]
-            
-            # Get counts for each table
-            if 'staff' in info['tables']:
-                cursor.execute("SELECT COUNT(*) FROM staff")
-                info['staff_count'] = cursor.fetchone()[0]
-            
-            if 'clock_records' in info['tables']:
-                cursor.execute("SELECT COUNT(*) FROM clock_records")
-                info['records_count'] = cursor.fetchone()[0]
-            
-            if 'visitors' in info['tables']:
-                info['visitors_table_exists'] = True
-                cursor.execute("SELECT COUNT(*) FROM visitors")
-                info['visitors_count'] = cursor.fetchone()[0]
-            
-            conn.close()
-            return info
-            
+            return get_archive_catalog(self.archive_folder).get_info(archive_path)
         except Exception as e:
             logging.error(f"Error getting archive info for {archive_path}: {e}")
             return {}
@@ -148,7 +263,7 @@ class DatabaseCleaner:
     def reset_database(self, keep_staff: bool = True) -> Tuple[bool, str]:
         """Reset the database by clearing records but optionally keeping staff."""
         try:
-            conn = sqlite3.connect(self.database_path)
+            conn = get_connection(self.database_path)
             cursor = conn.cursor()
             
             # Count records before deletion for logging
@@ -166,22 +281,20 @@ class DatabaseCleaner:
             
             logging.info(f"About to reset database: {clock_records_count} clock records, {visitors_count} visitor records")
             
-            # Clear clock records
-            cursor.execute('DELETE FROM clock_records')
-            
-            # Clear visitor records if table exists
-            if visitors_table_exists:
-                cursor.execute('DELETE FROM visitors')
-            
-            # Clear archive records if any exist
-            cursor.execute('DELETE FROM archive_records WHERE 1=1')
-            
-            # Optionally clear staff (for complete reset)
-            if not keep_staff:
-                cursor.execute('DELETE FROM staff')
-            
-            conn.commit()
-            conn.close()
+            with conn:
+                # Clear clock records
+                cursor.execute('DELETE FROM clock_records')
+                
+                # Clear visitor records if table exists
+                if visitors_table_exists:
+                    cursor.execute('DELETE FROM visitors')
+                
+                # Clear archive records if any exist
+                cursor.execute('DELETE FROM archive_records WHERE 1=1')
+                
+                # Optionally clear staff (for complete reset)
+                if not keep_staff:
+                    cursor.execute('DELETE FROM staff')
             
             message = f"Database reset successfully - cleared {clock_records_count} clock records"
             if visitors_count > 0:
@@ -197,11 +310,13 @@ class DatabaseCleaner:
             return False, f"Error resetting database: {str(e)}"
     
     def vacuum_database(self) -> Tuple[bool, str]:
-        """Vacuum the database to reclaim unused space."""
+        """Full VACUUM: rewrites the whole file, needs its size again in free disk and locks it throughout.
+
+        incremental_vacuum() is the routine way to give space back; this also defragments.
+        """
         try:
-            conn = sqlite3.connect(self.database_path)
+            conn = get_connection(self.database_path)
             conn.execute('VACUUM')
-            conn.close()
             
             logging.info("Database vacuumed successfully")
             return True, "Database optimized successfully"
@@ -213,12 +328,11 @@ class DatabaseCleaner:
     def check_database_integrity(self) -> Tuple[bool, str]:
         """Check database integrity."""
         try:
-            conn = sqlite3.connect(self.database_path)
+            conn = get_connection(self.database_path)
             cursor = conn.cursor()
             
             cursor.execute('PRAGMA integrity_check')
             result = cursor.fetchone()[0]
-            conn.close()
             
             if result == 'ok':
                 logging.info("Database integrity check passed")
@@ -231,10 +345,130 @@ class DatabaseCleaner:
             logging.error(f"Failed to check database integrity: {e}")
             return False, f"Error checking database integrity: {str(e)}"
 
+    def quick_check_database(self) -> Tuple[bool, str]:
+        """PRAGMA quick_check: integrity_check without the index cross-checks, for routine runs."""
+        try:
+            conn = get_connection(self.database_path)
+            problems = [row[0] for row in conn.execute('PRAGMA quick_check').fetchall()]
+
+            if problems == ['ok']:
+                logging.info("Database quick check passed")
+                return True, "Database quick check passed"
+            logging.warning(f"Database quick check failed: {problems[:5]}")
+            return False, f"Database quick check found {len(problems)} issue(s): {'; '.join(problems[:5])}"
+
+        except Exception as e:
+            logging.error(f"Failed to quick-check database: {e}")
+            return False, f"Error checking database: {str(e)}"
+
+    def optimize_database(self) -> Tuple[bool, str]:
+        """PRAGMA optimize: refresh query-planner statistics where they have gone stale."""
+        try:
+            conn = get_connection(self.database_path)
+            conn.execute('PRAGMA optimize').fetchall()
+
+            logging.info("Database statistics optimized")
+            return True, "Query planner statistics refreshed"
+
+        except Exception as e:
+            logging.error(f"Failed to optimize database: {e}")
+            return False, f"Error optimizing database: {str(e)}"
+
+    def get_free_space(self) -> Dict[str, int]:
+        """Page and freelist figures for the database file."""
+        conn = get_connection(self.database_path)
+        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+        freelist_count = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        return {
+            'page_size': page_size,
+            'page_count': page_count,
+            'freelist_count': freelist_count,
+            'file_bytes': page_size * page_count,
+            'free_bytes': page_size * freelist_count,
+            'auto_vacuum': conn.execute('PRAGMA auto_vacuum').fetchone()[0],
+        }
+
+    def free_space_report(self) -> Tuple[bool, str]:
+        """Human-readable summary of how much of the file is free pages."""
+        try:
+            info = self.get_free_space()
+            percent = (info['freelist_count'] / info['page_count'] * 100) if info['page_count'] else 0.0
+            mode = {0: 'NONE', 1: 'FULL', 2: 'INCREMENTAL'}.get(info['auto_vacuum'], str(info['auto_vacuum']))
+            return True, (f"File size {info['file_bytes'] / 1024 / 1024:.2f} MB, "
+                          f"{info['freelist_count']} free page(s) = {info['free_bytes'] / 1024 / 1024:.2f} MB "
+                          f"({percent:.1f}%), auto_vacuum={mode}")
+        except Exception as e:
+            logging.error(f"Failed to read database free space: {e}")
+            return False, f"Error reading free space: {str(e)}"
+
+    def incremental_vacuum(self, n_pages: Optional[int] = None, step_pages: int = 256,
+                           min_free_pages: int = 64) -> Tuple[bool, str]:
+        """Release free pages back to the filesystem in short steps.
+
+        Releases up to n_pages (default: the whole freelist) step_pages at a time,
+        each step its own short write transaction so clock writes can interleave.
+        Does nothing while the freelist is smaller than min_free_pages.
+        """
+        try:
+            conn = get_connection(self.database_path)
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                return True, "Incremental vacuum skipped (auto_vacuum is not INCREMENTAL)"
+
+            free_before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if free_before < min_free_pages:
+                return True, f"Incremental vacuum skipped ({free_before} free page(s), below {min_free_pages})"
+
+            remaining = free_before if n_pages is None else min(int(n_pages), free_before)
+            while remaining > 0:
+                step = min(step_pages, remaining)
+                # executescript steps the pragma to completion; execute() only frees one page
+                conn.executescript(f'PRAGMA incremental_vacuum({step})')
+                remaining -= step
+            released = free_before - conn.execute('PRAGMA freelist_count').fetchone()[0]
+
+            logging.info(f"Incremental vacuum released {released} page(s)")
+            return True, f"Incremental vacuum released {released} of {free_before} free page(s)"
+
+        except Exception as e:
+            logging.error(f"Failed to run incremental vacuum: {e}")
+            return False, f"Error running incremental vacuum: {str(e)}"
+
+
+class ValidationFinding:
+    """One validation problem; str() gives the same one-line message the validators always returned."""
+
+    def __init__(self, check: str, severity: str, message: str,
+                 record_ids: Optional[List[int]] = None, staff_codes: Optional[List[str]] = None):
+        self.check = check
+        self.severity = severity
+        self.message = message
+        self.record_ids = record_ids or []
+        self.staff_codes = staff_codes or []
+
+    def __str__(self) -> str:
+        return self.message
+
+    def __repr__(self) -> str:
+        return f"ValidationFinding({self.check!r}, {self.severity!r}, {self.message!r})"
+
+
+# A timestamp must at least start with YYYY-MM-DD; julianday() then rejects impossible values
+_ISO_DATE_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*"
+
+
+def _summarise_ids(record_ids: List[int], limit: int = 20) -> str:
+    shown = ", ".join(str(record_id) for record_id in record_ids[:limit])
+    if len(record_ids) > limit:
+        shown += f" and {len(record_ids) - limit} more"
+    return f"[{shown}]"
+
 
 class DatabaseValidator:
     """Validates database structure and data consistency."""
     
+    CHECK_NAME = "data_consistency"
+    
     def __init__(self, database_path: str):
         self.database_path = database_path
     
@@ -243,7 +477,7 @@ class DatabaseValidator:
         issues = []
         
         try:
-            conn = sqlite3.connect(self.database_path)
+            conn = get_connection(self.database_path)
             cursor = conn.cursor()
             
             # Check required tables
@@ -268,7 +502,6 @@ class DatabaseValidator:
                     if required_column not in columns:
                         issues.append(f"Missing column '{required_column}' in table '{table_name}'")
             
-            conn.close()
             
             if not issues:
                 logging.info("Database structure validation passed")
@@ -281,69 +514,126 @@ class DatabaseValidator:
             logging.error(f"Failed to validate database structure: {e}")
             return False, [f"Error validating database structure: {str(e)}"]
     
-    def validate_data_consistency(self) -> Tuple[bool, List[str]]:
-        """Validate data consistency across tables."""
-        issues = []
-        
+    def validate_data_consistency(self, full: bool = False) -> Tuple[bool, List[ValidationFinding]]:
+        """Validate data consistency across tables.
+
+        Only clock records added since the last run (above the id watermark) or
+        queued as changed by the validation triggers are checked, unless `full`
+        is set. All checks run in SQL. Records with findings stay queued, so they
+        are reported again until they are fixed.
+        """
+        findings: List[ValidationFinding] = []
+
         try:
-            conn = sqlite3.connect(self.database_path)
+            conn = get_connection(self.database_path)
             cursor = conn.cursor()
-            
-            # Check for orphaned clock records (staff_code not in staff table)
-            cursor.execute("""
-                SELECT DISTINCT c.staff_code 
-                FROM clock_records c 
-                LEFT JOIN staff s ON c.staff_code = s.code 
-                WHERE s.code IS NULL
-            """)
-            orphaned_codes = cursor.fetchall()
-            
-            if orphaned_codes:
-                codes = [code[0] for code in orphaned_codes]
-                issues.append(f"Orphaned clock records for non-existent staff codes: {codes}")
-            
-            # Check for duplicate staff codes
-            cursor.execute("""
-                SELECT code, COUNT(*) as count 
-                FROM staff 
-                GROUP BY code 
+
+            row = cursor.execute(
+                "SELECT watermark FROM validation_state WHERE check_name = ?", (self.CHECK_NAME,)
+            ).fetchone()
+            watermark = 0 if full or not row else row[0]
+            high_water = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM clock_records").fetchone()[0]
+
+            # Snapshot the records in scope for this run
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS validation_scope (record_id INTEGER PRIMARY KEY)")
+            with conn:
+                cursor.execute("DELETE FROM temp.validation_scope")
+                cursor.execute(
+                    "INSERT OR IGNORE INTO temp.validation_scope SELECT id FROM clock_records WHERE id > ? AND id <= ?",
+                    (watermark, high_water)
+                )
+                cursor.execute("INSERT OR IGNORE INTO temp.validation_scope SELECT record_id FROM validation_dirty")
+            scoped = cursor.execute("SELECT COUNT(*) FROM temp.validation_scope").fetchone()[0]
+
+            checks = [
+                ("orphaned_records", "error",
+                 "Orphaned clock records for non-existent staff codes", """
+                    SELECT cr.id, cr.staff_code FROM clock_records cr
+                    JOIN temp.validation_scope v ON v.record_id = cr.id
+                    WHERE NOT EXISTS (SELECT 1 FROM staff s WHERE s.code = cr.staff_code)
+                """),
+                ("invalid_dates", "error",
+                 "Invalid date formats in clock records", f"""
+                    SELECT cr.id, cr.staff_code FROM clock_records cr
+                    JOIN temp.validation_scope v ON v.record_id = cr.id
+                    WHERE (cr.clock_in_time IS NOT NULL AND cr.clock_in_time != ''
+                           AND (cr.clock_in_time NOT GLOB '{_ISO_DATE_GLOB}' OR julianday(cr.clock_in_time) IS NULL))
+                       OR (cr.clock_out_time IS NOT NULL AND cr.clock_out_time != ''
+                           AND (cr.clock_out_time NOT GLOB '{_ISO_DATE_GLOB}' OR julianday(cr.clock_out_time) IS NULL))
+                """),
+                ("clock_out_before_clock_in", "warning",
+                 "Clock records that end before they start", """
+                    SELECT cr.id, cr.staff_code FROM clock_records cr
+                    JOIN temp.validation_scope v ON v.record_id = cr.id
+                    WHERE julianday(cr.clock_out_time) < julianday(cr.clock_in_time)
+                """),
+                ("duplicate_records", "warning",
+                 "Duplicate clock records (same staff code and clock-in time)", """
+                    SELECT cr.id, cr.staff_code FROM clock_records cr
+                    JOIN temp.validation_scope v ON v.record_id = cr.id
+                    WHERE EXISTS (
+                        SELECT 1 FROM clock_records other
+                        WHERE other.staff_code = cr.staff_code
+                          AND other.clock_in_time = cr.clock_in_time
+                          AND other.id != cr.id
+                    )
+                """),
+            ]
+
+            failing_ids = set()
+            for check, severity, description, sql in checks:
+                rows = cursor.execute(sql).fetchall()
+                if rows:
+                    record_ids = [r[0] for r in rows]
+                    staff_codes = sorted({str(r[1]) for r in rows})
+                    failing_ids.update(record_ids)
+                    if check == "orphaned_records":
+                        message = f"{description}: {staff_codes}"
+                    else:
+                        message = f"{description}: {_summarise_ids(record_ids)}"
+                    findings.append(ValidationFinding(check, severity, message, record_ids, staff_codes))
+
+            # Staff codes are the primary key, but older databases may predate that
+            duplicate_codes = cursor.execute("""
+                SELECT code, COUNT(*) AS count
+                FROM staff
+                GROUP BY code
                 HAVING count > 1
-            """)
-            duplicate_codes = cursor.fetchall()
-            
+            """).fetchall()
             if duplicate_codes:
                 codes = [f"{code[0]} ({code[1]} times)" for code in duplicate_codes]
-                issues.append(f"Duplicate staff codes found: {codes}")
-            
-            # Check for invalid date formats in clock records
-            cursor.execute("""
-                SELECT id, clock_in_time, clock_out_time 
-                FROM clock_records 
-                WHERE clock_in_time IS NOT NULL 
-                AND clock_in_time != ''
-            """)
-            
-            invalid_dates = []
-            for record in cursor.fetchall():
-                try:
-                    datetime.fromisoformat(record[1])
-                    if record[2]:
-                        datetime.fromisoformat(record[2])
-                except ValueError:
-                    invalid_dates.append(record[0])
-            
-            if invalid_dates:
-                issues.append(f"Invalid date formats in clock records: {invalid_dates}")
-            
-            conn.close()
-            
-            if not issues:
-                logging.info("Database data consistency validation passed")
+                findings.append(ValidationFinding(
+                    "duplicate_staff_codes", "error", f"Duplicate staff codes found: {codes}",
+                    staff_codes=[str(code[0]) for code in duplicate_codes]
+                ))
+
+            # Advance the watermark and clear the queue, keeping records that still fail
+            with conn:
+                cursor.execute(
+                    "INSERT OR REPLACE INTO validation_state (check_name, watermark, validated_at) VALUES (?, ?, ?)",
+                    (self.CHECK_NAME, high_water, datetime.now().isoformat())
+                )
+                cursor.execute(
+                    "DELETE FROM validation_dirty WHERE record_id IN (SELECT record_id FROM temp.validation_scope)"
+                )
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO validation_dirty (record_id) VALUES (?)",
+                    [(record_id,) for record_id in failing_ids]
+                )
+
+            scope = "full" if full else "incremental"
+            if not findings:
+                logging.info(f"Database data consistency validation passed ({scope}, {scoped} records checked)")
                 return True, []
             else:
-                logging.warning(f"Database data consistency validation failed: {issues}")
-                return False, issues
-                
+                logging.warning(f"Database data consistency validation failed ({scope}, {scoped} records checked): "
+                                f"{[str(finding) for finding in findings]}")
+                return False, findings
+
         except Exception as e:
             logging.error(f"Failed to validate data consistency: {e}")
-            return False, [f"Error validating data consistency: {str(e)}"] 
\ No newline at end of file
+            return False, [ValidationFinding("error", "error", f"Error validating data consistency: {str(e)}")]
+
+    def validate_all_data(self) -> Tuple[bool, List[ValidationFinding]]:
+        """Full data consistency pass over every clock record."""
+        return self.validate_data_consistency(full=True)
@@ -0,0 +1,163 @@
+import logging
+import os
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+
+class _ThreadConnection:
+    """Holder for a thread's connection; closes it when the thread's locals are released."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        # Set by another thread's close_all(); the owning thread closes it on next use
+        self.retired = False
+        self._finalizer = weakref.finalize(self, _close_quietly, conn)
+
+    def close(self):
+        self._finalizer()
+
+
+def _close_quietly(conn: sqlite3.Connection):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class ConnectionManager:
+    """Hands out one persistent, tuned SQLite connection per thread for a database file.
+
+    Every connection is opened in WAL mode so the kiosk, the background monitor
+    and the timesheet threads can read while another thread writes, and keeps
+    its own prepared statement cache for the lifetime of the thread.
+    """
+
+    def __init__(self, database_path: str, timeout: float = 30.0, cached_statements: int = 256):
+        self.database_path = database_path
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._holders: "weakref.WeakSet[_ThreadConnection]" = weakref.WeakSet()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.database_path,
+            timeout=self.timeout,
+            cached_statements=self.cached_statements,
+            check_same_thread=False,
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.timeout * 1000)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-8000')
+        return conn
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use."""
+        holder = getattr(self._local, 'holder', None)
+        if holder is not None and holder.retired:
+            holder.close()
+            holder = None
+        if holder is None:
+            holder = _ThreadConnection(self._open())
+            self._local.holder = holder
+            with self._lock:
+                self._holders.add(holder)
+            logging.debug(f"Opened SQLite connection to {self.database_path} "
+                          f"for thread {threading.current_thread().name}")
+        return holder.conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a block in a single transaction, committing on success and rolling back on error."""
+        conn = self.get_connection()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def checkpoint(self, mode: str = 'TRUNCATE') -> bool:
+        """Fold the WAL back into the main file so it can be copied on its own."""
+        try:
+            busy, _, _ = self.get_connection().execute(f'PRAGMA wal_checkpoint({mode})').fetchone()
+            return busy == 0
+        except Exception as e:
+            logging.error(f"WAL checkpoint failed for {self.database_path}: {e}")
+            return False
+
+    def close_thread_connection(self):
+        """Close the calling thread's connection; worker threads call this before exiting."""
+        holder = getattr(self._local, 'holder', None)
+        if holder is not None:
+            self._local.holder = None
+            holder.close()
+
+    def close_all(self):
+        """Close the calling thread's connection and retire every other thread's.
+
+        A connection is only closed by the thread that owns it: the others are
+        closed (and reopened if needed) on their owner's next get_connection(),
+        or when the owning thread exits.
+        """
+        with self._lock:
+            holders: List[_ThreadConnection] = list(self._holders)
+            self._holders.clear()
+        for holder in holders:
+            holder.retired = True
+        self.close_thread_connection()
+
+
+_managers: Dict[str, ConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_connection_manager(database_path: str) -> ConnectionManager:
+    """Get the process-wide connection manager for a database file."""
+    key = os.path.abspath(database_path)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = ConnectionManager(database_path)
+            _managers[key] = manager
+        return manager
+
+
+def get_connection(database_path: str) -> sqlite3.Connection:
+    """Get the calling thread's shared connection for a database file."""
+    return get_connection_manager(database_path).get_connection()
+
+
+def transaction(database_path: str):
+    """Shortcut for get_connection_manager(path).transaction()."""
+    return get_connection_manager(database_path).transaction()
+
+
+def release_connection_manager(database_path: str):
+    """Close and forget the manager for a file the process is done with, such as an archive."""
+    with _managers_lock:
+        manager = _managers.pop(os.path.abspath(database_path), None)
+    if manager is not None:
+        manager.close_all()
+
+
+def close_thread_connections():
+    """Close the calling thread's connections to every managed database."""
+    with _managers_lock:
+        managers = list(_managers.values())
+    for manager in managers:
+        manager.close_thread_connection()
+
+
+def close_all_connections():
+    """Close all managed connections, used on application shutdown."""
+    with _managers_lock:
+        managers = list(_managers.values())
+    for manager in managers:
+        manager.close_all()
@@ -0,0 +1,234 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .db_connection import get_connection_manager
+
+WriteCommand = Callable[[sqlite3.Connection], Any]
+
+_STOP = object()
+
+
+class DatabaseWriter(threading.Thread):
+    """Single writer thread that applies queued write commands in group commits.
+
+    Callers submit a callable taking the writer's connection and get a Future
+    back. Commands that arrive together share one transaction (one commit);
+    each runs inside its own savepoint so a failing command doesn't roll back
+    its neighbours. Futures are resolved only after the batch has committed.
+    Done-callbacks run on the writer thread, so GUI code should hop back to the
+    GUI thread with a Qt signal.
+    """
+
+    def __init__(self, database_path: str, max_queue: int = 1000, max_batch: int = 64,
+                 batch_window: float = 0.005, submit_timeout: float = 2.0):
+        super().__init__(name="DatabaseWriter", daemon=True)
+        self.database_path = database_path
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.submit_timeout = submit_timeout
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'commands': 0,
+            'failed_commands': 0,
+            'commits': 0,
+            'failed_commits': 0,
+            'largest_batch': 0,
+            'queue_wait_total': 0.0,
+            'queue_wait_max': 0.0,
+        }
+        # Commands taken off the queue whose batch hasn't committed yet
+        self._in_flight = 0
+
+    # ------------------------------------------------------------------ submit
+
+    def submit(self, command: WriteCommand) -> Future:
+        """Queue a write command; the Future resolves to the command's return value."""
+        future: Future = Future()
+        if not self.is_alive():
+            future.set_exception(RuntimeError("Database writer is not running"))
+            return future
+        try:
+            self._queue.put((command, future, time.perf_counter()), timeout=self.submit_timeout)
+        except queue.Full:
+            logging.error(f"Database write queue full ({self._queue.maxsize} pending); command rejected")
+            future.set_exception(RuntimeError("Database is busy, please try again"))
+        return future
+
+    def execute(self, sql: str, params: Sequence = ()) -> Future:
+        """Queue a single statement; resolves to (lastrowid, rowcount)."""
+        def command(conn: sqlite3.Connection) -> Tuple[Optional[int], int]:
+            cursor = conn.execute(sql, params)
+            return cursor.lastrowid, cursor.rowcount
+        return self.submit(command)
+
+    def executemany(self, sql: str, rows: Iterable[Sequence]) -> Future:
+        """Queue a batched statement; resolves to the total rowcount."""
+        rows = list(rows)
+
+        def command(conn: sqlite3.Connection) -> int:
+            return conn.executemany(sql, rows).rowcount
+        return self.submit(command)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far has been committed."""
+        marker = self.submit(lambda conn: None)
+        try:
+            marker.result(timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    def stop(self, timeout: Optional[float] = 10.0):
+        """Drain the queue, commit, and stop the thread."""
+        if not self.is_alive():
+            return
+        self._queue.put((_STOP, None, time.perf_counter()))
+        self.join(timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['in_flight'] = self._in_flight
+        return stats
+
+    def has_pending_writes(self) -> bool:
+        """Whether writes are queued or being committed; background work can give way to them."""
+        return self._in_flight > 0 or not self._queue.empty()
+
+    # ------------------------------------------------------------------ thread
+
+    def run(self):
+        manager = get_connection_manager(self.database_path)
+        conn = manager.get_connection()
+        logging.info("Database writer thread started")
+        stopping = False
+        try:
+            while not stopping:
+                batch = [self._queue.get()]
+                deadline = time.perf_counter() + self.batch_window
+                while len(batch) < self.max_batch:
+                    remaining = deadline - time.perf_counter()
+                    try:
+                        item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    batch.append(item)
+
+                commands = []
+                for item in batch:
+                    if item[0] is _STOP:
+                        stopping = True
+                    else:
+                        commands.append(item)
+                if commands:
+                    self._in_flight = len(commands)
+                    try:
+                        self._commit_batch(conn, commands)
+                    except Exception as e:
+                        logging.error(f"Database writer batch failed: {e}")
+                        if conn.in_transaction:
+                            conn.rollback()
+                        for _, future, _ in commands:
+                            if not future.done():
+                                future.set_exception(e)
+                    finally:
+                        self._in_flight = 0
+        finally:
+            manager.close_thread_connection()
+            logging.info("Database writer thread stopped")
+
+    def _commit_batch(self, conn: sqlite3.Connection, commands: List[tuple]):
+        started = time.perf_counter()
+        results = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+        except Exception as e:
+            logging.error(f"Database writer could not begin transaction: {e}")
+            for _, future, _ in commands:
+                future.set_exception(e)
+            return
+
+        for index, (command, future, queued_at) in enumerate(commands):
+            self._record_wait(started - queued_at)
+            savepoint = f"cmd_{index}"
+            conn.execute(f'SAVEPOINT {savepoint}')
+            try:
+                results.append((future, command(conn), None))
+                conn.execute(f'RELEASE {savepoint}')
+            except Exception as e:
+                logging.error(f"Database write command failed: {e}")
+                results.append((future, None, e))
+                if not conn.in_transaction:
+                    # The error aborted the whole transaction, including earlier commands
+                    with self._stats_lock:
+                        self._stats['failed_commits'] += 1
+                    for _, pending, _ in commands:
+                        if not pending.done():
+                            pending.set_exception(e)
+                    return
+                conn.execute(f'ROLLBACK TO {savepoint}')
+                conn.execute(f'RELEASE {savepoint}')
+
+        try:
+            conn.commit()
+        except Exception as e:
+            logging.error(f"Database writer commit failed for {len(commands)} command(s): {e}")
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            with self._stats_lock:
+                self._stats['failed_commits'] += 1
+            for future, _, _ in results:
+                future.set_exception(e)
+            return
+
+        with self._stats_lock:
+            self._stats['commits'] += 1
+            self._stats['commands'] += len(commands)
+            self._stats['failed_commands'] += sum(1 for _, _, error in results if error)
+            self._stats['largest_batch'] = max(self._stats['largest_batch'], len(commands))
+
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _record_wait(self, waited: float):
+        with self._stats_lock:
+            self._stats['queue_wait_total'] += waited
+            self._stats['queue_wait_max'] = max(self._stats['queue_wait_max'], waited)
+
+
+_writers: Dict[str, DatabaseWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_database_writer(database_path: str) -> DatabaseWriter:
+    """Get (starting if needed) the process-wide writer thread for a database file."""
+    key = os.path.abspath(database_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or not writer.is_alive():
+            writer = DatabaseWriter(database_path)
+            writer.start()
+            _writers[key] = writer
+        return writer
+
+
+def stop_database_writers(timeout: Optional[float] = 10.0):
+    """Flush and stop every writer thread, used on application shutdown."""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.stop(timeout)
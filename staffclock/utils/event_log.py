@@ -0,0 +1,291 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple, Union
+
+# One JSON object per line, one file per calendar day; files are never rotated away
+EVENT_FILE_PATTERN = re.compile(r"^events-(\d{4}-\d{2}-\d{2})\.jsonl$")
+
+# Deliberately not *.jsonl so the index never looks like an event file
+INDEX_FILENAME = "event_index.sqlite"
+
+# Typed top-level fields; anything else a helper passes goes under "details"
+EVENT_FIELDS = ('ts', 'type', 'level', 'user', 'user_name', 'role', 'action', 'success',
+                'record_id', 'duration_ms', 'records', 'target', 'severity', 'reason', 'message')
+
+
+def event_filename(day: date) -> str:
+    return f"events-{day.isoformat()}.jsonl"
+
+
+def make_event(event_type: str, **fields: Any) -> Dict[str, Any]:
+    """Build an event dict: known fields typed at the top level, the rest under details, None dropped."""
+    event: Dict[str, Any] = {'type': event_type}
+    details: Dict[str, Any] = {}
+    for key, value in fields.items():
+        if value is None:
+            continue
+        if key in EVENT_FIELDS:
+            event[key] = value
+        elif key == 'details' and isinstance(value, dict):
+            details.update(value)
+        else:
+            details[key] = value
+    if 'record_id' in event:
+        try:
+            event['record_id'] = int(event['record_id'])
+        except (TypeError, ValueError):
+            details['record_id'] = event.pop('record_id')
+    if details:
+        event['details'] = details
+    return event
+
+
+class EventLogHandler(logging.Handler):
+    """Writes the structured event attached to a log record (record.event) as one JSON line.
+
+    Records without an event are ignored, so this can sit next to the text
+    file handler on the same queue listener: each helper call produces one
+    record that goes to both sinks.
+    """
+
+    def __init__(self, folder: str):
+        super().__init__()
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self._day: Optional[date] = None
+        self._stream: Optional[IO[str]] = None
+
+    def emit(self, record: logging.LogRecord):
+        event = getattr(record, 'event', None)
+        if not isinstance(event, dict):
+            return
+        try:
+            created = datetime.fromtimestamp(record.created)
+            line = dict(event)
+            line.setdefault('ts', created.isoformat(timespec='milliseconds'))
+            line.setdefault('level', record.levelname)
+            # Keep key order stable: ts, type first
+            ordered = {'ts': line.pop('ts'), 'type': line.pop('type', 'event')}
+            ordered.update(line)
+            stream = self._stream_for(created.date())
+            stream.write(json.dumps(ordered, ensure_ascii=False, separators=(',', ':'), default=str) + '\n')
+            stream.flush()
+        except Exception:
+            self.handleError(record)
+
+    def _stream_for(self, day: date) -> IO[str]:
+        if self._stream is None or day != self._day:
+            if self._stream is not None:
+                self._stream.close()
+            self._stream = open(os.path.join(self.folder, event_filename(day)), 'a', encoding='utf-8')
+            self._day = day
+        return self._stream
+
+    def close(self):
+        self.acquire()
+        try:
+            if self._stream is not None:
+                self._stream.close()
+                self._stream = None
+        finally:
+            self.release()
+        super().close()
+
+
+class EventIndex:
+    """Offset index over the daily event files.
+
+    Maps (day, user, type) to the byte offset of each line, so a question like
+    "everything for staff 4321 last March" reads only the matching lines with
+    seeks. Event files are append-only, so each refresh only indexes what was
+    added since the last one.
+    """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.index_path = os.path.join(folder, INDEX_FILENAME)
+        self._lock = threading.RLock()
+        os.makedirs(folder, exist_ok=True)
+        self._ensure_schema()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.index_path, timeout=10.0)
+        # Rebuildable from the event files at any time
+        conn.execute('PRAGMA journal_mode=MEMORY')
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _ensure_schema(self):
+        try:
+            with self._connect() as conn:
+                self._create_tables(conn)
+        except sqlite3.DatabaseError as e:
+            logging.warning(f"Event index unreadable ({e}); rebuilding it")
+            os.remove(self.index_path)
+            with self._connect() as conn:
+                self._create_tables(conn)
+
+    @staticmethod
+    def _create_tables(conn: sqlite3.Connection):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS event_files (
+                filename TEXT PRIMARY KEY,
+                day TEXT NOT NULL,
+                indexed_bytes INTEGER NOT NULL,
+                events INTEGER NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS event_offsets (
+                day TEXT NOT NULL,
+                user TEXT,
+                type TEXT NOT NULL,
+                offset INTEGER NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_event_offsets_user_day ON event_offsets(user, day)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_event_offsets_day_type ON event_offsets(day, type)')
+
+    def refresh(self) -> int:
+        """Index whatever was appended to the event files since the last refresh; returns events added."""
+        with self._lock, self._connect() as conn:
+            known = {filename: indexed for filename, indexed in
+                     conn.execute("SELECT filename, indexed_bytes FROM event_files")}
+            added = 0
+            for filename in sorted(os.listdir(self.folder)):
+                match = EVENT_FILE_PATTERN.match(filename)
+                if not match:
+                    continue
+                path = os.path.join(self.folder, filename)
+                start = known.get(filename, 0)
+                size = os.path.getsize(path)
+                if size < start:
+                    # File was replaced; index it again from the top
+                    conn.execute("DELETE FROM event_offsets WHERE day = ?", (match.group(1),))
+                    conn.execute("DELETE FROM event_files WHERE filename = ?", (filename,))
+                    start = 0
+                if size == start:
+                    continue
+                rows, indexed_bytes = self._scan(path, match.group(1), start)
+                conn.executemany("INSERT INTO event_offsets (day, user, type, offset) VALUES (?, ?, ?, ?)", rows)
+                conn.execute('''
+                    INSERT INTO event_files (filename, day, indexed_bytes, events) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(filename) DO UPDATE SET indexed_bytes = excluded.indexed_bytes,
+                                                        events = events + excluded.events
+                ''', (filename, match.group(1), indexed_bytes, len(rows)))
+                added += len(rows)
+            for filename in known:
+                if not os.path.exists(os.path.join(self.folder, filename)):
+                    day = EVENT_FILE_PATTERN.match(filename).group(1)
+                    conn.execute("DELETE FROM event_offsets WHERE day = ?", (day,))
+                    conn.execute("DELETE FROM event_files WHERE filename = ?", (filename,))
+        if added:
+            logging.debug(f"Event index: {added} event(s) added")
+        return added
+
+    @staticmethod
+    def _scan(path: str, day: str, start: int) -> Tuple[List[Tuple[str, Optional[str], str, int]], int]:
+        rows = []
+        offset = start
+        with open(path, 'rb') as handle:
+            handle.seek(start)
+            for line in handle:
+                if not line.endswith(b'\n'):
+                    break  # still being written; picked up next time
+                try:
+                    event = json.loads(line)
+                    user = event.get('user')
+                    rows.append((day, str(user) if user is not None else None, event.get('type', 'event'), offset))
+                except ValueError:
+                    logging.warning(f"Skipping unreadable event at {os.path.basename(path)}:{offset}")
+                offset += len(line)
+        return rows, offset
+
+    def offsets(self, user: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None,
+                event_type: Optional[str] = None) -> List[Tuple[str, int]]:
+        """(filename, offset) of matching events, oldest first; days are ISO dates, inclusive."""
+        clauses, params = [], []
+        if user is not None:
+            clauses.append("user = ?")
+            params.append(str(user))
+        if start is not None:
+            clauses.append("day >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("day <= ?")
+            params.append(end)
+        if event_type is not None:
+            clauses.append("type = ?")
+            params.append(event_type)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(f"SELECT day, offset FROM event_offsets {where} ORDER BY day, offset", params)
+            return [(f"events-{day}.jsonl", offset) for day, offset in rows]
+
+
+DayLike = Union[date, str, None]
+
+
+def _day_text(value: DayLike) -> Optional[str]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).date().isoformat()
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    return value.isoformat()
+
+
+def query_events(folder: str, user: Optional[str] = None, start: DayLike = None, end: DayLike = None,
+                 event_type: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Stream events matching the filters, oldest first, reading only the indexed lines."""
+    index = EventIndex(folder)
+    index.refresh()
+    handle: Optional[IO[bytes]] = None
+    current = None
+    try:
+        for filename, offset in index.offsets(user, _day_text(start), _day_text(end), event_type):
+            if filename != current:
+                if handle is not None:
+                    handle.close()
+                handle = open(os.path.join(folder, filename), 'rb')
+                current = filename
+            handle.seek(offset)
+            yield json.loads(handle.readline())
+    finally:
+        if handle is not None:
+            handle.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Index or query the StaffClock structured event log.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = subparsers.add_parser("index", help="bring the offset index up to date")
+    index_parser.add_argument("folder", help="event folder (ProgramData/events)")
+
+    query_parser = subparsers.add_parser("query", help="print matching events as JSON lines")
+    query_parser.add_argument("folder", help="event folder (ProgramData/events)")
+    query_parser.add_argument("--user", help="staff code (or admin user)")
+    query_parser.add_argument("--from", dest="start", help="first day, YYYY-MM-DD")
+    query_parser.add_argument("--to", dest="end", help="last day, YYYY-MM-DD")
+    query_parser.add_argument("--type", dest="event_type", help="clock, auth, security, admin, backup, ...")
+
+    args = parser.parse_args()
+    if args.command == "index":
+        print(f"✅ {EventIndex(args.folder).refresh()} event(s) indexed")
+    else:
+        for found in query_events(args.folder, args.user, args.start, args.end, args.event_type):
+            print(json.dumps(found, ensure_ascii=False))
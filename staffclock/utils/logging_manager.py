@@ -1,25 +1,133 @@
+import atexit
 import logging
 import os
+import queue
 import socket
 import sqlite3
+import threading
 import traceback
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
-from typing import Optional, Dict, Any
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Union
+
+from .event_log import EventLogHandler, make_event
+
+OVERFLOW_POLICIES = ('drop', 'block')
+
+# Subsystem loggers are named staffclock.<subsystem>; settings.json "log_levels" sets each one's level,
+# e.g. {"clock": "WARNING", "monitor": "DEBUG", "root": "INFO"}
+SUBSYSTEM_PREFIX = "staffclock"
+SUBSYSTEMS = ('clock', 'monitor', 'timesheets', 'auth', 'security', 'admin', 'backup',
+              'database', 'printer', 'user_action', 'system', 'performance', 'error')
+
+
+def get_subsystem_logger(subsystem: str) -> logging.Logger:
+    """Logger for one area of the app; its level comes from settings.json "log_levels"."""
+    return logging.getLogger(f"{SUBSYSTEM_PREFIX}.{subsystem}")
+
+
+def apply_log_levels(levels: Optional[Dict[str, Union[str, int]]]) -> Dict[str, int]:
+    """Set subsystem levels from a {"subsystem": "LEVEL"} mapping; "root" sets the root logger.
+
+    Returns the levels that were applied. Unknown level names are reported and skipped.
+    """
+    applied: Dict[str, int] = {}
+    for subsystem, level in (levels or {}).items():
+        value = level if isinstance(level, int) else logging.getLevelName(str(level).upper())
+        if not isinstance(value, int):
+            logging.warning(f"⚠️ Ignoring unknown log level {level!r} for '{subsystem}'")
+            continue
+        target = logging.getLogger() if subsystem == 'root' else get_subsystem_logger(subsystem)
+        target.setLevel(value)
+        applied[subsystem] = value
+    if applied:
+        logging.info(f"Log levels applied: {', '.join(f'{k}={logging.getLevelName(v)}' for k, v in applied.items())}")
+    return applied
+
+
+class BoundedQueueHandler(QueueHandler):
+    """QueueHandler over a bounded queue that never stalls the caller for routine records.
+
+    When the queue is full, records below ERROR are dropped (policy 'drop') or
+    the caller waits up to block_timeout for space (policy 'block'). ERROR and
+    above always wait, so failures are not lost. Dropped records are counted and
+    reported with a warning once the queue has space again.
+    """
+
+    def __init__(self, log_queue: "queue.Queue", overflow: str = 'drop', block_timeout: float = 1.0):
+        super().__init__(log_queue)
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown log overflow policy: {overflow}")
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Queue the record as it is; the listener's handlers format the message
+        # and any traceback, so the caller doesn't pay for it
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            if record.levelno >= logging.ERROR or self.overflow == 'block':
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+            return
+        self._report_dropped()
+
+    def _report_dropped(self):
+        if not self.dropped:
+            return
+        with self._dropped_lock:
+            dropped, self.dropped = self.dropped, 0
+        notice = logging.LogRecord(
+            'logging_manager', logging.WARNING, __file__, 0,
+            f"⚠️ Log queue was full: {dropped} record(s) dropped", None, None
+        )
+        try:
+            self.queue.put_nowait(notice)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += dropped
+
+
+class _FlushingQueueListener(QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room so stop() always drains the queue instead of failing on a full one
+        self.queue.put(self._sentinel)
+
 
 class LoggingManager:
-    def __init__(self, log_file_path: str, max_bytes: int = 5242880, backup_count: int = 5):
+    def __init__(self, log_file_path: str, max_bytes: int = 5242880, backup_count: int = 5,
+                 queue_size: int = 10000, overflow: str = 'drop', event_folder: Optional[str] = None):
         """Initialize the logging manager.
         
         Args:
             log_file_path: Path to the log file
             max_bytes: Maximum size of log file before rotation (default 5MB)
             backup_count: Number of backup files to keep (default 5)
+            queue_size: Records buffered for the writer thread (default 10000)
+            overflow: What to do with a full queue, 'drop' or 'block' (default 'drop')
+            event_folder: Folder for the structured JSON-lines event log (default: events/ next to the log file)
         """
         self.log_file_path = log_file_path
         self.max_bytes = max_bytes
         self.backup_count = backup_count
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.event_folder = event_folder or os.path.join(os.path.dirname(log_file_path), "events")
+        self.event_handler: Optional[logging.Handler] = None
+        self.file_handler: Optional[logging.Handler] = None
+        self.queue_handler: Optional[BoundedQueueHandler] = None
+        self.listener: Optional[QueueListener] = None
+        self._shutdown_lock = threading.Lock()
         self._configure_logging()
+        atexit.register(self.shutdown)
 
     def _configure_logging(self):
         """Configure the logging system with enhanced formatting."""
@@ -39,6 +147,16 @@ class LoggingManager:
             backupCount=self.backup_count
         )
         file_handler.setFormatter(formatter)
+        self.file_handler = file_handler
+
+        # Callers only enqueue; formatting and disk writes happen on the listener thread
+        log_queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        self.queue_handler = BoundedQueueHandler(log_queue, self.overflow)
+        # log_* helpers attach a typed event to their record; it goes to the JSON-lines log as well
+        self.event_handler = EventLogHandler(self.event_folder)
+        self.listener = _FlushingQueueListener(log_queue, file_handler, self.event_handler,
+                                               respect_handler_level=True)
+        self.listener.start()
 
         # Configure root logger
         root_logger = logging.getLogger()
@@ -48,7 +166,52 @@ class LoggingManager:
         for handler in root_logger.handlers[:]:
             root_logger.removeHandler(handler)
         
-        root_logger.addHandler(file_handler)
+        root_logger.addHandler(self.queue_handler)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and records dropped since the last report."""
+        if self.queue_handler is None:
+            return {'queued': 0, 'dropped': 0, 'running': False}
+        return {
+            'queued': self.queue_handler.queue.qsize(),
+            'dropped': self.queue_handler.dropped,
+            'running': self.listener is not None,
+        }
+
+    def shutdown(self):
+        """Write out everything queued and go back to logging directly to the file.
+
+        Called from the main window's closeEvent and again at interpreter exit;
+        records logged after this still reach the file, synchronously.
+        """
+        with self._shutdown_lock:
+            if self.listener is None:
+                return
+            listener, self.listener = self.listener, None
+            self.queue_handler._report_dropped()
+            listener.stop()
+
+            root_logger = logging.getLogger()
+            root_logger.removeHandler(self.queue_handler)
+            if self.file_handler not in root_logger.handlers:
+                root_logger.addHandler(self.file_handler)
+            if self.event_handler not in root_logger.handlers:
+                root_logger.addHandler(self.event_handler)
+            self.file_handler.flush()
+
+    def apply_levels(self, levels: Optional[Dict[str, Union[str, int]]]) -> Dict[str, int]:
+        """Apply the settings.json "log_levels" mapping (see apply_log_levels)."""
+        return apply_log_levels(levels)
+
+    @staticmethod
+    def is_enabled(subsystem: str, level: int = logging.INFO) -> bool:
+        """Whether a record at level would be logged for subsystem; check before building costly details."""
+        return get_subsystem_logger(subsystem).isEnabledFor(level)
+
+    @staticmethod
+    def _emit(level: int, text: str, event_type: str, **fields: Any):
+        """Log the text line and attach the same information as a structured event."""
+        get_subsystem_logger(event_type).log(level, text, extra={'event': make_event(event_type, **fields)})
 
     def log_startup(self, app_version: str):
         """Log application startup information."""
@@ -68,6 +231,8 @@ class LoggingManager:
     def log_error(self, error: Exception, context: str = "", 
                  user: Optional[str] = None, additional_data: Optional[Dict[str, Any]] = None):
         """Log an error with full traceback, context, and enhanced details."""
+        if not self.is_enabled('error', logging.ERROR):
+            return
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
         # Build error context
@@ -90,28 +255,34 @@ class LoggingManager:
         
         # Log the structured error message
         error_msg = " | ".join(error_parts)
-        logging.error(error_msg)
+        self._emit(logging.ERROR, error_msg, 'error', user=user, action=context or None,
+                   message=str(error), error_type=type(error).__name__, details=additional_data)
         
         # Log the full traceback on a separate line for readability
-        logging.error(f"Traceback:\n{traceback.format_exc()}")
+        get_subsystem_logger('error').error(f"Traceback:\n{traceback.format_exc()}")
         
         # Log system info for critical errors
         if isinstance(error, (sqlite3.Error, ConnectionError, OSError)):
             try:
                 hostname = socket.gethostname()
-                logging.error(f"System Context: Host={hostname}")
+                get_subsystem_logger('error').error(f"System Context: Host={hostname}")
             except:
                 pass
 
     def log_database_operation(self, operation: str, details: str, success: bool):
         """Log database operations with consistent formatting."""
+        if not self.is_enabled('database'):
+            return
         status = "SUCCESS" if success else "FAILED"
-        logging.info(f"Database Operation [{status}] - {operation}: {details}")
+        self._emit(logging.INFO, f"Database Operation [{status}] - {operation}: {details}", 'database',
+                   action=operation, success=success, message=details)
 
     def log_user_action(self, user: str, action: str, details: Optional[str] = None, 
                        user_name: Optional[str] = None, user_role: Optional[str] = None,
                        session_info: Optional[Dict[str, Any]] = None):
         """Log user actions with enhanced context and formatting."""
+        if not self.is_enabled('user_action'):
+            return
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
         # Build comprehensive log message
@@ -141,16 +312,29 @@ class LoggingManager:
         log_parts.append(f"Time: {timestamp}")
         
         log_msg = " | ".join(log_parts)
-        logging.info(log_msg)
+        self._emit(logging.INFO, log_msg, 'user_action', user=user, user_name=user_name, role=user_role,
+                   action=action, message=details, details=session_info)
 
     def log_system_event(self, event_type: str, details: str):
         """Log system events with consistent formatting."""
-        logging.info(f"System Event [{event_type}]: {details}")
+        if not self.is_enabled('system'):
+            return
+        self._emit(logging.INFO, f"System Event [{event_type}]: {details}", 'system',
+                   action=event_type, message=details)
 
     def log_security_event(self, event_type: str, user: str, details: str, 
                           severity: str = "WARNING", user_name: Optional[str] = None,
                           ip_address: Optional[str] = None, attempt_count: Optional[int] = None):
         """Log security-related events with enhanced details and severity levels."""
+        # Log at appropriate level based on severity
+        if severity == "CRITICAL":
+            level = logging.CRITICAL
+        elif severity == "ERROR":
+            level = logging.ERROR
+        else:
+            level = logging.WARNING
+        if not self.is_enabled('security', level):
+            return
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
         # Build security event message
@@ -172,27 +356,27 @@ class LoggingManager:
         security_parts.append(f"Time: {timestamp}")
         
         security_msg = " | ".join(security_parts)
-        
-        # Log at appropriate level based on severity
-        if severity == "CRITICAL":
-            logging.critical(security_msg)
-        elif severity == "ERROR":
-            logging.error(security_msg)
-        else:
-            logging.warning(security_msg)
+        self._emit(level, security_msg, 'security', user=user, user_name=user_name, action=event_type,
+                   severity=severity, message=details, ip_address=ip_address, attempt_count=attempt_count)
 
     def log_printer_operation(self, operation: str, printer_ip: str, success: bool, details: Optional[str] = None):
         """Log printer operations with consistent formatting."""
+        if not self.is_enabled('printer'):
+            return
         status = "SUCCESS" if success else "FAILED"
         log_msg = f"Printer Operation [{status}] - {operation} - Printer: {printer_ip}"
         if details:
             log_msg += f" - {details}"
-        logging.info(log_msg)
+        self._emit(logging.INFO, log_msg, 'printer', action=operation, success=success,
+                   target=printer_ip, message=details)
     
     def log_authentication_attempt(self, user: str, auth_method: str, success: bool, 
                                  user_name: Optional[str] = None, failure_reason: Optional[str] = None,
                                  ip_address: Optional[str] = None):
         """Log authentication attempts with detailed context."""
+        level = logging.INFO if success else logging.WARNING
+        if not self.is_enabled('auth', level):
+            return
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         status = "SUCCESS" if success else "FAILED"
         
@@ -214,15 +398,17 @@ class LoggingManager:
         
         auth_msg = " | ".join(auth_parts)
         
-        if success:
-            logging.info(auth_msg)
-        else:
-            logging.warning(auth_msg)
+        self._emit(level, auth_msg, 'auth', user=user,
+                   user_name=user_name, action=auth_method, success=success, reason=failure_reason,
+                   ip_address=ip_address)
     
     def log_clock_operation(self, user: str, operation: str, success: bool, 
                            user_name: Optional[str] = None, user_role: Optional[str] = None,
                            timestamp: Optional[str] = None, additional_info: Optional[Dict[str, Any]] = None):
         """Log clock-in/out operations with comprehensive details."""
+        level = logging.INFO if success else logging.ERROR
+        if not self.is_enabled('clock', level):
+            return
         log_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         status = "SUCCESS" if success else "FAILED"
         
@@ -248,15 +434,18 @@ class LoggingManager:
         
         clock_msg = " | ".join(clock_parts)
         
-        if success:
-            logging.info(clock_msg)
-        else:
-            logging.error(clock_msg)
+        info = dict(additional_info or {})
+        self._emit(level, clock_msg, 'clock', user=user,
+                   user_name=user_name, role=user_role, action=operation, success=success,
+                   record_id=info.pop('record_id', None), action_time=timestamp, details=info)
     
     def log_admin_action(self, admin_user: str, action: str, target: Optional[str] = None,
                         admin_name: Optional[str] = None, details: Optional[str] = None,
                         success: bool = True):
         """Log administrative actions with enhanced audit trail."""
+        level = logging.INFO if success else logging.ERROR
+        if not self.is_enabled('admin', level):
+            return
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         status = "SUCCESS" if success else "FAILED"
         
@@ -278,14 +467,15 @@ class LoggingManager:
         
         admin_msg = " | ".join(admin_parts)
         
-        if success:
-            logging.info(admin_msg)
-        else:
-            logging.error(admin_msg)
+        self._emit(level, admin_msg, 'admin', user=admin_user,
+                   user_name=admin_name, action=action, target=target, success=success, message=details)
     
     def log_database_backup(self, backup_type: str, success: bool, file_path: Optional[str] = None,
                            records_count: Optional[int] = None, error_msg: Optional[str] = None):
         """Log database backup operations with detailed information."""
+        level = logging.INFO if success else logging.ERROR
+        if not self.is_enabled('backup', level):
+            return
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         status = "SUCCESS" if success else "FAILED"
         
@@ -305,15 +495,15 @@ class LoggingManager:
         
         backup_msg = " | ".join(backup_parts)
         
-        if success:
-            logging.info(backup_msg)
-        else:
-            logging.error(backup_msg)
+        self._emit(level, backup_msg, 'backup', action=backup_type,
+                   success=success, target=file_path, records=records_count, message=error_msg)
     
     def log_performance_metric(self, operation: str, duration_ms: float, 
                               records_processed: Optional[int] = None,
                               additional_metrics: Optional[Dict[str, Any]] = None):
         """Log performance metrics for monitoring system health."""
+        if not self.is_enabled('performance'):
+            return
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
         perf_parts = [f"PERFORMANCE_METRIC"]
@@ -330,4 +520,5 @@ class LoggingManager:
         perf_parts.append(f"Time: {timestamp}")
         
         perf_msg = " | ".join(perf_parts)
-        logging.info(perf_msg) 
\ No newline at end of file
+        self._emit(logging.INFO, perf_msg, 'performance', action=operation, duration_ms=round(duration_ms, 3),
+                   records=records_processed, details=additional_metrics) 
\ No newline at end of file
@@ -0,0 +1,196 @@
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .db_connection import get_connection
+
+
+class OpenShift:
+    """A clock record that has been clocked in but not out."""
+
+    __slots__ = ('staff_code', 'record_id', 'clock_in_time', 'name', 'role')
+
+    def __init__(self, staff_code: str, record_id: Optional[int], clock_in_time: str,
+                 name: Optional[str] = None, role: Optional[str] = None):
+        self.staff_code = staff_code
+        self.record_id = record_id
+        self.clock_in_time = clock_in_time
+        self.name = name or 'Unknown'
+        self.role = role or 'Unknown'
+
+    def hours_so_far(self, now: Optional[datetime] = None) -> float:
+        """Hours elapsed since clock-in."""
+        try:
+            clock_in = datetime.fromisoformat(self.clock_in_time)
+        except (TypeError, ValueError):
+            return 0.0
+        return max(0.0, ((now or datetime.now()) - clock_in).total_seconds() / 3600)
+
+
+_OPEN_SHIFTS_QUERY = """
+    SELECT cr.staff_code, cr.id, cr.clock_in_time, s.name, s.role
+    FROM clock_records cr
+    LEFT JOIN staff s ON cr.staff_code = s.code
+    WHERE cr.clock_out_time IS NULL
+"""
+
+
+class OpenShiftRegistry:
+    """In-memory index of open shifts keyed by staff code.
+
+    Loaded once from the partial open-shift index, then kept current by the
+    clock-in, clock-out and force clock-out paths so the kiosk and dashboards
+    never have to query for clock_out_time IS NULL.
+    """
+
+    def __init__(self, database_path: str):
+        self.database_path = database_path
+        self._shifts: Dict[str, OpenShift] = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    def load(self) -> int:
+        """(Re)load all open shifts from the database."""
+        conn = get_connection(self.database_path)
+        rows = conn.execute(_OPEN_SHIFTS_QUERY + " ORDER BY cr.clock_in_time").fetchall()
+        shifts = {}
+        for staff_code, record_id, clock_in_time, name, role in rows:
+            # Later rows win: the most recent open record is the one a clock-out closes
+            shifts[staff_code] = OpenShift(staff_code, record_id, clock_in_time, name, role)
+        with self._lock:
+            self._shifts = shifts
+            self._loaded = True
+        logging.info(f"Open-shift registry loaded: {len(shifts)} staff clocked in")
+        return len(shifts)
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def is_clocked_in(self, staff_code: str) -> bool:
+        self._ensure_loaded()
+        with self._lock:
+            return staff_code in self._shifts
+
+    def get(self, staff_code: str) -> Optional[OpenShift]:
+        self._ensure_loaded()
+        with self._lock:
+            return self._shifts.get(staff_code)
+
+    def count(self) -> int:
+        self._ensure_loaded()
+        with self._lock:
+            return len(self._shifts)
+
+    def active_shifts(self, order_by: str = 'name') -> List[OpenShift]:
+        """Snapshot of open shifts, ordered by 'name' or 'clock_in_time'."""
+        self._ensure_loaded()
+        with self._lock:
+            shifts = list(self._shifts.values())
+        shifts.sort(key=lambda shift: (getattr(shift, order_by) or ''))
+        return shifts
+
+    def open_shift(self, staff_code: str, record_id: Optional[int], clock_in_time: str,
+                   name: Optional[str] = None, role: Optional[str] = None):
+        """Record a clock-in; record_id may be None while the INSERT is still queued."""
+        with self._lock:
+            self._shifts[staff_code] = OpenShift(staff_code, record_id, clock_in_time, name, role)
+
+    def attach_record_id(self, staff_code: str, clock_in_time: str, record_id: int):
+        """Fill in the record id of a shift opened before its INSERT committed."""
+        with self._lock:
+            shift = self._shifts.get(staff_code)
+            if shift and shift.record_id is None and shift.clock_in_time == clock_in_time:
+                shift.record_id = record_id
+
+    def close_shift(self, staff_code: str, record_id: Optional[int] = None):
+        """Record a clock-out; with a record_id, only that shift is closed."""
+        with self._lock:
+            shift = self._shifts.get(staff_code)
+            if shift and (record_id is None or shift.record_id is None or shift.record_id == record_id):
+                del self._shifts[staff_code]
+
+    def discard_staff(self, staff_code: str):
+        """Forget a staff member entirely (e.g. after removal)."""
+        with self._lock:
+            self._shifts.pop(staff_code, None)
+
+    def refresh_staff(self, staff_code: str, conn: Optional[sqlite3.Connection] = None):
+        """Re-read one staff member's open shift through the partial index."""
+        conn = conn or get_connection(self.database_path)
+        row = conn.execute(
+            _OPEN_SHIFTS_QUERY + " AND cr.staff_code = ? ORDER BY cr.clock_in_time DESC LIMIT 1",
+            (staff_code,)
+        ).fetchone()
+        with self._lock:
+            if row:
+                self._shifts[staff_code] = OpenShift(*row)
+            else:
+                self._shifts.pop(staff_code, None)
+
+    def reconcile(self) -> Tuple[bool, List[str]]:
+        """Compare the registry with the database and correct any drift.
+
+        Returns (True, []) if they already agreed, otherwise (False, differences).
+        """
+        issues = []
+        try:
+            conn = get_connection(self.database_path)
+            rows = conn.execute(_OPEN_SHIFTS_QUERY + " ORDER BY cr.clock_in_time").fetchall()
+
+            db_shifts: Dict[str, OpenShift] = {}
+            open_counts: Dict[str, int] = {}
+            for staff_code, record_id, clock_in_time, name, role in rows:
+                db_shifts[staff_code] = OpenShift(staff_code, record_id, clock_in_time, name, role)
+                open_counts[staff_code] = open_counts.get(staff_code, 0) + 1
+
+            with self._lock:
+                cached = dict(self._shifts)
+
+                for staff_code in cached.keys() - db_shifts.keys():
+                    if cached[staff_code].record_id is None:
+                        # Clock-in still queued for the writer; keep it
+                        db_shifts[staff_code] = cached[staff_code]
+                        continue
+                    issues.append(f"Registry shows {staff_code} clocked in but the database does not")
+                for staff_code in db_shifts.keys() - cached.keys():
+                    issues.append(f"Database shows {staff_code} clocked in but the registry does not")
+                for staff_code in cached.keys() & db_shifts.keys():
+                    if cached[staff_code] is db_shifts[staff_code]:
+                        continue
+                    if cached[staff_code].record_id != db_shifts[staff_code].record_id:
+                        issues.append(f"Open record for {staff_code} is {db_shifts[staff_code].record_id} "
+                                      f"in the database but {cached[staff_code].record_id} in the registry")
+
+                self._shifts = db_shifts
+                self._loaded = True
+
+            for staff_code, count in open_counts.items():
+                if count > 1:
+                    issues.append(f"Staff {staff_code} has {count} open clock records")
+
+            if issues:
+                logging.warning(f"Open-shift registry reconciled with {len(issues)} difference(s): {issues}")
+            return not issues, issues
+
+        except Exception as e:
+            logging.error(f"Failed to reconcile open-shift registry: {e}")
+            return False, [f"Error reconciling open shifts: {str(e)}"]
+
+
+_registries: Dict[str, OpenShiftRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_open_shift_registry(database_path: str) -> OpenShiftRegistry:
+    """Get the process-wide open-shift registry for a database file."""
+    key = os.path.abspath(database_path)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = OpenShiftRegistry(database_path)
+            _registries[key] = registry
+        return registry
@@ -0,0 +1,322 @@
+import logging
+import sqlite3
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from .db_connection import get_connection
+
+
+class Migration:
+    """A single numbered schema change."""
+
+    def __init__(self, version: int, description: str, apply: Callable[[sqlite3.Connection], None],
+                 transactional: bool = True):
+        self.version = version
+        self.description = description
+        self.apply = apply
+        # Some statements (VACUUM, journal/auto_vacuum changes) cannot run inside a transaction
+        self.transactional = transactional
+
+
+def _baseline_schema(conn: sqlite3.Connection):
+    """Core tables, matching generate_default_database, for databases that predate it."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS staff (
+            name TEXT NOT NULL,
+            code TEXT UNIQUE PRIMARY KEY,
+            fingerprint TEXT,
+            role TEXT,
+            notes TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS clock_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            staff_code TEXT NOT NULL,
+            clock_in_time TEXT,
+            clock_out_time TEXT,
+            notes TEXT,
+            break_time TEXT,
+            FOREIGN KEY(staff_code) REFERENCES staff(code)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS archive_records (
+            staff_name TEXT,
+            staff_code TEXT,
+            clock_in TEXT,
+            clock_out TEXT,
+            notes TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS visitors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            car_reg TEXT,
+            purpose TEXT,
+            time_in TEXT,
+            time_out TEXT
+        )
+    ''')
+
+
+def _clock_records_indexes(conn: sqlite3.Connection):
+    """Per-staff history lookups and the open-shift check used on every clock action."""
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_clock_records_staff_clock_in
+        ON clock_records(staff_code, clock_in_time)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_clock_records_open_shifts
+        ON clock_records(staff_code)
+        WHERE clock_out_time IS NULL
+    ''')
+
+
+def _visitors_index(conn: sqlite3.Connection):
+    """Check-in/check-out lookups by visitor name and car registration."""
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_visitors_name_car_reg_time_out
+        ON visitors(name, car_reg, time_out)
+    ''')
+
+
+def _fingerprint_logs_index(conn: sqlite3.Connection):
+    """Verification statistics; creates the fingerprint tables if the manager hasn't yet."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS fingerprint_users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            employee_id TEXT UNIQUE NOT NULL,
+            employee_name TEXT NOT NULL,
+            biometric_user_id TEXT UNIQUE NOT NULL,
+            enrollment_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_verification TIMESTAMP,
+            verification_count INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'ACTIVE',
+            FOREIGN KEY (employee_id) REFERENCES staff(code)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS fingerprint_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            employee_id TEXT NOT NULL,
+            action_type TEXT NOT NULL,
+            success BOOLEAN NOT NULL,
+            match_score REAL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            notes TEXT,
+            FOREIGN KEY (employee_id) REFERENCES staff(code)
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_fingerprint_logs_action_success
+        ON fingerprint_logs(action_type, success)
+    ''')
+
+
+def _add_column(conn: sqlite3.Connection, table: str, column: str, definition: str):
+    columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+    if column not in columns:
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+def _epoch_trigger(conn: sqlite3.Connection, table: str, key: str, columns: List[Tuple[str, str]]):
+    """Keep <text>_epoch columns in step with their ISO text columns on insert and update."""
+    assignments = ', '.join(
+        f"{epoch} = CAST(strftime('%s', NEW.{text}) AS INTEGER)" for text, epoch in columns
+    )
+    text_columns = ', '.join(text for text, _ in columns)
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_epoch_insert
+        AFTER INSERT ON {table}
+        BEGIN
+            UPDATE {table} SET {assignments} WHERE {key} = NEW.{key};
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_epoch_update
+        AFTER UPDATE OF {text_columns} ON {table}
+        BEGIN
+            UPDATE {table} SET {assignments} WHERE {key} = NEW.{key};
+        END
+    ''')
+    backfill = ', '.join(f"{epoch} = CAST(strftime('%s', {text}) AS INTEGER)" for text, epoch in columns)
+    conn.execute(f'UPDATE {table} SET {backfill}')
+
+
+def _epoch_columns(conn: sqlite3.Connection):
+    """Integer wall-clock epoch columns so period queries are index range scans."""
+    clock_columns = [('clock_in_time', 'clock_in_epoch'), ('clock_out_time', 'clock_out_epoch')]
+    visitor_columns = [('time_in', 'time_in_epoch'), ('time_out', 'time_out_epoch')]
+
+    for _, epoch in clock_columns:
+        _add_column(conn, 'clock_records', epoch, 'INTEGER')
+    for _, epoch in visitor_columns:
+        _add_column(conn, 'visitors', epoch, 'INTEGER')
+
+    _epoch_trigger(conn, 'clock_records', 'id', clock_columns)
+    _epoch_trigger(conn, 'visitors', 'id', visitor_columns)
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_clock_records_staff_clock_in_epoch
+        ON clock_records(staff_code, clock_in_epoch)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_clock_records_clock_in_epoch
+        ON clock_records(clock_in_epoch)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_visitors_time_in_epoch
+        ON visitors(time_in_epoch)
+    ''')
+
+
+def _validation_queue(conn: sqlite3.Connection):
+    """Watermark and dirty-row queue so data validation only re-checks what changed."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS validation_state (
+            check_name TEXT PRIMARY KEY,
+            watermark INTEGER NOT NULL DEFAULT 0,
+            validated_at TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS validation_dirty (
+            record_id INTEGER PRIMARY KEY
+        )
+    ''')
+    # New rows are covered by the id watermark; edits and staff removals are queued
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_clock_records_validation_dirty
+        AFTER UPDATE OF staff_code, clock_in_time, clock_out_time ON clock_records
+        BEGIN
+            INSERT OR IGNORE INTO validation_dirty (record_id) VALUES (NEW.id);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_staff_validation_dirty
+        AFTER DELETE ON staff
+        BEGIN
+            INSERT OR IGNORE INTO validation_dirty (record_id)
+            SELECT id FROM clock_records WHERE staff_code = OLD.code;
+        END
+    ''')
+
+
+def _incremental_auto_vacuum(conn: sqlite3.Connection):
+    # auto_vacuum can only be switched on an existing file by a VACUUM rewrite;
+    # this is the last full rewrite, afterwards free pages are released in steps
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+        return
+    conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+    conn.execute('VACUUM')
+
+
+def _shift_breaks(conn: sqlite3.Connection):
+    """Individual breaks per shift; clock_records.break_time keeps the running total in minutes."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS shift_breaks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            clock_record_id INTEGER NOT NULL,
+            staff_code TEXT NOT NULL,
+            break_start TEXT NOT NULL,
+            break_end TEXT,
+            minutes REAL,
+            FOREIGN KEY(clock_record_id) REFERENCES clock_records(id)
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_shift_breaks_record
+        ON shift_breaks(clock_record_id)
+    ''')
+    # Breaks in progress, loaded into the break registry at startup
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_shift_breaks_open
+        ON shift_breaks(staff_code) WHERE break_end IS NULL
+    ''')
+    # Archiving, resets and offboarding all delete clock records; their breaks go with them
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_clock_records_delete_breaks
+        AFTER DELETE ON clock_records
+        BEGIN
+            DELETE FROM shift_breaks WHERE clock_record_id = OLD.id;
+        END
+    ''')
+
+
+# Append new migrations to the end; never renumber or edit one that has shipped.
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Baseline schema", _baseline_schema),
+    Migration(2, "Indexes on clock_records staff/clock-in and open shifts", _clock_records_indexes),
+    Migration(3, "Index on visitors name/car_reg/time_out", _visitors_index),
+    Migration(4, "Index on fingerprint_logs action_type/success", _fingerprint_logs_index),
+    Migration(5, "Integer epoch columns on clock_records and visitors", _epoch_columns),
+    Migration(6, "Validation watermark and dirty-row queue", _validation_queue),
+    Migration(7, "auto_vacuum=INCREMENTAL", _incremental_auto_vacuum, transactional=False),
+    Migration(8, "Per-shift break records", _shift_breaks),
+]
+
+
+def _ensure_version_table(conn: sqlite3.Connection):
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at TEXT NOT NULL
+            )
+        ''')
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Return the highest migration version applied to the database (0 if none)."""
+    _ensure_version_table(conn)
+    row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+
+def _apply(conn: sqlite3.Connection, migration: Migration):
+    record = ('INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)',
+              (migration.version, migration.description, datetime.now().isoformat()))
+    if migration.transactional:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            migration.apply(conn)
+            conn.execute(*record)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    else:
+        migration.apply(conn)
+        with conn:
+            conn.execute(*record)
+
+
+def run_migrations(database_path: str) -> Tuple[bool, str]:
+    """Bring the database up to the latest schema version, one migration at a time."""
+    try:
+        conn = get_connection(database_path)
+        current = get_schema_version(conn)
+        pending = [m for m in MIGRATIONS if m.version > current]
+
+        if not pending:
+            logging.info(f"Database schema is up to date (version {current})")
+            return True, f"Schema up to date (version {current})"
+
+        logging.info(f"Upgrading database schema from version {current} to {pending[-1].version}")
+        for migration in pending:
+            _apply(conn, migration)
+            logging.info(f"Applied schema migration {migration.version}: {migration.description}")
+
+        # Refresh planner statistics so the new indexes are used
+        conn.execute('PRAGMA optimize')
+
+        message = f"Schema upgraded from version {current} to {pending[-1].version}"
+        logging.info(message)
+        return True, message
+
+    except Exception as e:
+        logging.error(f"Schema migration failed: {e}")
+        return False, f"Error migrating database schema: {str(e)}"
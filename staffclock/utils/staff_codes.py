@@ -0,0 +1,174 @@
+import heapq
+import logging
+import os
+import random
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .db_connection import transaction, get_connection
+
+STAFF_CODE_MIN = 1000
+STAFF_CODE_MAX = 9999
+
+ALLOCATION_MODES = ('random', 'sequential')
+
+
+class StaffCodeAllocator:
+    """Hands out unused staff codes without probing the staff table.
+
+    The used codes are read once with a single query; after that every
+    allocation is an O(1) pick from the free pool (random mode: swap-remove
+    from a list) or a heap pop of the lowest free code (sequential mode).
+    Codes are reserved in memory before the INSERT, so concurrent callers in
+    this process never get the same code, and the INSERT itself stays the
+    final arbiter: a code taken behind our back fails the UNIQUE constraint,
+    the pool is rebuilt and the batch is retried.
+    """
+
+    def __init__(self, database_path: str, mode: str = 'random',
+                 low: int = STAFF_CODE_MIN, high: int = STAFF_CODE_MAX):
+        if mode not in ALLOCATION_MODES:
+            raise ValueError(f"Unknown staff code allocation mode: {mode}")
+        self.database_path = database_path
+        self.mode = mode
+        self.low = low
+        self.high = high
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._free: List[int] = []
+        self._positions: Dict[int, int] = {}
+        self._heap: List[int] = []
+
+    # ------------------------------------------------------------------ pool
+
+    def _load(self):
+        rows = get_connection(self.database_path).execute("SELECT code FROM staff").fetchall()
+        used = set()
+        for (code,) in rows:
+            try:
+                used.add(int(code))
+            except (TypeError, ValueError):
+                continue  # codes outside the numeric space don't affect the pool
+        self._free = [code for code in range(self.low, self.high + 1) if code not in used]
+        self._positions = {code: index for index, code in enumerate(self._free)}
+        self._heap = list(self._free)  # already sorted, so already a heap
+        self._loaded = True
+        logging.debug(f"Staff code pool loaded: {len(self._free)} free of {self.high - self.low + 1}")
+
+    def _take(self, code: int):
+        index = self._positions.pop(code)
+        last = self._free.pop()
+        if last != code:
+            self._free[index] = last
+            self._positions[last] = index
+
+    def _pick(self) -> int:
+        if self.mode == 'sequential':
+            while self._heap:
+                code = heapq.heappop(self._heap)
+                if code in self._positions:
+                    self._take(code)
+                    return code
+            raise LookupError("No free staff codes left")
+        if not self._free:
+            raise LookupError("No free staff codes left")
+        code = self._free[random.randrange(len(self._free))]
+        self._take(code)
+        return code
+
+    def invalidate(self):
+        """Forget the pool; it is re-read from the staff table on the next allocation."""
+        with self._lock:
+            self._loaded = False
+
+    def free_count(self) -> int:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            return len(self._free)
+
+    def reserve(self, count: int = 1) -> List[str]:
+        """Take `count` free codes out of the pool; raises LookupError if there aren't enough."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if count > len(self._free):
+                raise LookupError(f"Only {len(self._free)} free staff code(s) left, {count} needed")
+            return [str(self._pick()) for _ in range(count)]
+
+    def release(self, codes: Iterable[str]):
+        """Return codes to the pool: reservations that weren't used, or codes of removed staff."""
+        with self._lock:
+            if not self._loaded:
+                return
+            for code in codes:
+                try:
+                    value = int(code)
+                except (TypeError, ValueError):
+                    continue
+                if self.low <= value <= self.high and value not in self._positions:
+                    self._positions[value] = len(self._free)
+                    self._free.append(value)
+                    heapq.heappush(self._heap, value)
+
+    # ------------------------------------------------------------------ creation
+
+    def create_staff(self, members: Sequence[Tuple[str, Optional[str]]],
+                     retries: int = 3) -> Tuple[bool, str, List[Tuple[str, str, Optional[str]]]]:
+        """Insert staff members with freshly allocated codes in one transaction.
+
+        members is a list of (name, role). Returns (success, message, created)
+        where created lists (code, name, role) in the order given.
+        """
+        if not members:
+            return False, "No staff members given", []
+
+        for attempt in range(retries):
+            try:
+                codes = self.reserve(len(members))
+            except LookupError as e:
+                logging.error(f"Cannot allocate staff codes: {e}")
+                return False, str(e), []
+
+            created = [(code, name, role) for code, (name, role) in zip(codes, members)]
+            try:
+                with transaction(self.database_path) as conn:
+                    conn.executemany('INSERT INTO staff (code, name, role) VALUES (?, ?, ?)', created)
+                message = f"Added {len(created)} staff member(s)"
+                logging.info(message)
+                return True, message, created
+            except sqlite3.IntegrityError as e:
+                # Someone else took one of the codes; re-read what is in use and try again
+                logging.warning(f"Staff code collision on attempt {attempt + 1}: {e}")
+                self.invalidate()
+            except Exception as e:
+                self.release(codes)
+                logging.error(f"Failed to add staff members: {e}")
+                return False, f"Error adding staff: {str(e)}", []
+
+        return False, "Could not allocate unique staff codes; please try again", []
+
+    def create_one(self, name: str, role: Optional[str] = None) -> Tuple[bool, str, Optional[str]]:
+        """Insert one staff member; returns (success, message, code)."""
+        success, message, created = self.create_staff([(name, role)])
+        return success, message, created[0][0] if created else None
+
+
+_allocators: Dict[str, StaffCodeAllocator] = {}
+_allocators_lock = threading.Lock()
+
+
+def get_staff_code_allocator(database_path: str, mode: Optional[str] = None) -> StaffCodeAllocator:
+    """Get the process-wide allocator for a database; mode switches it between random and sequential."""
+    key = os.path.abspath(database_path)
+    with _allocators_lock:
+        allocator = _allocators.get(key)
+        if allocator is None:
+            allocator = StaffCodeAllocator(database_path, mode or 'random')
+            _allocators[key] = allocator
+        elif mode is not None and mode != allocator.mode:
+            if mode not in ALLOCATION_MODES:
+                raise ValueError(f"Unknown staff code allocation mode: {mode}")
+            allocator.mode = mode
+        return allocator
@@ -0,0 +1,125 @@
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from .db_connection import get_connection
+
+
+class StaffEntry:
+    """One staff member as the kiosk needs them for greetings and clock actions."""
+
+    __slots__ = ('code', 'name', 'role', 'enrolled')
+
+    def __init__(self, code: str, name: str, role: Optional[str] = None, enrolled: bool = False):
+        self.code = code
+        self.name = name
+        self.role = role
+        self.enrolled = enrolled
+
+
+_STAFF_QUERY = """
+    SELECT s.code, s.name, s.role,
+           EXISTS (SELECT 1 FROM fingerprint_users f
+                   WHERE f.employee_id = s.code AND f.status = 'ACTIVE') AS enrolled
+    FROM staff s
+"""
+
+
+class StaffDirectory:
+    """In-memory staff lookup keyed by code.
+
+    Loaded with one query at startup so keypad lookups, greetings and clock
+    actions never touch the disk. add/remove/import paths update or
+    invalidate it; after invalidate() the next lookup reloads everything.
+    """
+
+    def __init__(self, database_path: str):
+        self.database_path = database_path
+        self._staff: Dict[str, StaffEntry] = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    def load(self) -> int:
+        """(Re)load the whole directory from the database."""
+        rows = self._query()
+        with self._lock:
+            self._staff = {str(code): StaffEntry(str(code), name, role, bool(enrolled))
+                           for code, name, role, enrolled in rows}
+            self._loaded = True
+        logging.info(f"Staff directory loaded: {len(rows)} staff member(s)")
+        return len(rows)
+
+    def _query(self, staff_code: Optional[str] = None) -> List[tuple]:
+        conn = get_connection(self.database_path)
+        query, params = _STAFF_QUERY, ()
+        if staff_code is not None:
+            query, params = _STAFF_QUERY + " WHERE s.code = ?", (staff_code,)
+        try:
+            return conn.execute(query, params).fetchall()
+        except sqlite3.OperationalError:
+            # Databases the fingerprint tables were never created in
+            fallback = "SELECT code, name, role, 0 FROM staff"
+            if staff_code is not None:
+                return conn.execute(fallback + " WHERE code = ?", params).fetchall()
+            return conn.execute(fallback).fetchall()
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def invalidate(self):
+        """Drop the cache; it is reloaded on the next lookup."""
+        with self._lock:
+            self._loaded = False
+
+    def get(self, staff_code: str) -> Optional[StaffEntry]:
+        with self._lock:
+            self._ensure_loaded()
+            return self._staff.get(str(staff_code))
+
+    def exists(self, staff_code: str) -> bool:
+        return self.get(staff_code) is not None
+
+    def count(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._staff)
+
+    def refresh_staff(self, staff_code: str):
+        """Re-read one staff member after it was added or changed (or drop it if gone)."""
+        rows = self._query(str(staff_code))
+        with self._lock:
+            if not self._loaded:
+                return  # the full load will pick it up
+            if rows:
+                code, name, role, enrolled = rows[0]
+                self._staff[str(code)] = StaffEntry(str(code), name, role, bool(enrolled))
+            else:
+                self._staff.pop(str(staff_code), None)
+
+    def remove(self, staff_code: str):
+        with self._lock:
+            self._staff.pop(str(staff_code), None)
+
+    def set_enrolled(self, staff_code: str, enrolled: bool):
+        with self._lock:
+            entry = self._staff.get(str(staff_code))
+            if entry is not None:
+                entry.enrolled = enrolled
+
+
+_directories: Dict[str, StaffDirectory] = {}
+_directories_lock = threading.Lock()
+
+
+def get_staff_directory(database_path: str) -> StaffDirectory:
+    """Get the process-wide staff directory for a database."""
+    key = os.path.abspath(database_path)
+    with _directories_lock:
+        directory = _directories.get(key)
+        if directory is None:
+            directory = StaffDirectory(database_path)
+            _directories[key] = directory
+        return directory
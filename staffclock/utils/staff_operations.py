@@ -0,0 +1,93 @@
+import csv
+import logging
+from typing import Dict, List, Sequence, Tuple
+
+from .db_connection import transaction
+
+# Column headers read_staff_codes_csv accepts for the staff code, in preference order
+_CODE_HEADERS = ('staff_code', 'code', 'staff code')
+
+
+def remove_staff_members(database_path: str, staff_codes: Sequence[str]) -> Tuple[bool, str, List[Tuple[str, str]]]:
+    """Archive and remove staff members and their clock records in one transaction.
+
+    Every clock record of every listed staff member is copied into
+    archive_records with one INSERT ... SELECT (staff with no records get a
+    single placeholder row, as remove_staff always did), then the clock records
+    and staff rows are deleted. Codes that don't exist are reported and skipped.
+
+    Returns (success, message, removed) where removed lists (code, name) pairs.
+    """
+    codes = list(dict.fromkeys(str(code).strip() for code in staff_codes if str(code).strip()))
+    if not codes:
+        return False, "No staff codes given", []
+
+    try:
+        with transaction(database_path) as conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS offboard_codes (code TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM temp.offboard_codes")
+            conn.executemany("INSERT OR IGNORE INTO temp.offboard_codes (code) VALUES (?)",
+                             [(code,) for code in codes])
+
+            removed = conn.execute('''
+                SELECT s.code, s.name FROM staff s
+                JOIN temp.offboard_codes o ON o.code = s.code
+                ORDER BY s.name
+            ''').fetchall()
+
+            archived = conn.execute('''
+                INSERT INTO archive_records (staff_name, staff_code, clock_in, clock_out, notes)
+                SELECT s.name, s.code, cr.clock_in_time, cr.clock_out_time, ''
+                FROM staff s
+                JOIN temp.offboard_codes o ON o.code = s.code
+                JOIN clock_records cr ON cr.staff_code = s.code
+                ORDER BY s.code, cr.clock_in_time
+            ''').rowcount
+
+            # Keep a trace of staff who never clocked anything
+            conn.execute('''
+                INSERT INTO archive_records (staff_name, staff_code, clock_in, clock_out, notes)
+                SELECT s.name, s.code, NULL, NULL, NULL
+                FROM staff s
+                JOIN temp.offboard_codes o ON o.code = s.code
+                WHERE NOT EXISTS (SELECT 1 FROM clock_records cr WHERE cr.staff_code = s.code)
+            ''')
+
+            deleted_records = conn.execute(
+                "DELETE FROM clock_records WHERE staff_code IN (SELECT code FROM temp.offboard_codes)"
+            ).rowcount
+            conn.execute("DELETE FROM staff WHERE code IN (SELECT code FROM temp.offboard_codes)")
+            conn.execute("DROP TABLE temp.offboard_codes")
+
+        removed = [(code, name) for code, name in removed]
+        missing = sorted(set(codes) - {code for code, _ in removed})
+
+        message = f"Removed {len(removed)} staff member(s) and archived {archived} clock record(s)"
+        if missing:
+            message += f"; {len(missing)} code(s) not found: {', '.join(missing)}"
+        logging.info(f"{message} ({deleted_records} clock record(s) deleted)")
+        return True, message, removed
+
+    except Exception as e:
+        logging.error(f"Failed to remove staff members {codes}: {e}")
+        return False, f"Error removing staff: {str(e)}", []
+
+
+def read_staff_codes_csv(csv_path: str) -> List[str]:
+    """Staff codes from a CSV with a staff_code/code column, or from its first column if there is no header."""
+    with open(csv_path, newline='', encoding='utf-8-sig') as handle:
+        rows = [row for row in csv.reader(handle) if row and any(cell.strip() for cell in row)]
+    if not rows:
+        return []
+
+    header: Dict[str, int] = {cell.strip().lower(): index for index, cell in enumerate(rows[0])}
+    for name in _CODE_HEADERS:
+        if name in header:
+            column = header[name]
+            return [row[column].strip() for row in rows[1:] if len(row) > column and row[column].strip()]
+
+    # No recognised header: first column, skipping a non-numeric title row
+    codes = [row[0].strip() for row in rows if row[0].strip()]
+    if codes and not codes[0].isdigit():
+        codes = codes[1:]
+    return codes
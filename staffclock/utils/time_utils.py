@@ -0,0 +1,94 @@
+import calendar
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, Tuple, Union
+
+# Timestamps are stored as naive local ISO strings (datetime.now().isoformat()).
+# The *_epoch columns hold the same wall-clock value as seconds, computed in
+# SQLite with strftime('%s', ...), which reads the text as if it were UTC.
+# Converting bounds here the same way keeps both sides comparable and free of
+# DST jumps.
+
+DateLike = Union[datetime, date, str]
+
+
+def to_epoch(value: DateLike) -> Optional[int]:
+    """Convert a datetime, date or ISO string to wall-clock epoch seconds."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    return calendar.timegm(value.timetuple())
+
+
+def from_epoch(seconds: int) -> datetime:
+    """Convert wall-clock epoch seconds back to a naive datetime."""
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(tzinfo=None)
+
+
+def day_bounds(day: DateLike) -> Tuple[int, int]:
+    """Half-open [start, end) epoch range covering one calendar day."""
+    return period_bounds(day, day)
+
+
+def period_bounds(start_date: DateLike, end_date: DateLike) -> Tuple[int, int]:
+    """Half-open [start, end) epoch range covering start_date through end_date inclusive.
+
+    Equivalent to DATE(column) BETWEEN start_date AND end_date.
+    """
+    start = _as_date(start_date)
+    end = _as_date(end_date) + timedelta(days=1)
+    return to_epoch(start), to_epoch(end)
+
+
+def pay_period(day: DateLike, start_day: int) -> Tuple[date, date]:
+    """First and last day of the pay period containing `day`.
+
+    Periods run from start_day of one month to the day before start_day of the
+    next (clamped to short months), matching the start_day setting.
+    """
+    day = _as_date(day)
+    start = _month_day(day.year, day.month, start_day)
+    if day < start:
+        start = _month_day(*_add_months(day.year, day.month, -1), start_day)
+    next_start = _month_day(*_add_months(start.year, start.month, 1), start_day)
+    return start, next_start - timedelta(days=1)
+
+
+def break_minutes(break_time) -> float:
+    """clock_records.break_time (total break minutes, stored as text) as a number."""
+    try:
+        return max(0.0, float(break_time)) if break_time not in (None, '') else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def worked_hours(clock_in: DateLike, clock_out: DateLike, break_time=None) -> float:
+    """Hours between clock-in and clock-out with the shift's breaks deducted."""
+    if isinstance(clock_in, str):
+        clock_in = datetime.fromisoformat(clock_in)
+    if isinstance(clock_out, str):
+        clock_out = datetime.fromisoformat(clock_out)
+    hours = (clock_out - clock_in).total_seconds() / 3600 - break_minutes(break_time) / 60
+    return max(0.0, hours)
+
+
+def _month_day(year: int, month: int, day: int) -> date:
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def _add_months(year: int, month: int, months: int) -> Tuple[int, int]:
+    index = year * 12 + (month - 1) + months
+    return index // 12, index % 12 + 1
+
+
+def _as_date(value: DateLike) -> date:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value